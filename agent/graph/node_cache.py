@@ -0,0 +1,135 @@
+# agent/graph/node_cache.py
+"""
+Memoization of graph nodes on their resolved inputs.
+
+A node declares how to resolve its inputs from the state (team, city,
+venue...), which of them key its answer, and for how long:
+
+    @memoize_node("WeatherNode", inputs=_weather_inputs, key_fields=("city",),
+                  ttl=NODE_TTLS, cacheable=lambda output, writes: "weather_summary" in writes)
+    def weather_node(state, inputs): ...
+
+Answers are keyed on (intent, key fields, TTL window), so whoever asks for
+the same thing within a window shares one answer, and concurrent identical
+requests are coalesced into one node run (ttl_cache single-flight).
+
+The session memory writes of that run (city, venue, summaries...) are
+recorded with the answer and replayed into every caller's own session, so
+follow-up questions still find their context.
+"""
+import functools
+import logging
+import threading
+import time
+
+from core.config import settings
+from agent.state.session_memory import memory
+from utils.cache_utils import ttl_cache
+
+logger = logging.getLogger(__name__)
+
+NODE_TTLS = settings.node_cache_ttl_seconds
+
+# node name → NodeCacheStats, for /stats
+_registry: dict[str, "NodeCacheStats"] = {}
+_registry_lock = threading.Lock()
+
+
+class NodeCacheStats:
+    def __init__(self, node: str, cache):
+        self.node = node
+        self.cache = cache          # the node's TTLCache (hits, misses, coalesced)
+        self._lock = threading.Lock()
+        self.bypassed = 0           # intent not memoized, or a required input missing
+        self.replayed_writes = 0
+        self.run_seconds = 0.0      # time spent in actual node runs
+
+    def record(self, bypassed: int = 0, replayed: int = 0, run_seconds: float = 0.0):
+        with self._lock:
+            self.bypassed += bypassed
+            self.replayed_writes += replayed
+            self.run_seconds += run_seconds
+
+    def stats(self) -> dict:
+        cache = self.cache.stats()
+        runs = cache["misses"] - cache["coalesced"]
+        with self._lock:
+            return {
+                "hits": cache["hits"],
+                "misses": runs,
+                "coalesced": cache["coalesced"],
+                "hit_rate": round((cache["hits"] + cache["coalesced"]) / (cache["hits"] + cache["misses"]), 3)
+                            if cache["hits"] + cache["misses"] else 0.0,
+                "bypassed": self.bypassed,
+                "uncacheable": cache["uncacheable"],
+                "entries": cache["entries"],
+                "replayed_writes": self.replayed_writes,
+                "avg_run_ms": round(self.run_seconds / runs * 1000, 1) if runs > 0 else None,
+            }
+
+
+def _window(ttl, intent: str) -> float:
+    return ttl.get(intent, 0) if isinstance(ttl, dict) else ttl
+
+
+def memoize_node(name: str, inputs, key_fields: tuple, ttl, cacheable, required: tuple | None = None):
+    """
+    Memoize a sync node `node(state, inputs)`.
+
+    `inputs(state)` resolves the node's inputs (a dict); the answer is keyed
+    on the intent and `key_fields` of it, and computed without the cache
+    when a `required` field (default: all key fields) is missing. `ttl` is
+    seconds or {intent: seconds}; intents without one are not memoized.
+    `cacheable(output, writes)` rejects failed answers; a node can also
+    return `"cacheable": False` to keep one answer out (e.g. built from
+    partial upstream data). Wrap the memoized node inside its memory
+    transaction.
+    """
+    required = key_fields if required is None else required
+    max_ttl = max(ttl.values()) if isinstance(ttl, dict) else ttl
+
+    def decorate(node):
+        # an entry only serves its own window, so it never needs to outlive the longest one
+        @ttl_cache(ttl=max_ttl, name=f"node_cache.{name}", key=lambda key, state, resolved: key,
+                   cacheable=lambda answer: answer["cacheable"] and cacheable(answer["output"], answer["writes"]))
+        def run(key, state, resolved):
+            start = time.perf_counter()
+            before = memory.pending(state["session_id"])
+            result = node(state, resolved)
+            after = memory.pending(state["session_id"])
+            stats.record(run_seconds=time.perf_counter() - start)
+            writes = {k: v for k, v in after.items() if k not in before or before[k] is not v}
+            return {"output": result["output"], "writes": writes, "cacheable": result.get("cacheable", True)}
+
+        stats = NodeCacheStats(name, run.cache)
+        with _registry_lock:
+            _registry[name] = stats
+
+        @functools.wraps(node)
+        def wrapper(state):
+            resolved = inputs(state)
+            window = _window(ttl, state["intent"])
+            if not window or not all(resolved.get(f) for f in required):
+                stats.record(bypassed=1)
+                return {"output": node(state, resolved)["output"]}
+
+            fields = tuple(str(resolved.get(f) or "").strip().lower() for f in key_fields)
+            key = (state["intent"], fields, int(time.time() // window))
+            answer = run(key, state, resolved)
+            if answer["writes"]:
+                # a no-op for the run that produced them
+                memory.update(state["session_id"], answer["writes"])
+                stats.record(replayed=1)
+            return {"output": answer["output"]}
+
+        wrapper.cache = run.cache
+        wrapper.uncached = node
+        return wrapper
+
+    return decorate
+
+
+def node_cache_stats() -> dict:
+    with _registry_lock:
+        nodes = list(_registry.values())
+    return {stats.node: stats.stats() for stats in nodes}
@@ -1,20 +1,26 @@
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
 from typing import TypedDict
+import functools
+import re
 import uuid
 
 from agent.llms.sports_llm import run_sports_llm, run_schedule_llm
 from agent.llms.city_llm import run_city_llm
 from agent.llms.weather_llm import run_weather_llm
 from agent.llms.travel_llm import run_travel_llm
-from agent.llms.complete_llm import run_fusion_llm
+from agent.llms.complete_llm import run_fusion_llm_async
+from agent.tools.city_api import is_fallback_guide
 from agent.tools.intent_classifier import classify_intent_llm
 from agent.state.session_memory import memory
+from agent.state.async_memory import async_memory
+from agent.state.checkpointer import checkpointer
+from agent.graph.node_cache import NODE_TTLS, memoize_node
 from utils.city_cleaner import extract_city_from_text, correct_city_spelling
 from utils.formatters import format_series_hybrid,format_travel_hybrid
 from agent.tools.sports_api import (
     get_current_match,
-    get_series_schedule_by_team
+    get_series_schedule_by_team,
+    normalize_team
 )
 
 
@@ -25,6 +31,69 @@ class SportsState(TypedDict):
     intent: str
 
 
+def _in_transaction(node):
+    """Run a node inside one session-memory transaction (≤1 load + 1 commit)."""
+    @functools.wraps(node)
+    def wrapper(state: SportsState):
+        with memory.transaction(state["session_id"]):
+            return node(state)
+    return wrapper
+
+
+def _in_async_transaction(node):
+    """Async node variant of _in_transaction; never blocks the event loop."""
+    @functools.wraps(node)
+    async def wrapper(state: SportsState):
+        async with async_memory.transaction(state["session_id"]):
+            return await node(state)
+    return wrapper
+
+
+# ------------------------------------------------------------------------
+# NODE INPUTS (resolved from the query, falling back to session memory)
+# ------------------------------------------------------------------------
+SCHEDULE_INTENTS = ["schedule_match", "next_series"]
+
+
+def _sports_inputs(state: SportsState) -> dict:
+    return {"team": normalize_team(state["user_input"])}
+
+
+def _weather_inputs(state: SportsState) -> dict:
+    m = re.search(r"weather\s+(?:in|at)?\s*([a-zA-Z\s]+)", state["user_input"].lower())
+    city = m.group(1).strip().title() if m else None
+    return {"city": city or memory.get_context(state["session_id"], "city")}
+
+
+def _city_inputs(state: SportsState) -> dict:
+    """City as asked or remembered (before spelling correction), remembered venue."""
+    context = memory.get_all(state["session_id"])
+    city = extract_city_from_text(state["user_input"]) or context.get("city")
+    return {"city": city, "venue": context.get("venue")}
+
+
+def _travel_inputs(state: SportsState) -> dict:
+    query = state["user_input"].lower()
+    city = venue = None
+
+    for p in [r"to\s+([a-zA-Z\s]+)", r"in\s+([a-zA-Z\s]+)"]:
+        m = re.search(p, query)
+        if m:
+            city = m.group(1).strip().title()
+            break
+
+    for p in [r"at\s+([a-zA-Z\s]+)", r"near\s+([a-zA-Z\s]+)"]:
+        m = re.search(p, query)
+        if m:
+            venue = m.group(1).strip().title()
+            break
+
+    if not city or not venue:
+        context = memory.get_all(state["session_id"])
+        city = city or context.get("city")
+        venue = venue or context.get("venue")
+    return {"city": city, "venue": venue}
+
 
 def build_graph():
 
@@ -59,7 +128,11 @@ def build_graph():
     # --------------------------------------------------------------------
     # SPORTS NODE
     # --------------------------------------------------------------------
-    def sports_node(state: SportsState):
+    @memoize_node(
+        "SportsNode", inputs=_sports_inputs, key_fields=("team",), ttl=NODE_TTLS,
+        cacheable=lambda output, writes: "sports_summary" in writes or "<table" in output,
+    )
+    def sports_node(state: SportsState, inputs: dict):
         user_input = state["user_input"]
         session_id = state["session_id"]
         intent = state["intent"]
@@ -70,56 +143,54 @@ def build_graph():
             return {"output": result.get("summary", "No match found.")}
 
         # ---------------- NEXT SERIES / SCHEDULE ----------------
-        if intent in ["schedule_match", "next_series"]:
-            raw_schedule = get_series_schedule_by_team(user_input)
-            formatted = format_series_hybrid(raw_schedule)
-            return {"output": formatted}
+        if intent in SCHEDULE_INTENTS:
+            return {"output": format_series_hybrid(get_series_schedule_by_team(user_input))}
 
         # ---------------- DEFAULT → CURRENT MATCH ----------------
         result = run_sports_llm(session_id, user_input)
         return {"output": result.get("summary", "No match found.")}
 
 
-    graph.add_node("SportsNode", sports_node)
+    graph.add_node("SportsNode", _in_transaction(sports_node))
 
     # --------------------------------------------------------------------
     # CITY NODE
     # --------------------------------------------------------------------
-    def city_node(state: SportsState):
+    @memoize_node(
+        "CityNode", inputs=_city_inputs, key_fields=("city", "venue"), required=("city",), ttl=NODE_TTLS,
+        # run_city_llm failures come back as str({"error": ...})
+        cacheable=lambda output, writes: not output.startswith("{'error'"),
+    )
+    def city_node(state: SportsState, inputs: dict):
         session_id = state["session_id"]
-        user_query = state["user_input"]
-
-        city = extract_city_from_text(user_query)
-
-        if not city:
-            city = memory.get_context(session_id, "city")
+        city, venue = inputs["city"], inputs["venue"]
 
         if not city:
             return {"output": "Which city do you want to explore?"}
 
         city = correct_city_spelling(city)
-        venue = memory.get_context(session_id, "venue")
 
         result = run_city_llm(session_id, city, venue)
 
         memory.set_context(session_id, "city", city)
-        return {"output": result.get("summary", str(result))}
+        # a guide missing lookups (past their deadline) or written from the
+        # Wikipedia fallback texts (maybe just rate-limited) is not shared
+        raw = result.get("raw") or {}
+        partial = bool(raw.get("timed_out")) or is_fallback_guide(raw)
+        return {"output": result.get("summary", str(result)), "cacheable": not partial}
 
-    graph.add_node("CityNode", city_node)
+    graph.add_node("CityNode", _in_transaction(city_node))
 
     # --------------------------------------------------------------------
     # WEATHER NODE
     # --------------------------------------------------------------------
-    def weather_node(state: SportsState):
+    @memoize_node(
+        "WeatherNode", inputs=_weather_inputs, key_fields=("city",), ttl=NODE_TTLS,
+        cacheable=lambda output, writes: "weather_summary" in writes,
+    )
+    def weather_node(state: SportsState, inputs: dict):
         session_id = state["session_id"]
-        query = state["user_input"]
-
-        import re
-        m = re.search(r"weather\s+(?:in|at)?\s*([a-zA-Z\s]+)", query.lower())
-        city = m.group(1).strip().title() if m else None
-
-        if not city:
-            city = memory.get_context(session_id, "city")
+        city = inputs["city"]
 
         if not city:
             return {"output": "Tell me the city name to get weather details."}
@@ -127,35 +198,18 @@ def build_graph():
         result = run_weather_llm(session_id, city)
         return {"output": result.get("summary", str(result))}
 
-    graph.add_node("WeatherNode", weather_node)
+    graph.add_node("WeatherNode", _in_transaction(weather_node))
 
     # --------------------------------------------------------------------
     # TRAVEL NODE
     # --------------------------------------------------------------------
-    def travel_node(state: SportsState):
+    @memoize_node(
+        "TravelNode", inputs=_travel_inputs, key_fields=("city", "venue"), required=("city",), ttl=NODE_TTLS,
+        cacheable=lambda output, writes: "travel_summary" in writes,
+    )
+    def travel_node(state: SportsState, inputs: dict):
         session_id = state["session_id"]
-        query = state["user_input"]
-
-        import re
-        city = None
-        venue = None
-
-        for p in [r"to\s+([a-zA-Z\s]+)", r"in\s+([a-zA-Z\s]+)"]:
-            m = re.search(p, query.lower())
-            if m:
-                city = m.group(1).strip().title()
-                break
-
-        for p in [r"at\s+([a-zA-Z\s]+)", r"near\s+([a-zA-Z\s]+)"]:
-            m = re.search(p, query.lower())
-            if m:
-                venue = m.group(1).strip().title()
-                break
-
-        if not city:
-            city = memory.get_context(session_id, "city")
-        if not venue:
-            venue = memory.get_context(session_id, "venue")
+        city, venue = inputs["city"], inputs["venue"]
 
         if not city:
             return {"output": "I need a city name to lookup travel info."}
@@ -164,19 +218,19 @@ def build_graph():
         formatted_html = format_travel_hybrid(result)
         return {"output": result.get("summary", str(formatted_html))}
 
-    graph.add_node("TravelNode", travel_node)
+    graph.add_node("TravelNode", _in_transaction(travel_node))
 
     # --------------------------------------------------------------------
     # FUSION SUMMARY NODE
     # --------------------------------------------------------------------
-    def fusion_node(state: SportsState):
+    async def fusion_node(state: SportsState):
         session_id = state["session_id"]
         query = state["user_input"]
 
-        result = run_fusion_llm(session_id, query)
+        result = await run_fusion_llm_async(session_id, query)
         return {"output": result.get("answer", str(result))}
 
-    graph.add_node("FusionNode", fusion_node)
+    graph.add_node("FusionNode", _in_async_transaction(fusion_node))
 
     # --------------------------------------------------------------------
     # ROUTING LOGIC  (FIXED)
@@ -223,5 +277,6 @@ def build_graph():
     ]:
         graph.add_edge(node, END)
 
-    compiled = graph.compile(checkpointer=MemorySaver())
+    # bounded: keeps the last few checkpoints per session, evicts idle sessions
+    compiled = graph.compile(checkpointer=checkpointer)
     return compiled
\ No newline at end of file
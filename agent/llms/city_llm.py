@@ -1,43 +1,44 @@
 # agent/llms/city_llm.py
 import logging
 from typing import Dict, Any, Optional
-from openai import AzureOpenAI
+from openai import AsyncAzureOpenAI
 from core.config import settings
+from utils.llm_cache import cached_completions
 from core.logging_config import setup_logging
-from agent.tools.city_api import get_city_info, get_city_and_venue_info
-from agent.state.session_memory import memory
+from utils.http_client import http
+from agent.tools.city_api import aget_city_info, aget_city_and_venue_info
+from agent.state.async_memory import async_memory
 from pathlib import Path
 
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
-client = AzureOpenAI(
+client = AsyncAzureOpenAI(
     api_key=settings.openai_api_key,
     azure_endpoint=settings.azure_openai_endpoint,
     api_version="2024-12-01-preview",
 )
+summary_completions = cached_completions(client, "city_summary")
 
 PROMPT_PATH = Path(__file__).resolve().parent.parent / "prompts" / "city_prompt.txt"
 SYSTEM_PROMPT = PROMPT_PATH.read_text(encoding="utf-8")
 
 
-def run_city_llm(session_id: str, city: str, venue: Optional[str] = None) -> Dict[str, Any]:
+async def arun_city_llm(session_id: str, city: str, venue: Optional[str] = None) -> Dict[str, Any]:
     try:
         city = (city or "").strip()
         if not city:
             return {"error": "Missing city for city guide."}
 
         # Save memory
-        memory.set_context(session_id, "city", city)
-        if venue:
-            memory.set_context(session_id, "venue", venue)
+        await async_memory.aupdate(session_id, {"city": city, **({"venue": venue} if venue else {})})
 
         # Fetch data
         raw = (
-            get_city_and_venue_info(city, venue)
+            await aget_city_and_venue_info(city, venue)
             if venue
-            else get_city_info(city)
+            else await aget_city_info(city)
         )
 
         if not raw:
@@ -58,7 +59,7 @@ DATA:
 {city_text}
 """
 
-        res = client.chat.completions.create(
+        res = await summary_completions.acreate(
             model="gpt-4.1-mini",
             messages=[
                 {"role": "system", "content": SYSTEM_PROMPT},
@@ -77,3 +78,8 @@ DATA:
     except Exception as e:
         logger.exception(f"[CITY LLM] Failure city={city}: {e}")
         return {"error": str(e)}
+
+
+def run_city_llm(session_id: str, city: str, venue: Optional[str] = None) -> Dict[str, Any]:
+    """Sync wrapper of arun_city_llm() for graph nodes and the CLI."""
+    return http.run_sync(arun_city_llm(session_id, city, venue))
@@ -3,19 +3,19 @@ import asyncio
 import time
 from pathlib import Path
 from typing import Dict, Any
-from openai import AzureOpenAI
+from openai import AsyncAzureOpenAI
 
 from core.config import settings
+from utils.llm_cache import cached_completions
 from core.logging_config import setup_logging
-from agent.state.session_memory import memory
+from agent.state.async_memory import async_memory
 
 # Domain LLMs & APIs
-from agent.llms.sports_llm import run_sports_llm
-from agent.llms.weather_llm import run_weather_llm
-from agent.llms.city_llm import run_city_llm
-from agent.llms.travel_llm import run_travel_llm
-from agent.tools.sports_api import get_current_match,get_series_schedule_by_team
-#from utils.cache_utils import ttl_cache
+from agent.llms.sports_llm import arun_sports_llm
+from agent.llms.weather_llm import arun_weather_llm
+from agent.llms.city_llm import arun_city_llm
+from agent.llms.travel_llm import arun_travel_llm
+from agent.tools.sports_api import aget_current_match
 
 setup_logging()
 logger = logging.getLogger(__name__)
@@ -23,11 +23,12 @@ logger = logging.getLogger(__name__)
 PROMPT_PATH = Path(__file__).resolve().parent.parent / "prompts" / "fusion_prompt.txt"
 FUSION_PROMPT = PROMPT_PATH.read_text(encoding="utf-8")
 
-client = AzureOpenAI(
+client = AsyncAzureOpenAI(
     api_key=settings.openai_api_key,
     azure_endpoint=settings.azure_openai_endpoint,
     api_version="2024-12-01-preview",
 )
+fusion_completions = cached_completions(client, "fusion_summary")
 
 # --------------------------------------------------------------------
 # Helper: Detect team dynamically from query
@@ -53,7 +54,7 @@ def detect_team_from_query(query: str) -> str | None:
 async def run_fusion_llm_async(session_id: str, user_query: str) -> Dict[str, Any]:
     try:
         # --- Load any stored memory context ---
-        context_data = memory.get_all(session_id)
+        context_data = await async_memory.aget_all(session_id)
         logger.info(f"[FUSION LLM] Loaded memory context: {list(context_data.keys())}")
 
         # --- Detect team from query or fallback to memory ---
@@ -67,7 +68,7 @@ async def run_fusion_llm_async(session_id: str, user_query: str) -> Dict[str, An
                 return {"error": "No team detected. Try asking about a specific team, e.g., 'next match for Bangladesh'."}
 
         # --- Fetch match info fresh from API ---
-        match_info = get_current_match(team)
+        match_info = await aget_current_match(team)
         if not match_info or "city" not in match_info:
             raise ValueError(f"No match info found for {team}")
 
@@ -80,13 +81,13 @@ async def run_fusion_llm_async(session_id: str, user_query: str) -> Dict[str, An
         mode = "CONTEXT" if use_memory else "FRESH"
         logger.info(f"[FUSION LLM] Running domain LLMs in {mode} mode...")
 
-        # --- Run domain LLMs concurrently ---
+        # --- Run domain LLMs concurrently (awaited, no worker threads) ---
         async def run_all():
             return await asyncio.gather(
-                asyncio.to_thread(run_sports_llm, session_id, team),
-                asyncio.to_thread(run_weather_llm, session_id, city),
-                asyncio.to_thread(run_city_llm, session_id, city, venue),
-                asyncio.to_thread(run_travel_llm, session_id, city, venue),
+                arun_sports_llm(session_id, team),
+                arun_weather_llm(session_id, city),
+                arun_city_llm(session_id, city, venue),
+                arun_travel_llm(session_id, city, venue),
             )
 
 
@@ -94,15 +95,13 @@ async def run_fusion_llm_async(session_id: str, user_query: str) -> Dict[str, An
 
         # --- Update memory only in context mode ---
         if use_memory:
-            memory.set_context(session_id, "team", team)
-            memory.set_context(session_id, "city", city)
-            memory.set_context(session_id, "venue", venue)
+            await async_memory.aupdate(session_id, {"team": team, "city": city, "venue": venue})
             logger.info("[FUSION LLM] Updated memory context for continuity.")
         else:
             logger.info("[FUSION LLM] Skipped memory update (fresh query).")
 
         # --- Build combined context for summary ---
-        context_data = memory.get_all(session_id)
+        context_data = await async_memory.aget_all(session_id)
         context_str = "\n\n".join(
             [f"### {k.upper()} CONTEXT\n{v}" for k, v in context_data.items() if v]
         )
@@ -126,7 +125,7 @@ and more make it correct and give the correct results
 """
 
         # --- Generate final summary ---
-        res = client.chat.completions.create(
+        res = await fusion_completions.acreate(
             model="gpt-4.1-mini",
             messages=[
                 {"role": "system", "content": FUSION_PROMPT},
@@ -139,8 +138,10 @@ and more make it correct and give the correct results
         final_summary = res.choices[0].message.content.strip()
 
         # --- Save last interaction ---
-        memory.set_context(session_id, "last_answer", final_summary)
-        memory.set_context(session_id, "last_question", user_query)
+        await async_memory.aupdate(session_id, {
+            "last_answer": final_summary,
+            "last_question": user_query,
+        })
 
         logger.info(f"[FUSION LLM] Final summary generated for {team} ({mode} mode).")
         return {
@@ -162,6 +163,7 @@ and more make it correct and give the correct results
 # SYNC WRAPPER (SAFE)
 # --------------------------------------------------------------------
 import concurrent.futures
+import contextvars
 import asyncio
 
 
@@ -175,9 +177,11 @@ def run_fusion_llm(session_id: str, user_query: str):
 
         # If already inside running event loop — LangGraph case
         if loop.is_running():
+            # carry the caller's context (memory transaction, round-trip counter)
+            ctx = contextvars.copy_context()
             with concurrent.futures.ThreadPoolExecutor() as pool:
                 future = pool.submit(
-                    lambda: asyncio.run(run_fusion_llm_async(session_id, user_query))
+                    ctx.run, lambda: asyncio.run(run_fusion_llm_async(session_id, user_query))
                 )
                 return future.result()
 
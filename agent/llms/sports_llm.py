@@ -1,28 +1,33 @@
 import logging
 import json
-from openai import AzureOpenAI
+from openai import AsyncAzureOpenAI
 from pathlib import Path
 from core.config import settings
+from utils.llm_cache import cached_completions
 from core.logging_config import setup_logging
 
 # Updated sports API (your new module)
 from agent.tools.sports_api import (
-    get_current_match,
+    aget_current_match,
     get_series_schedule_by_team,
     normalize_team
 )
+from utils.http_client import http
 
 from agent.state.session_memory import memory
+from agent.state.async_memory import async_memory
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
 # Initialize Azure OpenAI client
-client = AzureOpenAI(
+client = AsyncAzureOpenAI(
     api_key=settings.openai_api_key,
     azure_endpoint=settings.azure_openai_endpoint,
     api_version="2024-05-01-preview",
 )
+match_completions = cached_completions(client, "sports_summary")
+schedule_completions = cached_completions(client, "schedule_summary")
 
 # Load master prompt
 PROMPT_PATH = Path(__file__).resolve().parent.parent / "prompts" / "sports_prompt.txt"
@@ -41,7 +46,7 @@ def extract_team_name(query: str) -> str:
 # -------------------------------------------------------
 # 2️⃣ MAIN ORCHESTRATOR (Next Match + LLM Summary)
 # -------------------------------------------------------
-def run_sports_llm(session_id: str, user_team_query: str):
+async def arun_sports_llm(session_id: str, user_team_query: str):
     """
     1. Extract team name (handles typos/aliases)
     2. Call sports API (next match)
@@ -60,7 +65,7 @@ def run_sports_llm(session_id: str, user_team_query: str):
         # -------------------------
         # STEP 1: Fetch next match
         # -------------------------
-        match_data = get_current_match(clean_team)
+        match_data = await aget_current_match(clean_team)
 
         if match_data.get("error"):
             logger.warning(f"[SPORTS LLM] No match data found -> {match_data['error']}")
@@ -82,7 +87,7 @@ def run_sports_llm(session_id: str, user_team_query: str):
         # -------------------------
         # STEP 4: LLM SUMMARY
         # -------------------------
-        response = client.chat.completions.create(
+        response = await match_completions.acreate(
             model="gpt-4.1-mini",
             messages=[
                 {
@@ -107,16 +112,19 @@ def run_sports_llm(session_id: str, user_team_query: str):
         # -------------------------
         # STEP 5: Update memory
         # -------------------------
-        memory.set_context(session_id, "team", clean_team)
-        memory.set_context(session_id, "city", match_data.get("city", ""))
-        memory.set_context(session_id, "venue", match_data.get("venue", ""))
-        memory.set_context(session_id, "sports_summary", summary)
+        await async_memory.aupdate(session_id, {
+            "team": clean_team,
+            "city": match_data.get("city", ""),
+            "venue": match_data.get("venue", ""),
+            "sports_summary": summary,
+        })
 
         logger.info(f"[SPORTS LLM] Final summary ready for {clean_team}")
 
         return {
             "summary": summary,
-            "raw": match_data
+            "raw": match_data,
+            "as_of": match_data.get("as_of"),
         }
 
     except Exception as e:
@@ -124,6 +132,10 @@ def run_sports_llm(session_id: str, user_team_query: str):
         return {"error": str(e)}
 
 
+def run_sports_llm(session_id: str, user_team_query: str):
+    """Sync wrapper of arun_sports_llm() for graph nodes and the CLI."""
+    return http.run_sync(arun_sports_llm(session_id, user_team_query))
+
 
 # -------------------------------------------------------
 # 4️⃣ TEAM SCHEDULE (Upcoming fixtures)
@@ -156,7 +168,7 @@ def run_schedule_llm(session_id: str, user_team_query: str):
             "No extra facts."
         )
 
-        response = client.chat.completions.create(
+        response = schedule_completions.create(
             model="gpt-4.1-mini",
             messages=[
                 {"role": "system", "content": "You summarize cricket schedules factually."},
@@ -171,7 +183,7 @@ def run_schedule_llm(session_id: str, user_team_query: str):
 
         memory.set_context(session_id, "schedule_summary", summary)
 
-        return {"summary": summary, "raw": schedule}
+        return {"summary": summary, "raw": schedule, "as_of": schedule.get("as_of")}
 
     except Exception as e:
         logger.error(f"[SPORTS LLM] Schedule Error: {e}")
@@ -1,11 +1,13 @@
 import logging
 import json
 from pathlib import Path
-from openai import AzureOpenAI
+from openai import AsyncAzureOpenAI
 from core.config import settings
+from utils.llm_cache import cached_completions
 from core.logging_config import setup_logging
-from agent.tools.travel_api import get_travel_info
-from agent.state.session_memory import memory
+from utils.http_client import http
+from agent.tools.travel_api import aget_travel_info
+from agent.state.async_memory import async_memory
 
 # ---------------------------------------------------------------------
 # Setup
@@ -13,11 +15,12 @@ from agent.state.session_memory import memory
 setup_logging()
 logger = logging.getLogger(__name__)
 
-client = AzureOpenAI(
+client = AsyncAzureOpenAI(
     api_key=settings.openai_api_key,
     azure_endpoint=settings.azure_openai_endpoint,
     api_version="2024-05-01-preview",
 )
+summary_completions = cached_completions(client, "travel_summary")
 
 PROMPT_PATH = Path(__file__).resolve().parent.parent / "prompts" / "travel_prompt.txt"
 TRAVEL_PROMPT = PROMPT_PATH.read_text(encoding="utf-8")
@@ -25,7 +28,7 @@ TRAVEL_PROMPT = PROMPT_PATH.read_text(encoding="utf-8")
 # ---------------------------------------------------------------------
 # Main Function
 # ---------------------------------------------------------------------
-def run_travel_llm(session_id: str, city: str = None, venue: str = None):
+async def arun_travel_llm(session_id: str, city: str = None, venue: str = None):
     """
     Fetches travel and transportation info for a given city or venue.
     Works in two modes:
@@ -35,10 +38,10 @@ def run_travel_llm(session_id: str, city: str = None, venue: str = None):
 
     try:
         # 1️⃣ Determine context
-        if not city:
-            city = memory.get_context(session_id, "city")
-        if not venue:
-            venue = memory.get_context(session_id, "venue")
+        if not city or not venue:
+            context = await async_memory.aget_all(session_id)
+            city = city or context.get("city")
+            venue = venue or context.get("venue")
 
         # 2️⃣ Gracefully handle missing info
         if not city and not venue:
@@ -51,7 +54,7 @@ def run_travel_llm(session_id: str, city: str = None, venue: str = None):
         logger.info(f"[TRAVEL LLM] Processing travel info for {venue or 'N/A'}, {city or 'N/A'}")
 
         # 3️⃣ Fetch travel info from API
-        travel_data = get_travel_info(city, venue)
+        travel_data = await aget_travel_info(city, venue)
         if not travel_data or "error" in travel_data:
             logger.warning(f"[TRAVEL LLM] No transport data found for {venue}, {city}")
             travel_data = {
@@ -69,7 +72,7 @@ def run_travel_llm(session_id: str, city: str = None, venue: str = None):
         )
 
         # 5️⃣ Generate response via Azure OpenAI
-        response = client.chat.completions.create(
+        response = await summary_completions.acreate(
             model="gpt-4.1-mini",
             messages=[
                 {
@@ -91,9 +94,11 @@ def run_travel_llm(session_id: str, city: str = None, venue: str = None):
         summary = response.choices[0].message.content.strip()
 
         # 6️⃣ Store results for continuity
-        memory.set_context(session_id, "city", city)
-        memory.set_context(session_id, "venue", venue)
-        memory.set_context(session_id, "travel_summary", summary)
+        await async_memory.aupdate(session_id, {
+            "city": city,
+            "venue": venue,
+            "travel_summary": summary,
+        })
 
         logger.info(f"[TRAVEL LLM] Summary generated successfully for {venue or city}")
         return {"summary": summary, "city": city, "venue": venue, "raw": travel_data}
@@ -104,3 +109,8 @@ def run_travel_llm(session_id: str, city: str = None, venue: str = None):
             "error": str(e),
             "summary": "Something went wrong while fetching travel information.",
         }
+
+
+def run_travel_llm(session_id: str, city: str = None, venue: str = None):
+    """Sync wrapper of arun_travel_llm() for graph nodes and the CLI."""
+    return http.run_sync(arun_travel_llm(session_id, city, venue))
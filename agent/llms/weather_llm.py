@@ -1,11 +1,13 @@
 import logging
 import json
 from pathlib import Path
-from openai import AzureOpenAI
+from openai import AsyncAzureOpenAI
 from core.config import settings
+from utils.llm_cache import cached_completions
 from core.logging_config import setup_logging
-from agent.tools.weather_api import get_weather
-from agent.state.session_memory import memory
+from utils.http_client import http
+from agent.tools.weather_api import aget_weather
+from agent.state.async_memory import async_memory
 
 # ---------------------------------------------------------------------
 # Setup
@@ -13,11 +15,13 @@ from agent.state.session_memory import memory
 setup_logging()
 logger = logging.getLogger(__name__)
 
-client = AzureOpenAI(
+client = AsyncAzureOpenAI(
     api_key=settings.openai_api_key,
     azure_endpoint=settings.azure_openai_endpoint,
     api_version="2024-05-01-preview",
 )
+spelling_completions = cached_completions(client, "weather_spelling")
+summary_completions = cached_completions(client, "weather_summary")
 
 PROMPT_PATH = Path(__file__).resolve().parent.parent / "prompts" / "weather_prompt.txt"
 WEATHER_PROMPT = PROMPT_PATH.read_text(encoding="utf-8")
@@ -26,7 +30,7 @@ WEATHER_PROMPT = PROMPT_PATH.read_text(encoding="utf-8")
 # ---------------------------------------------------------------------
 # Main Function
 # ---------------------------------------------------------------------
-def run_weather_llm(session_id: str, city: str = None):
+async def arun_weather_llm(session_id: str, city: str = None):
     """
     Fetches live weather data and summarizes it using Azure OpenAI.
     Works in two modes:
@@ -37,7 +41,7 @@ def run_weather_llm(session_id: str, city: str = None):
     try:
         # 1️⃣ Determine target city
         if not city:
-            city = memory.get_context(session_id, "city")
+            city = await async_memory.aget(session_id, "city")
 
         if not city:
             logger.info("[WEATHER LLM] No city provided in query or memory.")
@@ -50,14 +54,14 @@ def run_weather_llm(session_id: str, city: str = None):
         logger.info(f"[WEATHER LLM] Fetching weather for: {city}")
         if city:
             correction_prompt = f"The user entered the city '{city}'. If it's misspelled, suggest the correct spelling of the city name. Otherwise, repeat it unchanged. Respond with only the city name."
-            correction = client.chat.completions.create(
+            correction = await spelling_completions.acreate(
                 model="gpt-4.1-mini",
                 messages=[{"role": "user", "content": correction_prompt}],
                 max_tokens=10,
                 temperature=0
             )
             city = correction.choices[0].message.content.strip()
-        weather_data = get_weather(city)
+        weather_data = await aget_weather(city)
 
         if not weather_data or "error" in weather_data:
             logger.warning(f"[WEATHER LLM] Weather data unavailable for {city}")
@@ -72,7 +76,7 @@ def run_weather_llm(session_id: str, city: str = None):
         )
 
         # 4️⃣ Generate conversational summary with Azure OpenAI
-        response = client.chat.completions.create(
+        response = await summary_completions.acreate(
             model="gpt-4.1-mini",
             messages=[
                 {
@@ -94,9 +98,11 @@ def run_weather_llm(session_id: str, city: str = None):
         summary = response.choices[0].message.content.strip()
 
         # 5️⃣ Persist data in memory for continuity
-        memory.set_context(session_id, "city", city)
-        memory.set_context(session_id, "weather_raw", weather_data)
-        memory.set_context(session_id, "weather_summary", summary)
+        await async_memory.aupdate(session_id, {
+            "city": city,
+            "weather_raw": weather_data,
+            "weather_summary": summary,
+        })
 
         logger.info(f"[WEATHER LLM] Summary successfully generated for {city}")
         return {"summary": summary, "city": city, "raw": weather_data}
@@ -104,3 +110,8 @@ def run_weather_llm(session_id: str, city: str = None):
     except Exception as e:
         logger.exception(f"[WEATHER LLM] Error: {e}")
         return {"error": str(e), "summary": "Something went wrong while fetching the weather."}
+
+
+def run_weather_llm(session_id: str, city: str = None):
+    """Sync wrapper of arun_weather_llm() for graph nodes and the CLI."""
+    return http.run_sync(arun_weather_llm(session_id, city))
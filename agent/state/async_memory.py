@@ -0,0 +1,83 @@
+# agent/state/async_memory.py
+"""
+Async-native front for SessionMemory, for use on the FastAPI event loop.
+
+Cache hits and writes are in-memory operations on SessionMemory's read-through
+cache / write-behind buffer and never await; only cache misses, clears and
+explicit flushes go to a worker thread. The sync and async APIs share one
+cache, so graph nodes running in executor threads see the same data.
+
+Per-session locks are threading locks shared with the sync API; the loop only
+ever tries them without blocking and hands contended cases to a worker thread.
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from agent.state.session_memory import SessionMemory, memory
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncSessionMemory:
+    def __init__(self, sync_memory: SessionMemory):
+        self._memory = sync_memory
+
+    async def aget_all(self, session_id) -> dict:
+        tx = self._memory.current_transaction(session_id)
+        if tx is not None:
+            return tx.get_all()
+        data = self._memory.cached(session_id)
+        if data is not None:
+            return data
+        return await asyncio.to_thread(self._memory.get_all, session_id)
+
+    async def aget(self, session_id, key, default=None):
+        return (await self.aget_all(session_id)).get(key, default)
+
+    async def aset(self, session_id, key, value):
+        await self.aupdate(session_id, {key: value})
+
+    async def aupdate(self, session_id, changes: dict):
+        if self._memory.buffered or self._memory.current_transaction(session_id) is not None:
+            # buffered → no I/O on the loop, unless the session lock is busy
+            if self._memory.try_update(session_id, changes):
+                return
+        await asyncio.to_thread(self._memory.update, session_id, changes)
+
+    async def aclear(self, session_id):
+        await asyncio.to_thread(self._memory.clear, session_id)
+
+    async def aflush(self):
+        await asyncio.to_thread(self._memory.flush)
+
+    async def amodify(self, session_id, fn) -> dict:
+        """Atomic read-modify-write (see SessionMemory.modify); `fn` must be sync."""
+        if self._memory.current_transaction(session_id) is not None:
+            return self._memory.modify(session_id, fn)
+        return await asyncio.to_thread(self._memory.modify, session_id, fn)
+
+    @asynccontextmanager
+    async def transaction(self, session_id):
+        """Async counterpart of SessionMemory.transaction (loaded up front, off the loop)."""
+        outer = self._memory.current_transaction(session_id)
+        if outer is not None:
+            yield outer
+            return
+
+        data = await self.aget_all(session_id)
+        tx, token = self._memory.begin(session_id, lambda _: data)
+        try:
+            yield tx
+        except BaseException:
+            logger.warning(f"[MEMORY] Rolled back transaction for {session_id}")
+            raise
+        else:
+            # buffered → no I/O on the loop, unless a clear or a busy lock needs a worker thread
+            if not self._memory.commit(tx, blocking=False):
+                await asyncio.to_thread(self._memory.commit, tx)
+        finally:
+            self._memory.end(token)
+
+
+async_memory = AsyncSessionMemory(memory)
@@ -0,0 +1,139 @@
+# agent/state/chat_history.py
+"""
+Bounded per-session chat history (the last few turns shown back to the UI).
+
+Sessions live in an LRU with an idle TTL and a total byte budget, so a
+long-running container reaches a steady-state footprint however many
+session ids it has seen. A turn is stored as a compact (user, agent) tuple
+in a fixed-length deque, not as a dict per turn.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+
+from core.config import settings
+
+# per-turn bookkeeping (tuple, deque slot, str headers); text is counted in characters
+TURN_OVERHEAD_BYTES = 120
+
+
+def _turn_size(user: str, agent: str) -> int:
+    return len(user) + len(agent) + TURN_OVERHEAD_BYTES
+
+
+class ChatHistoryStore:
+    def __init__(
+        self,
+        max_turns: int = 5,
+        max_sessions: int = 10_000,
+        ttl_seconds: float | None = 6 * 3600,
+        max_bytes: int = 32_000_000,
+    ):
+        self.max_turns = max_turns
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        # session_id → [turns deque, bytes, last access]; LRU order (oldest first)
+        self._sessions: OrderedDict[str, list] = OrderedDict()
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evicted_lru = 0
+        self.evicted_ttl = 0
+        self.evicted_budget = 0
+
+    def get(self, session_id) -> list[dict]:
+        """Turns of a session, oldest first, as {"user", "agent"} dicts."""
+        with self._lock:
+            entry = self._live(session_id)
+            if entry is None:
+                self.misses += 1
+                return []
+            self.hits += 1
+            entry[2] = time.monotonic()
+            self._sessions.move_to_end(session_id)
+            return [{"user": user, "agent": agent} for user, agent in entry[0]]
+
+    def append(self, session_id, user: str, agent: str) -> list[dict]:
+        """Record a turn and return the session's updated history."""
+        with self._lock:
+            entry = self._live(session_id)
+            if entry is None:
+                self.misses += 1
+                entry = self._sessions[session_id] = [deque(maxlen=self.max_turns), 0, 0.0]
+            else:
+                self.hits += 1
+            turns = entry[0]
+            if len(turns) == turns.maxlen:
+                dropped = _turn_size(*turns[0])
+                entry[1] -= dropped
+                self._bytes -= dropped
+            turns.append((user, agent))
+            size = _turn_size(user, agent)
+            entry[1] += size
+            self._bytes += size
+            entry[2] = time.monotonic()
+            self._sessions.move_to_end(session_id)
+            self._evict()
+            return [{"user": u, "agent": a} for u, a in turns]
+
+    def clear(self, session_id):
+        with self._lock:
+            self._drop(session_id)
+
+    def _live(self, session_id):
+        entry = self._sessions.get(session_id)
+        if entry is not None and self._expired(entry[2], time.monotonic()):
+            self._drop(session_id)
+            self.evicted_ttl += 1
+            return None
+        return entry
+
+    def _expired(self, touched: float, now: float) -> bool:
+        return bool(self.ttl_seconds) and now - touched > self.ttl_seconds
+
+    def _drop(self, session_id):
+        entry = self._sessions.pop(session_id, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def _evict(self):
+        now = time.monotonic()
+        # LRU order == access order, so expired sessions are all at the front
+        while self._sessions:
+            session_id, entry = next(iter(self._sessions.items()))
+            if not self._expired(entry[2], now):
+                break
+            self._drop(session_id)
+            self.evicted_ttl += 1
+        while len(self._sessions) > self.max_sessions:
+            self._drop(next(iter(self._sessions)))
+            self.evicted_lru += 1
+        # always keep the session that was just written
+        while self._bytes > self.max_bytes and len(self._sessions) > 1:
+            self._drop(next(iter(self._sessions)))
+            self.evicted_budget += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evicted_lru": self.evicted_lru,
+                "evicted_ttl": self.evicted_ttl,
+                "evicted_budget": self.evicted_budget,
+            }
+
+
+chat_history = ChatHistoryStore(
+    max_turns=settings.chat_history_turns,
+    max_sessions=settings.chat_history_max_sessions,
+    ttl_seconds=settings.chat_history_ttl_seconds,
+    max_bytes=settings.chat_history_max_bytes,
+)
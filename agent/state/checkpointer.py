@@ -0,0 +1,390 @@
+# agent/state/checkpointer.py
+"""
+Bounded LangGraph checkpointer.
+
+MemorySaver keeps every checkpoint of every thread forever. BoundedMemorySaver
+is a drop-in replacement that
+  - keeps only the newest `max_checkpoints_per_thread` checkpoints of a thread
+    (with their pending writes and the channel blobs they still reference),
+  - holds at most `max_threads` threads in memory (least recently used go
+    first) and forgets threads idle for longer than `ttl_seconds`,
+  - optionally mirrors everything to a local SQLite file, so threads evicted
+    from memory (or lost to a restart) are reloaded on their next turn.
+
+Per-thread indexes make pruning and eviction O(size of that thread), unlike
+InMemorySaver.delete_thread which scans every write and blob of every thread.
+
+It works on InMemorySaver's internal storage/writes/blobs dicts, which are
+not a public API: requirements.txt pins langgraph 1.2.x / langgraph-checkpoint
+4.3.x, the releases it is tested against.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT PRIMARY KEY,
+    touched   REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_threads_touched ON threads (touched);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id     TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    type          TEXT NOT NULL,
+    checkpoint    BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata      BLOB NOT NULL,
+    parent_id     TEXT,
+    versions      TEXT NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id     TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    channel       TEXT NOT NULL,
+    version       TEXT NOT NULL,
+    type          TEXT NOT NULL,
+    value         BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id     TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    task_id       TEXT NOT NULL,
+    idx           INTEGER NOT NULL,
+    channel       TEXT NOT NULL,
+    type          TEXT NOT NULL,
+    value         BLOB NOT NULL,
+    task_path     TEXT NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+) WITHOUT ROWID;
+"""
+
+SQL_TOUCH_THREAD = """
+INSERT INTO threads (thread_id, touched) VALUES (?, ?)
+ON CONFLICT (thread_id) DO UPDATE SET touched = excluded.touched
+"""
+SQL_INSERT_CHECKPOINT = "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+SQL_INSERT_BLOB = "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)"
+SQL_INSERT_WRITE = "INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+SQL_DELETE_CHECKPOINT = "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?"
+SQL_DELETE_CHECKPOINT_WRITES = "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?"
+SQL_DELETE_BLOB = "DELETE FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?"
+SQL_SELECT_CHECKPOINTS = "SELECT checkpoint_ns, checkpoint_id, type, checkpoint, metadata_type, metadata, parent_id, versions FROM checkpoints WHERE thread_id = ?"
+SQL_SELECT_BLOBS = "SELECT checkpoint_ns, channel, version, type, value FROM blobs WHERE thread_id = ?"
+SQL_SELECT_WRITES = "SELECT checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value, task_path FROM writes WHERE thread_id = ?"
+SQL_SELECT_EXPIRED = "SELECT thread_id FROM threads WHERE touched < ?"
+SQL_DELETE_THREAD = [
+    "DELETE FROM checkpoints WHERE thread_id = ?",
+    "DELETE FROM blobs WHERE thread_id = ?",
+    "DELETE FROM writes WHERE thread_id = ?",
+    "DELETE FROM threads WHERE thread_id = ?",
+]
+
+
+class BoundedMemorySaver(InMemorySaver):
+    def __init__(
+        self,
+        max_checkpoints_per_thread: int = 4,
+        max_threads: int = 5000,
+        ttl_seconds: float | None = 6 * 3600,
+        sqlite_path: str | Path | None = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.max_checkpoints_per_thread = max(1, max_checkpoints_per_thread)
+        self.max_threads = max_threads
+        self.ttl_seconds = ttl_seconds
+
+        self._lock = threading.RLock()
+        self._threads: OrderedDict[str, float] = OrderedDict()    # thread_id → last access (LRU order)
+        # per-thread indexes into storage / writes / blobs
+        self._thread_writes: dict[str, set] = {}
+        self._thread_blobs: dict[str, set] = {}
+        # thread_id → {(ns, checkpoint id): channel_versions}; decides which blobs are live
+        self._versions: dict[str, dict[tuple, dict]] = {}
+
+        self._evicted_threads = 0
+        self._expired_threads = 0
+        self._pruned_checkpoints = 0
+        self._reloaded_threads = 0
+
+        self.sqlite_path = sqlite_path
+        self._db: sqlite3.Connection | None = None
+        self._last_db_sweep = time.monotonic()
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path, isolation_level=None, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(SCHEMA)
+
+    # ------------------------------------------------------------------
+    # Thread bookkeeping
+    # ------------------------------------------------------------------
+    def _touch(self, thread_id: str, load: bool = True) -> bool:
+        """Mark a thread as used (reloading it from SQLite if needed); False if it is unknown."""
+        now = time.time()
+        if thread_id in self._threads:
+            self._threads[thread_id] = now
+            self._threads.move_to_end(thread_id)
+            return True
+        if load and self._db is not None and self._load_thread(thread_id):
+            self._threads[thread_id] = now
+            self._reloaded_threads += 1
+            self._evict()
+            return True
+        return False
+
+    def _register(self, thread_id: str):
+        if not self._touch(thread_id):
+            self._threads[thread_id] = time.time()
+            self._thread_writes.setdefault(thread_id, set())
+            self._thread_blobs.setdefault(thread_id, set())
+            self._versions.setdefault(thread_id, {})
+        self._evict()
+
+    def _evict(self):
+        if self.ttl_seconds:
+            cutoff = time.time() - self.ttl_seconds
+            while self._threads:
+                thread_id, touched = next(iter(self._threads.items()))
+                if touched >= cutoff:
+                    break
+                # expired everywhere, not just in memory
+                self._forget(thread_id)
+                self._db_delete_thread(thread_id)
+                self._expired_threads += 1
+        while len(self._threads) > self.max_threads:
+            thread_id = next(iter(self._threads))
+            self._forget(thread_id)     # still in SQLite (if enabled), reloaded on demand
+            self._evicted_threads += 1
+        if self._db is not None and self.ttl_seconds and time.monotonic() - self._last_db_sweep > 60:
+            self._sweep_db()
+
+    def _forget(self, thread_id: str):
+        """Drop a thread from memory only."""
+        self._threads.pop(thread_id, None)
+        self.storage.pop(thread_id, None)
+        for key in self._thread_writes.pop(thread_id, ()):
+            self.writes.pop(key, None)
+        for key in self._thread_blobs.pop(thread_id, ()):
+            self.blobs.pop(key, None)
+        self._versions.pop(thread_id, None)
+
+    # ------------------------------------------------------------------
+    # Pruning: keep the newest N checkpoints per (thread, ns)
+    # ------------------------------------------------------------------
+    def _prune(self, thread_id: str, checkpoint_ns: str):
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        excess = len(checkpoints) - self.max_checkpoints_per_thread
+        if excess <= 0:
+            return
+        versions = self._versions[thread_id]
+        victims = sorted(checkpoints)[:excess]      # ids sort by creation time
+        for checkpoint_id in victims:
+            del checkpoints[checkpoint_id]
+            versions.pop((checkpoint_ns, checkpoint_id), None)
+            key = (thread_id, checkpoint_ns, checkpoint_id)
+            if self.writes.pop(key, None) is not None:
+                self._thread_writes[thread_id].discard(key)
+
+        # blobs are shared between checkpoints: keep those any survivor references
+        live = {
+            (thread_id, checkpoint_ns, channel, version)
+            for checkpoint_id in checkpoints
+            for channel, version in versions.get((checkpoint_ns, checkpoint_id), {}).items()
+        }
+        dead = [k for k in self._thread_blobs[thread_id] if k[1] == checkpoint_ns and k not in live]
+        for key in dead:
+            self.blobs.pop(key, None)
+            self._thread_blobs[thread_id].discard(key)
+        self._pruned_checkpoints += len(victims)
+
+        if self._db is not None:
+            rows = [(thread_id, checkpoint_ns, cid) for cid in victims]
+            self._db.executemany(SQL_DELETE_CHECKPOINT, rows)
+            self._db.executemany(SQL_DELETE_CHECKPOINT_WRITES, rows)
+            self._db.executemany(SQL_DELETE_BLOB, [(t, ns, ch, str(v)) for t, ns, ch, v in dead])
+
+    # ------------------------------------------------------------------
+    # BaseCheckpointSaver overrides (the async ones delegate to these)
+    # ------------------------------------------------------------------
+    def get_tuple(self, config):
+        with self._lock:
+            if not self._touch(config["configurable"]["thread_id"]):
+                return None     # do not let the defaultdict grow an empty entry
+            return super().get_tuple(config)
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        with self._lock:
+            if config and not self._touch(config["configurable"]["thread_id"]):
+                return iter(())
+            # materialize under the lock; the base generator reads shared dicts
+            return iter(list(super().list(config, filter=filter, before=before, limit=limit)))
+
+    def get_delta_channel_history(self, *, config, channels):
+        with self._lock:
+            self._touch(config["configurable"]["thread_id"])
+            return super().get_delta_channel_history(config=config, channels=channels)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        with self._lock:
+            self._register(thread_id)
+            result = super().put(config, checkpoint, metadata, new_versions)
+            key = (thread_id, checkpoint_ns, checkpoint["id"])
+            self._versions[thread_id][(checkpoint_ns, checkpoint["id"])] = dict(checkpoint["channel_versions"])
+            new_blobs = [(thread_id, checkpoint_ns, k, v) for k, v in new_versions.items()]
+            self._thread_blobs[thread_id].update(new_blobs)
+            with self._db_transaction():
+                if self._db is not None:
+                    self._db_put(key, new_blobs)
+                self._prune(thread_id, checkpoint_ns)
+            return result
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        key = (thread_id, checkpoint_ns, config["configurable"]["checkpoint_id"])
+        with self._lock:
+            self._register(thread_id)
+            super().put_writes(config, writes, task_id, task_path)
+            if key in self.writes:
+                self._thread_writes[thread_id].add(key)
+                if self._db is not None:
+                    self._db.executemany(SQL_INSERT_WRITE, [
+                        (*key, tid, idx, ch, v[0], v[1], path)
+                        for (tid, idx), (_, ch, v, path) in self.writes[key].items()
+                    ])
+
+    def delete_thread(self, thread_id: str):
+        with self._lock:
+            self._forget(thread_id)
+            self._db_delete_thread(thread_id)
+
+    # ------------------------------------------------------------------
+    # SQLite mirror
+    # ------------------------------------------------------------------
+    @contextmanager
+    def _db_transaction(self):
+        if self._db is None:
+            yield
+            return
+        self._db.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        else:
+            self._db.execute("COMMIT")
+
+    def _db_put(self, key: tuple, new_blobs: list):
+        thread_id, checkpoint_ns, checkpoint_id = key
+        checkpoint, metadata, parent_id = self.storage[thread_id][checkpoint_ns][checkpoint_id]
+        self._db.execute(SQL_INSERT_CHECKPOINT, (
+            *key, checkpoint[0], checkpoint[1], metadata[0], metadata[1], parent_id,
+            json.dumps(self._versions[thread_id][(checkpoint_ns, checkpoint_id)]),
+        ))
+        self._db.executemany(SQL_INSERT_BLOB, [
+            (t, ns, ch, str(v), *self.blobs[(t, ns, ch, v)]) for t, ns, ch, v in new_blobs
+        ])
+        self._db.execute(SQL_TOUCH_THREAD, (thread_id, time.time()))
+
+    def _load_thread(self, thread_id: str) -> bool:
+        checkpoints = self._db.execute(SQL_SELECT_CHECKPOINTS, (thread_id,)).fetchall()
+        if not checkpoints:
+            return False
+        self._thread_writes[thread_id] = set()
+        self._thread_blobs[thread_id] = set()
+        thread_versions = self._versions[thread_id] = {}
+        for ns, cid, ctype, cdata, mtype, mdata, parent_id, versions in checkpoints:
+            self.storage[thread_id][ns][cid] = ((ctype, cdata), (mtype, mdata), parent_id)
+            thread_versions[(ns, cid)] = json.loads(versions)
+
+        # blob versions are stored as text; restore the original type via the checkpoints
+        version_types = {
+            (ns, ch, str(v)): v
+            for (ns, _), versions in thread_versions.items()
+            for ch, v in versions.items()
+        }
+        for ns, channel, version, btype, value in self._db.execute(SQL_SELECT_BLOBS, (thread_id,)):
+            key = (thread_id, ns, channel, version_types.get((ns, channel, version), version))
+            self.blobs[key] = (btype, value)
+            self._thread_blobs[thread_id].add(key)
+
+        for ns, cid, task_id, idx, channel, wtype, value, task_path in self._db.execute(SQL_SELECT_WRITES, (thread_id,)):
+            key = (thread_id, ns, cid)
+            self.writes[key][(task_id, idx)] = (task_id, channel, (wtype, value), task_path)
+            self._thread_writes[thread_id].add(key)
+        return True
+
+    def _db_delete_thread(self, thread_id: str):
+        if self._db is None:
+            return
+        with self._db_transaction():
+            for sql in SQL_DELETE_THREAD:
+                self._db.execute(sql, (thread_id,))
+
+    def _sweep_db(self):
+        self._last_db_sweep = time.monotonic()
+        cutoff = time.time() - self.ttl_seconds
+        expired = [r[0] for r in self._db.execute(SQL_SELECT_EXPIRED, (cutoff,))]
+        for thread_id in expired:
+            self._forget(thread_id)
+            self._db_delete_thread(thread_id)
+        if expired:
+            self._expired_threads += len(expired)
+            logger.info(f"[CHECKPOINT] Expired {len(expired)} idle threads from {self.sqlite_path}")
+
+    # ------------------------------------------------------------------
+    # Stats
+    # ------------------------------------------------------------------
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "threads": len(self._threads),
+                "checkpoints": sum(len(c) for ns in self.storage.values() for c in ns.values()),
+                "blobs": len(self.blobs),
+                "writes": len(self.writes),
+                "max_checkpoints_per_thread": self.max_checkpoints_per_thread,
+                "max_threads": self.max_threads,
+                "evicted_threads": self._evicted_threads,
+                "expired_threads": self._expired_threads,
+                "pruned_checkpoints": self._pruned_checkpoints,
+                "reloaded_threads": self._reloaded_threads,
+                "persistent": self._db is not None,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+def build_checkpointer() -> BoundedMemorySaver:
+    return BoundedMemorySaver(
+        max_checkpoints_per_thread=settings.checkpoint_max_per_thread,
+        max_threads=settings.checkpoint_max_threads,
+        ttl_seconds=settings.checkpoint_ttl_seconds,
+        sqlite_path=settings.checkpoint_sqlite_path,
+    )
+
+
+checkpointer = build_checkpointer()
@@ -0,0 +1,179 @@
+# agent/state/context_token.py
+"""
+Signed, compressed client-side context tokens.
+
+With `settings.stateless_context` on, /chat hands the session's working
+context back to the client as a token and takes it again on the next turn, so
+any replica can serve any request without a shared session store.
+
+Token layout:  base64url(zlib(json payload)) "." base64url(HMAC-SHA256)[:16 bytes]
+Payload:       {"v": version, "sid": session_id, "exp": unix time, "i": last intent,
+                "c": {key: inline value}, "r": {key: artifact sha256}}
+
+By default every value travels inline, so any replica can decode any token.
+With `context_artifacts="local"`, large values (LLM summaries, raw API
+payloads) stay in this process's bounded content-addressed ArtifactCache and
+the token only carries their hash: smaller tokens, but only for a single
+replica or sticky routing. A replica without the artifact drops that key
+(every artifact can be recomputed) and logs it.
+
+The last intent is token metadata, returned apart from the context, so it
+never lands in session memory.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import secrets
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TOKEN_VERSION = 2
+SIGNATURE_BYTES = 16
+
+# Always carried inline, whatever their size (the routing context).
+CONTEXT_KEYS = ("team", "city", "venue")
+
+
+class InvalidContextToken(ValueError):
+    """Raised when a token is malformed, tampered with, expired or for another session."""
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _canonical(value) -> bytes:
+    return json.dumps(value, separators=(",", ":"), sort_keys=True, ensure_ascii=False).encode("utf-8")
+
+
+class ArtifactCache:
+    """Bounded LRU of large context values, keyed by the sha256 of their content."""
+
+    def __init__(self, max_entries: int = 2000):
+        self.max_entries = max_entries
+        self._items: OrderedDict[str, object] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, value) -> str:
+        digest = hashlib.sha256(_canonical(value)).hexdigest()
+        with self._lock:
+            self._items[digest] = value
+            self._items.move_to_end(digest)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+        return digest
+
+    def get(self, digest: str):
+        with self._lock:
+            if digest not in self._items:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._items.move_to_end(digest)
+            return self._items[digest]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"artifacts": len(self._items), "artifact_hits": self.hits, "artifact_misses": self.misses}
+
+
+class ContextTokenCodec:
+    def __init__(
+        self,
+        secret: str | None = None,
+        ttl_seconds: int = 24 * 3600,
+        inline_max_bytes: int = 256,
+        artifacts: ArtifactCache | None = None,
+    ):
+        # without a shared secret tokens only verify on this replica, until restart
+        secret = secret or secrets.token_hex(32)
+        self._key = secret.encode("utf-8")
+        self.ttl_seconds = ttl_seconds
+        self.inline_max_bytes = inline_max_bytes
+        # None → everything inline
+        self.artifacts = artifacts
+
+    def _sign(self, body: bytes) -> bytes:
+        return hmac.new(self._key, body, hashlib.sha256).digest()[:SIGNATURE_BYTES]
+
+    def encode(self, session_id: str, context: dict, last_intent: str | None = None,
+               now: float | None = None) -> str:
+        """Pack a session's context (and the turn's intent) into a signed token."""
+        inline, refs = {}, {}
+        for key, value in context.items():
+            if value is None:
+                continue
+            if (self.artifacts is None or key in CONTEXT_KEYS
+                    or len(_canonical(value)) <= self.inline_max_bytes):
+                inline[key] = value
+            else:
+                refs[key] = self.artifacts.put(value)
+
+        now = now or time.time()
+        payload = {"v": TOKEN_VERSION, "sid": session_id, "exp": int(now + self.ttl_seconds),
+                   "i": last_intent, "c": inline, "r": refs}
+        body = _b64encode(zlib.compress(_canonical(payload), 9)).encode("ascii")
+        return f"{body.decode('ascii')}.{_b64encode(self._sign(body))}"
+
+    def decode(self, session_id: str, token: str, now: float | None = None) -> tuple[dict, str | None]:
+        """Verify a token and return (context, last intent); unknown artifact refs are dropped."""
+        try:
+            body, signature = token.encode("ascii").split(b".")
+            if not hmac.compare_digest(_b64decode(signature.decode("ascii")), self._sign(body)):
+                raise InvalidContextToken("bad signature")
+            payload = json.loads(zlib.decompress(_b64decode(body.decode("ascii"))))
+        except InvalidContextToken:
+            raise
+        except Exception as e:
+            raise InvalidContextToken(f"malformed token: {e}") from e
+
+        if payload.get("v") != TOKEN_VERSION:
+            raise InvalidContextToken(f"unsupported token version {payload.get('v')!r}")
+        if payload.get("sid") != session_id:
+            raise InvalidContextToken("token belongs to another session")
+        if payload.get("exp", 0) < (now or time.time()):
+            raise InvalidContextToken("token expired")
+
+        context = dict(payload.get("c", {}))
+        for key, digest in payload.get("r", {}).items():
+            value = self.artifacts.get(digest) if self.artifacts is not None else None
+            if value is None:
+                logger.warning(f"[CONTEXT] Artifact for '{key}' is not on this replica (another replica "
+                               f"or evicted), dropped: use context_artifacts='inline' behind a load balancer")
+                continue
+            context[key] = value
+        return context, payload.get("i")
+
+    def stats(self) -> dict:
+        return self.artifacts.stats() if self.artifacts is not None else {"artifacts": "inline"}
+
+
+if settings.context_artifacts not in ("inline", "local"):
+    raise ValueError(f"Unknown context_artifacts: {settings.context_artifacts!r} (expected 'inline' or 'local')")
+if settings.stateless_context and not settings.context_token_secret:
+    logger.warning("[CONTEXT] No context_token_secret configured, tokens will not work across replicas")
+if settings.stateless_context and settings.context_artifacts == "local":
+    logger.warning("[CONTEXT] context_artifacts='local': large values stay in this process, "
+                   "tokens only carry them on this replica")
+
+context_tokens = ContextTokenCodec(
+    secret=settings.context_token_secret,
+    ttl_seconds=settings.context_token_ttl_seconds,
+    inline_max_bytes=settings.context_token_inline_max_bytes,
+    artifacts=(ArtifactCache(settings.context_artifact_cache_max_entries)
+               if settings.context_artifacts == "local" else None),
+)
@@ -0,0 +1,388 @@
+# agent/state/log_store.py
+"""
+Log-structured storage engine for session memory.
+
+All sessions live in an in-process index. Every change is appended as one
+compact JSON line to a log file, and the log is periodically compacted into a
+snapshot in a background thread. A write therefore costs one small append no
+matter how many sessions exist, and a read never touches the disk.
+
+On startup the snapshot is loaded and the log(s) are replayed on top of it.
+Replaying is idempotent, so a crash at any point of a compaction is safe.
+
+Idle sessions (TTL) and oversized sessions (oldest keys first) are evicted by
+`sweep()`, which SessionMemory runs from a background thread.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 2
+
+
+def _value_size(value) -> int:
+    return len(json.dumps(value, separators=(",", ":"), ensure_ascii=False))
+
+
+class LogStructuredStore:
+    # the index lives in this process only
+    shared = False
+
+    def __init__(
+        self,
+        snapshot_path: Path,
+        log_path: Path,
+        compact_min_records: int = 1000,
+        compact_ratio: float = 2.0,
+        ttl_seconds: float | None = None,
+        max_session_bytes: int | None = None,
+    ):
+        self.snapshot_path = Path(snapshot_path)
+        self.log_path = Path(log_path)
+        self.rotated_log_path = self.log_path.with_name(self.log_path.name + ".old")
+
+        # Compact once the log holds more records than
+        # max(compact_min_records, compact_ratio * live keys) → amortized O(1).
+        self.compact_min_records = compact_min_records
+        self.compact_ratio = compact_ratio
+
+        # Eviction policy (None / 0 disables)
+        self.ttl_seconds = ttl_seconds
+        self.max_session_bytes = max_session_bytes
+
+        self._lock = threading.RLock()
+        # session_id → {key: value}; keys are kept in write order (oldest first)
+        self._sessions: dict[str, dict] = {}
+        self._sizes: dict[str, dict] = {}       # session_id → {key: bytes}
+        self._session_bytes: dict[str, int] = {}
+        self._touched: dict[str, float] = {}    # session_id → last access
+        self._oversized: set[str] = set()
+        self._live_keys = 0
+        self._total_bytes = 0
+
+        self._log = None
+        self._log_records = 0
+        self._loaded = False
+        self._compacting = False
+        self._compactor: threading.Thread | None = None
+
+        self._compactions = 0
+        self._evicted_sessions = 0
+        self._evicted_keys = 0
+
+    # ------------------------------------------------------------------
+    # Loading / replay
+    # ------------------------------------------------------------------
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._read_snapshot()
+            for path in (self.rotated_log_path, self.log_path):
+                self._replay(path)
+            self._log = open(self.log_path, "a", encoding="utf-8")
+            self._loaded = True
+            logger.info(
+                f"[MEMORY] Loaded {len(self._sessions)} sessions "
+                f"(replayed {self._log_records} log records)"
+            )
+
+    def _read_snapshot(self):
+        if not self.snapshot_path.exists() or self.snapshot_path.stat().st_size == 0:
+            return
+        try:
+            data = json.loads(self.snapshot_path.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
+            # fallback if the snapshot gets corrupted
+            logger.error(f"[MEMORY] Corrupted snapshot {self.snapshot_path}, starting empty")
+            return
+        if not isinstance(data, dict):
+            return
+
+        if data.get("__format__") == SNAPSHOT_FORMAT:
+            sessions, touched = data.get("sessions", {}), data.get("touched", {})
+        else:
+            # legacy pretty-printed {session_id: {key: value}} file
+            sessions, touched = data, {}
+
+        now = time.time()
+        for session_id, session in sessions.items():
+            self._put(session_id, session, touched.get(session_id, now))
+
+    def _replay(self, path: Path):
+        if not path.exists():
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # torn write at the tail of the log (crash mid-append)
+                    continue
+                self._apply_record(record)
+                self._log_records += 1
+
+    def _apply_record(self, record: dict):
+        op = record.get("op")
+        session_id = record.get("s")
+        if op == "upd":
+            self._put(session_id, record["c"], record.get("t", time.time()))
+        elif op == "del":
+            self._drop_keys(session_id, record["k"])
+        elif op == "clr":
+            self._drop_session(session_id)
+
+    # ------------------------------------------------------------------
+    # Index mutators (no logging; shared by live writes and replay)
+    # ------------------------------------------------------------------
+    def _put(self, session_id: str, changes: dict, ts: float):
+        session = self._sessions.setdefault(session_id, {})
+        sizes = self._sizes.setdefault(session_id, {})
+        delta = 0
+        for key, value in changes.items():
+            if key in session:
+                # re-insert so the dict stays ordered oldest → newest write
+                del session[key]
+                delta -= sizes.pop(key)
+            else:
+                self._live_keys += 1
+            session[key] = value
+            sizes[key] = _value_size(value)
+            delta += sizes[key]
+
+        total = self._session_bytes.get(session_id, 0) + delta
+        self._session_bytes[session_id] = total
+        self._total_bytes += delta
+        self._touched[session_id] = ts
+        if self.max_session_bytes and total > self.max_session_bytes:
+            self._oversized.add(session_id)
+
+    def _drop_keys(self, session_id: str, keys: list):
+        session = self._sessions.get(session_id)
+        if session is None:
+            return
+        sizes = self._sizes[session_id]
+        for key in keys:
+            if key in session:
+                del session[key]
+                freed = sizes.pop(key)
+                self._session_bytes[session_id] -= freed
+                self._total_bytes -= freed
+                self._live_keys -= 1
+        if not session:
+            self._drop_session(session_id)
+
+    def _drop_session(self, session_id: str) -> bool:
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        self._live_keys -= len(session)
+        self._total_bytes -= self._session_bytes.pop(session_id, 0)
+        self._sizes.pop(session_id, None)
+        self._touched.pop(session_id, None)
+        self._oversized.discard(session_id)
+        return True
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def get(self, session_id: str) -> dict:
+        """Return a shallow copy of the session (empty dict if unknown)."""
+        self._ensure_loaded()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return {}
+            self._touched[session_id] = time.time()
+            return dict(session)
+
+    def get_value(self, session_id: str, key: str, default=None):
+        self._ensure_loaded()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return default
+            self._touched[session_id] = time.time()
+            return session.get(key, default)
+
+    def apply(self, session_id: str, changes: dict):
+        """Apply several key changes to one session as a single log record."""
+        if not changes:
+            return
+        self._ensure_loaded()
+        now = time.time()
+        record = {"op": "upd", "s": session_id, "t": round(now, 3), "c": changes}
+        with self._lock:
+            self._append(record)
+            self._put(session_id, changes, now)
+            self._maybe_compact()
+
+    def delete_session(self, session_id: str):
+        self._ensure_loaded()
+        with self._lock:
+            if self._drop_session(session_id):
+                self._append({"op": "clr", "s": session_id})
+                self._maybe_compact()
+
+    def session_count(self) -> int:
+        self._ensure_loaded()
+        return len(self._sessions)
+
+    def close(self):
+        self._wait_for_compaction()
+        with self._lock:
+            if self._log:
+                self._log.close()
+                self._log = None
+            self._loaded = False
+
+    # ------------------------------------------------------------------
+    # Eviction
+    # ------------------------------------------------------------------
+    def sweep(self, now: float | None = None) -> dict:
+        """Evict idle sessions and trim oversized ones (oldest keys first)."""
+        self._ensure_loaded()
+        now = now or time.time()
+        evicted_sessions = evicted_keys = 0
+
+        with self._lock:
+            if self.ttl_seconds:
+                cutoff = now - self.ttl_seconds
+                expired = [sid for sid, ts in self._touched.items() if ts < cutoff]
+                for session_id in expired:
+                    self._drop_session(session_id)
+                    self._append({"op": "clr", "s": session_id})
+                evicted_sessions = len(expired)
+
+            for session_id in list(self._oversized):
+                self._oversized.discard(session_id)
+                session = self._sessions.get(session_id)
+                if session is None:
+                    continue
+                sizes = self._sizes[session_id]
+                total = self._session_bytes[session_id]
+                victims = []
+                # always keep the newest key, even if it alone exceeds the cap
+                for key in list(session)[:-1]:
+                    if total <= self.max_session_bytes:
+                        break
+                    victims.append(key)
+                    total -= sizes[key]
+                if victims:
+                    self._drop_keys(session_id, victims)
+                    self._append({"op": "del", "s": session_id, "k": victims})
+                    evicted_keys += len(victims)
+
+            self._evicted_sessions += evicted_sessions
+            self._evicted_keys += evicted_keys
+            self._maybe_compact()
+
+        if evicted_sessions or evicted_keys:
+            logger.info(
+                f"[MEMORY] Sweep evicted {evicted_sessions} idle sessions, "
+                f"{evicted_keys} keys from oversized sessions"
+            )
+        return {"evicted_sessions": evicted_sessions, "evicted_keys": evicted_keys}
+
+    def stats(self) -> dict:
+        self._ensure_loaded()
+        with self._lock:
+            return {
+                "backend": "log",
+                "sessions": len(self._sessions),
+                "keys": self._live_keys,
+                "bytes": self._total_bytes,
+                "log_records": self._log_records,
+                "log_file_bytes": self._file_size(self.log_path),
+                "snapshot_file_bytes": self._file_size(self.snapshot_path),
+                "compactions": self._compactions,
+                "evicted_sessions": self._evicted_sessions,
+                "evicted_keys": self._evicted_keys,
+            }
+
+    @staticmethod
+    def _file_size(path: Path) -> int:
+        try:
+            return path.stat().st_size
+        except OSError:
+            return 0
+
+    # ------------------------------------------------------------------
+    # Log + compaction
+    # ------------------------------------------------------------------
+    def _append(self, record: dict):
+        self._log.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._log.flush()
+        self._log_records += 1
+
+    def _maybe_compact(self):
+        threshold = max(self.compact_min_records, int(self.compact_ratio * self._live_keys))
+        if self._compacting or self._log_records < threshold:
+            return
+        self._compacting = True
+        frozen = self._rotate()
+        self._compactor = threading.Thread(
+            target=self._write_snapshot, args=(frozen,), name="memory-compactor", daemon=True
+        )
+        self._compactor.start()
+
+    def _rotate(self) -> dict:
+        """
+        Move the live log aside and return a point-in-time copy of the index.
+        Called under the lock; the expensive serialization + fsync happens in
+        _write_snapshot, off the request path.
+        """
+        self._log.close()
+        if self.rotated_log_path.exists():
+            # a previous compaction failed → keep its records, append ours
+            with open(self.rotated_log_path, "a", encoding="utf-8") as dst:
+                dst.write(self.log_path.read_text(encoding="utf-8"))
+            self.log_path.unlink()
+        else:
+            os.replace(self.log_path, self.rotated_log_path)
+        self._log = open(self.log_path, "a", encoding="utf-8")
+        self._log_records = 0
+        return {
+            "__format__": SNAPSHOT_FORMAT,
+            "sessions": {sid: dict(session) for sid, session in self._sessions.items()},
+            "touched": dict(self._touched),
+        }
+
+    def _write_snapshot(self, frozen: dict):
+        tmp_path = self.snapshot_path.with_name(self.snapshot_path.name + ".tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(frozen, f, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            self.rotated_log_path.unlink(missing_ok=True)
+            self._compactions += 1
+            logger.info(f"[MEMORY] Compacted log into snapshot ({len(frozen['sessions'])} sessions)")
+        except Exception as e:
+            # the rotated log is kept, so nothing is lost; it is replayed on restart
+            logger.error(f"[MEMORY] Log compaction failed: {e}")
+        finally:
+            with self._lock:
+                self._compacting = False
+
+    def compact(self):
+        """Force a compaction now and wait for it (used on shutdown / in tools)."""
+        self._ensure_loaded()
+        self._wait_for_compaction()
+        with self._lock:
+            self._compacting = True
+            frozen = self._rotate()
+        self._write_snapshot(frozen)
+
+    def _wait_for_compaction(self):
+        compactor = self._compactor
+        if compactor is not None and compactor is not threading.current_thread():
+            compactor.join()
@@ -1,45 +1,571 @@
 # agent/state/memory.py
-import json
-from pathlib import Path
+import atexit
 import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from core.config import settings
+from agent.state.log_store import LogStructuredStore
+from agent.state.sqlite_store import SQLiteStore
 
 MEMORY_FILE = Path("memory_store.json")
+MEMORY_LOG_FILE = Path("memory_store.log")
+
+# Active transactions ({session_id: SessionTransaction}) and the round-trip
+# counter of the current request. Context variables are copied into
+# asyncio tasks and asyncio.to_thread workers, so the fusion fan-out shares
+# both with the node that started it.
+_active_transactions: ContextVar[dict] = ContextVar("memory_transactions", default={})
+_round_trips: ContextVar["RoundTripCounter | None"] = ContextVar("memory_round_trips", default=None)
+
+
+class RoundTripCounter:
+    """Counts store round trips (loads + commits) made during one request."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.ops: dict[str, int] = {}
+
+    def record(self, op: str):
+        with self._lock:
+            self.count += 1
+            self.ops[op] = self.ops.get(op, 0) + 1
+
+
+class SessionLocks:
+    """
+    Per-session locks (striped: a fixed table indexed by hash(session_id), so
+    memory stays bounded however many sessions exist). Work on one session
+    never waits for another session's I/O. Re-entrant, so a thread holding a
+    session lock can still call the memory API. Time spent waiting is recorded.
+    """
+
+    def __init__(self, stripes: int = 256):
+        self._locks = [threading.RLock() for _ in range(stripes)]
+        self._stats_lock = threading.Lock()
+        self.acquisitions = 0
+        self.contended = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _lock_for(self, session_id) -> threading.RLock:
+        return self._locks[hash(session_id) % len(self._locks)]
+
+    def acquire(self, session_id, blocking: bool = True) -> bool:
+        lock = self._lock_for(session_id)
+        if lock.acquire(blocking=False):
+            waited = 0.0
+        elif not blocking:
+            return False
+        else:
+            start = time.perf_counter()
+            lock.acquire()
+            waited = time.perf_counter() - start
+        with self._stats_lock:
+            self.acquisitions += 1
+            if waited:
+                self.contended += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+        return True
+
+    def release(self, session_id):
+        self._lock_for(session_id).release()
+
+    @contextmanager
+    def hold(self, session_id):
+        self.acquire(session_id)
+        try:
+            yield
+        finally:
+            self.release(session_id)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "lock_acquisitions": self.acquisitions,
+                "lock_contended": self.contended,
+                "lock_wait_total_ms": round(self.wait_total * 1000, 3),
+                "lock_wait_max_ms": round(self.wait_max * 1000, 3),
+            }
+
+
+class SessionTransaction:
+    """
+    Buffered view of one session: loaded at most once (lazily, on the first
+    read), read and written in memory, committed to the store as a single
+    update when the block exits. Thread-safe, so concurrent domain LLMs can
+    share it.
+    """
+
+    def __init__(self, session_id: str, loader):
+        self.session_id = session_id
+        self._lock = threading.Lock()
+        self._loader = loader
+        self._data: dict | None = None
+        self._changes: dict = {}
+        self._cleared = False
+
+    def _view(self) -> dict:
+        if self._data is None:
+            self._data = {} if self._cleared else self._loader(self.session_id)
+            self._data.update(self._changes)
+        return self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._view().get(key, default)
+
+    def get_all(self) -> dict:
+        with self._lock:
+            return dict(self._view())
+
+    def set(self, key, value):
+        self.update({key: value})
+
+    def update(self, changes: dict):
+        with self._lock:
+            self._changes.update(changes)
+            if self._data is not None:
+                self._data.update(changes)
+
+    def modify(self, fn) -> dict:
+        """Atomic read-modify-write against this transaction's view."""
+        with self._lock:
+            changes = fn(dict(self._view())) or {}
+            self._changes.update(changes)
+            self._data.update(changes)
+            return changes
+
+    def pending(self) -> dict:
+        """Writes not committed yet."""
+        with self._lock:
+            return dict(self._changes)
+
+    def clear(self):
+        with self._lock:
+            self._data = {}
+            self._changes.clear()
+            self._cleared = True
+
+
+def build_store(backend: str | None = None):
+    """
+    Create the storage engine selected by `settings.session_backend`:
+      - "log":    in-process index + append-only log (single worker only)
+      - "sqlite": SQLite in WAL mode, shared by several uvicorn workers
+    """
+    backend = (backend or settings.session_backend).lower()
+    eviction = {
+        "ttl_seconds": settings.session_ttl_seconds,
+        "max_session_bytes": settings.session_max_bytes,
+    }
+    if backend == "log":
+        return LogStructuredStore(MEMORY_FILE, MEMORY_LOG_FILE, **eviction)
+    if backend == "sqlite":
+        return SQLiteStore(
+            settings.session_sqlite_path,
+            pool_size=settings.session_sqlite_pool_size,
+            busy_timeout_ms=settings.session_sqlite_busy_timeout_ms,
+            **eviction,
+        )
+    raise ValueError(f"Unknown session_backend: {backend!r} (expected 'log' or 'sqlite')")
+
 
 class SessionMemory:
-    def _load(self):
-        if not MEMORY_FILE.exists() or MEMORY_FILE.stat().st_size == 0:
-            # create an empty JSON file if it doesn’t exist or is empty
-            MEMORY_FILE.write_text("{}")
-            return {}
+    """
+    Per-session key/value context shared by the LLM modules and graph nodes.
+
+    The storage engine is pluggable (see build_store); every engine serves a
+    call without touching other sessions, so the cost of a call does not
+    depend on how many sessions exist.
+
+    In front of the store sits a small read-through cache and a write-behind
+    buffer: reads of recently used sessions and all writes are in-memory
+    operations, and a background thread flushes buffered writes to the store
+    in batches. That is what lets AsyncSessionMemory serve the event loop
+    without blocking it. Both are off for a store shared with other worker
+    processes (`store.shared`, the sqlite backend): a cached read could be
+    stale and a buffered write could land over another worker's, so every
+    call goes to the store.
+
+    Prefer `update()` for several keys and `transaction()` around a whole
+    node/turn: inside a transaction every call for that session is served
+    from one buffered copy and committed once.
+    """
+
+    def __init__(
+        self,
+        store=None,
+        cache_max_sessions: int | None = None,
+        cache_ttl_seconds: float | None = None,
+        write_behind_ms: int | None = None,
+    ):
+        self._store = store if store is not None else build_store()
+        shared = getattr(self._store, "shared", False)
+        if shared:
+            logging.info("[MEMORY] Shared session store: write-through, no read cache")
+        self._sweeper: threading.Thread | None = None
+        self._sweeper_stop = threading.Event()
+
+        # Same-session work (cache fill, buffered write, flush, clear) is
+        # serialized per session; `_cache_lock` only guards the shared dicts
+        # and is never held across I/O.
+        self._locks = SessionLocks()
+
+        # Read-through cache: session_id → (data incl. pending writes, loaded_at)
+        self._cache: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+        self._cache_max = 0 if shared else (
+            cache_max_sessions if cache_max_sessions is not None else settings.session_cache_max_sessions)
+        self._cache_ttl = cache_ttl_seconds if cache_ttl_seconds is not None else settings.session_cache_ttl_seconds
+        self._cache_lock = threading.Lock()
+
+        # Write-behind: changes not yet in the store. `_inflight` is the batch
+        # currently being written, drained session by session under the
+        # session lock, so a cache fill never sees a half-landed batch.
+        write_behind_ms = write_behind_ms if write_behind_ms is not None else settings.session_write_behind_ms
+        self._write_behind = 0 if shared else write_behind_ms / 1000
+        self._pending: dict[str, dict] = {}
+        self._inflight: dict[str, dict] = {}
+        self._flush_lock = threading.Lock()
+        self._flusher: threading.Thread | None = None
+        self._flusher_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Round-trip accounting
+    # ------------------------------------------------------------------
+    @contextmanager
+    def track_round_trips(self):
+        """Count store round trips made inside the block (one per request)."""
+        counter = RoundTripCounter()
+        token = _round_trips.set(counter)
+        try:
+            yield counter
+        finally:
+            _round_trips.reset(token)
+
+    def _record(self, op: str):
+        counter = _round_trips.get()
+        if counter is not None:
+            counter.record(op)
+
+    # ------------------------------------------------------------------
+    # Read-through cache
+    # ------------------------------------------------------------------
+    def cached(self, session_id) -> dict | None:
+        """Copy of the session if it is cached and fresh, else None. Never blocks on I/O."""
+        with self._cache_lock:
+            entry = self._cache.get(session_id)
+            if entry is None:
+                return None
+            data, loaded_at = entry
+            if self._cache_ttl and time.monotonic() - loaded_at > self._cache_ttl:
+                del self._cache[session_id]
+                return None
+            self._cache.move_to_end(session_id)
+            return dict(data)
+
+    def _read(self, session_id, op: str) -> dict:
+        """Cached copy of the session, loading it from the store on a miss."""
+        data = self.cached(session_id)
+        if data is not None:
+            return data
+
+        with self._locks.hold(session_id):
+            # another thread may have filled it while we waited (single flight)
+            data = self.cached(session_id)
+            if data is not None:
+                return data
+            self._record(op)
+            loaded = self._store.get(session_id)
+            with self._cache_lock:
+                loaded.update(self._inflight.get(session_id, {}))
+                loaded.update(self._pending.get(session_id, {}))
+                self._cache_put(session_id, loaded)
+                return dict(loaded)
+
+    def _cache_put(self, session_id, data: dict):
+        self._cache[session_id] = (data, time.monotonic())
+        self._cache.move_to_end(session_id)
+        while len(self._cache) > self._cache_max:
+            self._cache.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Write-behind
+    # ------------------------------------------------------------------
+    def _write(self, session_id, changes: dict, op: str, blocking: bool = True) -> bool:
+        """Apply a write; with blocking=False, return False instead of waiting for the session lock."""
+        if not changes:
+            return True
+        if not self._locks.acquire(session_id, blocking=blocking):
+            return False
         try:
-            return json.loads(MEMORY_FILE.read_text())
-        except json.JSONDecodeError:
-            # fallback if file gets corrupted
-            MEMORY_FILE.write_text("{}")
-            return {}
+            if not self._write_behind:
+                self._record(op)
+                self._store.apply(session_id, changes)
+            with self._cache_lock:
+                if self._write_behind:
+                    self._pending.setdefault(session_id, {}).update(changes)
+                entry = self._cache.get(session_id)
+                if entry is not None:
+                    entry[0].update(changes)
+        finally:
+            self._locks.release(session_id)
+        if self._write_behind:
+            self._ensure_flusher()
+        return True
+
+    def _ensure_flusher(self):
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        with self._flusher_lock:
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+
+            def loop():
+                while True:
+                    time.sleep(self._write_behind)
+                    try:
+                        self.flush()
+                    except Exception as e:
+                        logging.error(f"[MEMORY] Write-behind flush failed: {e}")
+
+            self._flusher = threading.Thread(target=loop, name="memory-flusher", daemon=True)
+            self._flusher.start()
+            atexit.register(self.flush)
+
+    def flush(self):
+        """Write every buffered change to the store now."""
+        with self._flush_lock:
+            with self._cache_lock:
+                if not self._pending:
+                    return
+                self._inflight, self._pending = self._pending, {}
+            try:
+                for session_id in list(self._inflight):
+                    with self._locks.hold(session_id):
+                        with self._cache_lock:
+                            # gone if the session was cleared meanwhile
+                            changes = self._inflight.get(session_id)
+                        if changes is not None:
+                            self._store.apply(session_id, changes)
+                        with self._cache_lock:
+                            self._inflight.pop(session_id, None)
+            except Exception:
+                # put the rest back in front of newer changes and retry next tick
+                with self._cache_lock:
+                    for session_id, changes in self._inflight.items():
+                        merged = {**changes, **self._pending.get(session_id, {})}
+                        self._pending[session_id] = merged
+                    self._inflight = {}
+                raise
+
+    # ------------------------------------------------------------------
+    # Transactions
+    # ------------------------------------------------------------------
+    @contextmanager
+    def transaction(self, session_id):
+        active = _active_transactions.get()
+        if session_id in active:
+            # nested → join the outer transaction, it commits once
+            yield active[session_id]
+            return
+
+        tx, token = self.begin(session_id)
+        try:
+            yield tx
+        except BaseException:
+            logging.warning(f"[MEMORY] Rolled back transaction for {session_id}")
+            raise
+        else:
+            self.commit(tx)
+        finally:
+            self.end(token)
+
+    def begin(self, session_id, loader=None):
+        """
+        Start a transaction and make it the active one for the session in this
+        context; returns (tx, token). `loader(session_id)` supplies the
+        session on the first read (default: the cache / store). Pair with
+        commit(tx) and end(token); transaction() does it for sync code.
+        """
+        tx = SessionTransaction(session_id, loader or self._load)
+        token = _active_transactions.set({**_active_transactions.get(), session_id: tx})
+        return tx, token
 
+    def end(self, token):
+        """Deactivate the transaction started by begin() (committed or not)."""
+        _active_transactions.reset(token)
 
-    def _save(self, data):
-        MEMORY_FILE.write_text(json.dumps(data, indent=2))
+    def _load(self, session_id) -> dict:
+        return self._read(session_id, "load")
 
+    def commit(self, tx: SessionTransaction, blocking: bool = True) -> bool:
+        """
+        Write the transaction's changes as one update. With blocking=False,
+        return False without doing anything if that needs store I/O (a clear,
+        write-through) or a busy session lock.
+        """
+        with tx._lock:
+            cleared, changes = tx._cleared, dict(tx._changes)
+        if not blocking and (cleared or (changes and not self.buffered)):
+            return False
+        if cleared:
+            self._clear(tx.session_id)
+        if changes:
+            if not self._write(tx.session_id, changes, "commit", blocking=blocking):
+                return False
+            logging.info(f"[MEMORY] Committed {list(changes)} for {tx.session_id}")
+        return True
+
+    def current_transaction(self, session_id) -> SessionTransaction | None:
+        """The session's active transaction in this context, None outside one."""
+        return _active_transactions.get().get(session_id)
+
+    @property
+    def buffered(self) -> bool:
+        """True when writes go to the write-behind buffer rather than straight to the store."""
+        return bool(self._write_behind)
+
+    @contextmanager
+    def lock(self, session_id):
+        """Hold the session's lock across several calls on this thread."""
+        with self._locks.hold(session_id):
+            yield
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
     def set_context(self, session_id, key, value):
-        data = self._load()
-        session = data.get(session_id, {})
-        session[key] = value
-        data[session_id] = session
-        self._save(data)
-        logging.info(f"[MEMORY] Stored {key} for {session_id}")
+        self.update(session_id, {key: value})
+
+    def update(self, session_id, changes: dict):
+        """Set several keys at once (one buffered write)."""
+        tx = self.current_transaction(session_id)
+        if tx is not None:
+            tx.update(changes)
+            return
+        self._write(session_id, changes, "update")
+        logging.info(f"[MEMORY] Stored {list(changes)} for {session_id}")
+
+    def modify(self, session_id, fn) -> dict:
+        """
+        Atomic read-modify-write: `fn(current)` returns the keys to change.
+        Use it for values derived from their previous value (counters, lists),
+        which plain get + set would lose under a concurrent fan-out.
+        """
+        tx = self.current_transaction(session_id)
+        if tx is not None:
+            return tx.modify(fn)
+        with self._locks.hold(session_id):
+            changes = fn(self._read(session_id, "get_all")) or {}
+            self._write(session_id, changes, "update")
+        return changes
+
+    def try_update(self, session_id, changes: dict) -> bool:
+        """update() that returns False instead of waiting on a busy session lock."""
+        tx = self.current_transaction(session_id)
+        if tx is not None:
+            tx.update(changes)
+            return True
+        if not self._write(session_id, changes, "update", blocking=False):
+            return False
+        logging.info(f"[MEMORY] Stored {list(changes)} for {session_id}")
+        return True
 
     def get_context(self, session_id, key, default=None):
-        return self._load().get(session_id, {}).get(key, default)
+        tx = self.current_transaction(session_id)
+        if tx is not None:
+            return tx.get(key, default)
+        return self._read(session_id, "get").get(key, default)
 
     def get_all(self, session_id):
-        return self._load().get(session_id, {})
+        tx = self.current_transaction(session_id)
+        if tx is not None:
+            return tx.get_all()
+        return self._read(session_id, "get_all")
+
+    def pending(self, session_id) -> dict:
+        """Uncommitted writes of the active transaction on this session ({} outside one)."""
+        tx = self.current_transaction(session_id)
+        return tx.pending() if tx is not None else {}
 
     def clear(self, session_id):
-        data = self._load()
-        data.pop(session_id, None)
-        self._save(data)
+        tx = self.current_transaction(session_id)
+        if tx is not None:
+            tx.clear()
+            return
+        self._clear(session_id)
         logging.info(f"[MEMORY] Cleared session {session_id}")
 
+    def _clear(self, session_id):
+        self._record("clear")
+        # under the session lock, and dropped from the in-flight batch, so a
+        # concurrent flush cannot resurrect the session
+        with self._locks.hold(session_id):
+            with self._cache_lock:
+                self._pending.pop(session_id, None)
+                self._inflight.pop(session_id, None)
+                self._cache.pop(session_id, None)
+            self._store.delete_session(session_id)
+
+    # ------------------------------------------------------------------
+    # Eviction + stats
+    # ------------------------------------------------------------------
+    def start_sweeper(self, interval: float | None = None):
+        """Run TTL / size eviction periodically in a daemon thread."""
+        if self._sweeper and self._sweeper.is_alive():
+            return
+        interval = interval or settings.session_sweep_interval_seconds
+        self._sweeper_stop.clear()
+
+        def loop():
+            while not self._sweeper_stop.wait(interval):
+                try:
+                    self.flush()
+                    self._store.sweep()
+                    with self._cache_lock:
+                        # evicted sessions must not linger in the cache
+                        self._cache.clear()
+                except Exception as e:
+                    logging.error(f"[MEMORY] Sweep failed: {e}")
+
+        self._sweeper = threading.Thread(target=loop, name="memory-sweeper", daemon=True)
+        self._sweeper.start()
+        logging.info(f"[MEMORY] Background sweeper started (every {interval}s)")
+
+    def stop_sweeper(self):
+        self._sweeper_stop.set()
+        if self._sweeper:
+            self._sweeper.join(timeout=5)
+            self._sweeper = None
+
+    def sweep(self) -> dict:
+        self.flush()
+        result = self._store.sweep()
+        with self._cache_lock:
+            self._cache.clear()
+        return result
+
+    def stats(self) -> dict:
+        with self._cache_lock:
+            cache = {
+                "cached_sessions": len(self._cache),
+                "pending_sessions": len(self._pending),
+            }
+        return {**self._store.stats(), **cache, **self._locks.stats()}
+
+    def compact(self):
+        self.flush()
+        self._store.compact()
+
+    def close(self):
+        self.flush()
+        self._store.close()
+
 memory = SessionMemory()
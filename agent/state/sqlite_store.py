@@ -0,0 +1,268 @@
+# agent/state/sqlite_store.py
+"""
+SQLite (WAL) storage engine for session memory.
+
+Safe to share between several uvicorn worker processes: one row per
+(session_id, key), multi-key updates are a single IMMEDIATE transaction, and
+WAL mode lets readers proceed while a writer commits. Each connection in the
+small pool keeps its own prepared-statement cache, and every statement below
+is a module-level constant, so steady-state calls never re-parse SQL.
+
+Implements the same interface as LogStructuredStore.
+"""
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Reads only refresh a session's `touched` time when it is older than this,
+# so hot read paths do not take the write lock on every call.
+TOUCH_GRANULARITY_SECONDS = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS session_kv (
+    session_id TEXT NOT NULL,
+    key        TEXT NOT NULL,
+    value      TEXT NOT NULL,
+    size       INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (session_id, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    touched    REAL NOT NULL,
+    bytes      INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_sessions_touched ON sessions (touched);
+"""
+
+SQL_SELECT_SESSION = "SELECT key, value FROM session_kv WHERE session_id = ? ORDER BY updated_at"
+SQL_SELECT_VALUE = "SELECT value FROM session_kv WHERE session_id = ? AND key = ?"
+SQL_SELECT_TOUCHED = "SELECT touched FROM sessions WHERE session_id = ?"
+SQL_TOUCH = "UPDATE sessions SET touched = ? WHERE session_id = ?"
+SQL_UPSERT_KV = """
+INSERT INTO session_kv (session_id, key, value, size, updated_at) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (session_id, key) DO UPDATE SET
+    value = excluded.value, size = excluded.size, updated_at = excluded.updated_at
+"""
+SQL_UPSERT_SESSION = """
+INSERT INTO sessions (session_id, touched, bytes)
+VALUES (?, ?, (SELECT COALESCE(SUM(size), 0) FROM session_kv WHERE session_id = ?))
+ON CONFLICT (session_id) DO UPDATE SET touched = excluded.touched, bytes = excluded.bytes
+"""
+SQL_DELETE_SESSION_KV = "DELETE FROM session_kv WHERE session_id = ?"
+SQL_DELETE_SESSION = "DELETE FROM sessions WHERE session_id = ?"
+SQL_DELETE_KEY = "DELETE FROM session_kv WHERE session_id = ? AND key = ?"
+SQL_SELECT_EXPIRED = "SELECT session_id FROM sessions WHERE touched < ?"
+SQL_SELECT_OVERSIZED = "SELECT session_id FROM sessions WHERE bytes > ?"
+SQL_SELECT_KEY_SIZES = "SELECT key, size FROM session_kv WHERE session_id = ? ORDER BY updated_at DESC"
+SQL_SET_BYTES = "UPDATE sessions SET bytes = ? WHERE session_id = ?"
+SQL_STATS = "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM sessions"
+SQL_COUNT_KEYS = "SELECT COUNT(*) FROM session_kv"
+
+
+def _encode(value) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+class SQLiteStore:
+    def __init__(
+        self,
+        db_path: Path,
+        pool_size: int = 4,
+        busy_timeout_ms: int = 5000,
+        ttl_seconds: float | None = None,
+        max_session_bytes: int | None = None,
+        shared: bool = True,
+    ):
+        self.db_path = Path(db_path)
+        # other worker processes read and write the same database
+        # (False only when a single process uses it)
+        self.shared = shared
+        self.pool_size = pool_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.ttl_seconds = ttl_seconds
+        self.max_session_bytes = max_session_bytes
+
+        self._pool: queue.Queue[sqlite3.Connection] = queue.Queue(maxsize=pool_size)
+        self._created = 0
+        self._pool_lock = threading.Lock()
+        self._schema_ready = False
+
+        self._evicted_sessions = 0
+        self._evicted_keys = 0
+
+    # ------------------------------------------------------------------
+    # Connection pool
+    # ------------------------------------------------------------------
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            isolation_level=None,          # explicit BEGIN / COMMIT below
+            check_same_thread=False,       # pooled across threads
+            cached_statements=64,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        if not self._schema_ready:
+            conn.executescript(SCHEMA)
+            self._schema_ready = True
+        return conn
+
+    @contextmanager
+    def _conn(self):
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._pool_lock:
+                create = self._created < self.pool_size
+                if create:
+                    self._created += 1
+            conn = self._connect() if create else self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    @contextmanager
+    def _write(self):
+        """IMMEDIATE transaction: takes the write lock up front, no upgrade deadlocks."""
+        with self._conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            else:
+                conn.execute("COMMIT")
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def get(self, session_id: str) -> dict:
+        with self._conn() as conn:
+            rows = conn.execute(SQL_SELECT_SESSION, (session_id,)).fetchall()
+            if rows:
+                self._touch(conn, session_id)
+        return {key: json.loads(value) for key, value in rows}
+
+    def get_value(self, session_id: str, key: str, default=None):
+        with self._conn() as conn:
+            row = conn.execute(SQL_SELECT_VALUE, (session_id, key)).fetchone()
+            if row:
+                self._touch(conn, session_id)
+        return json.loads(row[0]) if row else default
+
+    def _touch(self, conn: sqlite3.Connection, session_id: str):
+        now = time.time()
+        row = conn.execute(SQL_SELECT_TOUCHED, (session_id,)).fetchone()
+        if row and now - row[0] > TOUCH_GRANULARITY_SECONDS:
+            conn.execute(SQL_TOUCH, (now, session_id))
+
+    def apply(self, session_id: str, changes: dict):
+        if not changes:
+            return
+        now = time.time()
+        rows = []
+        for i, (key, value) in enumerate(changes.items()):
+            encoded = _encode(value)
+            # microsecond offsets keep write order within one update (oldest-key eviction)
+            rows.append((session_id, key, encoded, len(encoded), now + i * 1e-6))
+        with self._write() as conn:
+            conn.executemany(SQL_UPSERT_KV, rows)
+            conn.execute(SQL_UPSERT_SESSION, (session_id, now, session_id))
+
+    def delete_session(self, session_id: str):
+        with self._write() as conn:
+            conn.execute(SQL_DELETE_SESSION_KV, (session_id,))
+            conn.execute(SQL_DELETE_SESSION, (session_id,))
+
+    def session_count(self) -> int:
+        with self._conn() as conn:
+            return conn.execute(SQL_STATS).fetchone()[0]
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+        self._created = 0
+
+    def compact(self):
+        """Fold the WAL back into the main database file."""
+        with self._conn() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    # ------------------------------------------------------------------
+    # Eviction + stats
+    # ------------------------------------------------------------------
+    def sweep(self, now: float | None = None) -> dict:
+        """Evict idle sessions and trim oversized ones (oldest keys first)."""
+        now = now or time.time()
+        evicted_sessions = evicted_keys = 0
+
+        with self._write() as conn:
+            if self.ttl_seconds:
+                expired = [r[0] for r in conn.execute(SQL_SELECT_EXPIRED, (now - self.ttl_seconds,))]
+                for session_id in expired:
+                    conn.execute(SQL_DELETE_SESSION_KV, (session_id,))
+                    conn.execute(SQL_DELETE_SESSION, (session_id,))
+                evicted_sessions = len(expired)
+
+            if self.max_session_bytes:
+                oversized = [r[0] for r in conn.execute(SQL_SELECT_OVERSIZED, (self.max_session_bytes,))]
+                for session_id in oversized:
+                    keys = conn.execute(SQL_SELECT_KEY_SIZES, (session_id,)).fetchall()
+                    # newest first; keep the newest key, then drop everything
+                    # from the first key that no longer fits (oldest go first)
+                    total, victims = keys[0][1], []
+                    for key, size in keys[1:]:
+                        if victims or total + size > self.max_session_bytes:
+                            victims.append(key)
+                        else:
+                            total += size
+                    conn.executemany(SQL_DELETE_KEY, [(session_id, k) for k in victims])
+                    conn.execute(SQL_SET_BYTES, (total, session_id))
+                    evicted_keys += len(victims)
+
+        self._evicted_sessions += evicted_sessions
+        self._evicted_keys += evicted_keys
+        if evicted_sessions or evicted_keys:
+            logger.info(
+                f"[MEMORY] Sweep evicted {evicted_sessions} idle sessions, "
+                f"{evicted_keys} keys from oversized sessions"
+            )
+        return {"evicted_sessions": evicted_sessions, "evicted_keys": evicted_keys}
+
+    def stats(self) -> dict:
+        with self._conn() as conn:
+            sessions, total_bytes = conn.execute(SQL_STATS).fetchone()
+            keys = conn.execute(SQL_COUNT_KEYS).fetchone()[0]
+        return {
+            "backend": "sqlite",
+            "sessions": sessions,
+            "keys": keys,
+            "bytes": total_bytes,
+            "db_file_bytes": self._file_size(self.db_path),
+            "wal_file_bytes": self._file_size(self.db_path.with_name(self.db_path.name + "-wal")),
+            "pool_size": self.pool_size,
+            "evicted_sessions": self._evicted_sessions,
+            "evicted_keys": self._evicted_keys,
+        }
+
+    @staticmethod
+    def _file_size(path: Path) -> int:
+        try:
+            return path.stat().st_size
+        except OSError:
+            return 0
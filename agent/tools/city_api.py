@@ -1,10 +1,11 @@
-import requests
+import asyncio
 import logging
-import time
 from urllib.parse import quote
+from core.config import settings
 from core.logging_config import setup_logging
 from utils.formatters import short_text
-#from utils.cache_utils import ttl_cache
+from utils.cache_utils import ttl_cache
+from utils.http_client import RETRY_STATUSES, http
 
 setup_logging()
 logger = logging.getLogger(__name__)
@@ -14,7 +15,35 @@ HEADERS = {
     "Accept": "application/json",
 }
 
-def _fetch_wikipedia_summary(query: str) -> str:
+# Wikipedia pages barely change; the fallback texts below may just mean we
+# were rate-limited, so they are never cached.
+WIKI_TTL = 24 * 3600
+NO_SUMMARY = "No detailed Wikipedia data available for"
+GENERIC_HIGHLIGHTS = "can enjoy its cultural attractions"
+
+# A city guide waits this long for its lookups, then goes with what it has;
+# late lookups still finish (in the background) into the caches.
+LOOKUP_DEADLINE = settings.city_lookup_deadline_seconds
+_late_lookups: set = set()
+
+
+def _no_summary(text: str) -> bool:
+    return text.startswith((NO_SUMMARY, "No topic"))
+
+
+def _generic(text: str) -> bool:
+    return GENERIC_HIGHLIGHTS in text
+
+
+def is_fallback_guide(guide: dict) -> bool:
+    """True if a city guide carries a fallback text (no city page or no highlights) instead of Wikipedia data."""
+    summary = guide.get("summary") or guide.get("city_summary") or ""
+    return _no_summary(summary) or _generic(guide.get("tourist_info") or "")
+
+
+@ttl_cache(ttl=WIKI_TTL, disk="wikipedia",
+           cacheable=lambda text: bool(text) and not _no_summary(text))
+async def _fetch_wikipedia_summary(query: str) -> str:
     """Fetch a Wikipedia summary with retries and required headers."""
     if not query:
         return "No topic provided."
@@ -22,24 +51,20 @@ def _fetch_wikipedia_summary(query: str) -> str:
     encoded = quote(query.strip())
     summary_url = f"https://en.wikipedia.org/api/rest_v1/page/summary/{encoded}"
 
-    for attempt in range(2):
-        try:
-            resp = requests.get(summary_url, headers=HEADERS, timeout=10)
-            if resp.status_code == 200 and "application/json" in resp.headers.get("Content-Type", ""):
-                data = resp.json()
-                text = data.get("extract")
-                if text:
-                    return short_text(text, 600)
-            elif resp.status_code in (403, 429):
-                logger.warning(f"[CITY API] Wikipedia rate-limit or header block for {query}, retrying...")
-                time.sleep(1.5)
-                continue
-            else:
-                logger.warning(f"[CITY API] No summary found for {query} (status {resp.status_code})")
-                break
-        except Exception as e:
-            logger.error(f"[CITY API] Wikipedia error for {query}: {e}")
-            break
+    try:
+        # a 403 from Wikipedia is usually a transient header / rate block: retried (with backoff) too
+        resp = await http.get(summary_url, headers=HEADERS, retry_statuses=(403, *RETRY_STATUSES))
+        if resp.status_code == 200 and "application/json" in resp.headers.get("Content-Type", ""):
+            data = resp.json()
+            text = data.get("extract")
+            if text:
+                return short_text(text, 600)
+        elif resp.status_code in (403, 429):
+            logger.warning(f"[CITY API] Wikipedia rate-limit or header block for {query}")
+        else:
+            logger.warning(f"[CITY API] No summary found for {query} (status {resp.status_code})")
+    except Exception as e:
+        logger.error(f"[CITY API] Wikipedia error for {query}: {e}")
 
     # 🔄 Fallback: use search API
     try:
@@ -47,22 +72,23 @@ def _fetch_wikipedia_summary(query: str) -> str:
             f"https://en.wikipedia.org/w/api.php?"
             f"action=query&list=search&srsearch={encoded}&utf8=&format=json"
         )
-        resp = requests.get(search_url, headers=HEADERS, timeout=10)
+        resp = await http.get(search_url, headers=HEADERS)
         if resp.status_code == 200 and "application/json" in resp.headers.get("Content-Type", ""):
             results = resp.json().get("query", {}).get("search", [])
             if results:
                 title = results[0]["title"]
                 logger.info(f"[CITY API] Fallback search found: {title}")
-                return _fetch_wikipedia_summary(title)
+                return await _fetch_wikipedia_summary(title)
     except Exception as e:
         logger.error(f"[CITY API] Wikipedia fallback error for {query}: {e}")
 
-    return f"No detailed Wikipedia data available for {query}."
+    return f"{NO_SUMMARY} {query}."
 
 
 
 
-def _fetch_tourist_highlights(city: str) -> str:
+@ttl_cache(ttl=WIKI_TTL, disk="wikipedia", cacheable=lambda text: bool(text) and not _generic(text))
+async def _fetch_tourist_highlights(city: str) -> str:
     """
     Return a detailed tourist guide section by combining Wikipedia summaries
     for tourism and attractions pages.
@@ -79,9 +105,14 @@ def _fetch_tourist_highlights(city: str) -> str:
     ]
 
     snippets = []
-    for q in queries:
-        url = f"https://en.wikipedia.org/api/rest_v1/page/summary/{q}"
-        resp = requests.get(url, headers=headers, timeout=10)
+    responses = await asyncio.gather(
+        *(http.get(f"https://en.wikipedia.org/api/rest_v1/page/summary/{q}", headers=headers) for q in queries),
+        return_exceptions=True,
+    )
+    for q, resp in zip(queries, responses):
+        if isinstance(resp, Exception):
+            logger.warning(f"[CITY API] Wikipedia error for {q}: {resp}")
+            continue
         if resp.status_code == 200 and "application/json" in resp.headers.get("Content-Type", ""):
             data = resp.json()
             text = data.get("extract", "")
@@ -91,20 +122,61 @@ def _fetch_tourist_highlights(city: str) -> str:
     if snippets:
         return " ".join(snippets)
 
+    return _generic_highlights(city)
+
+
+def _generic_highlights(city: str) -> str:
     return (
-        f"Visitors to {city} can enjoy its cultural attractions, museums, parks, "
+        f"Visitors to {city} {GENERIC_HIGHLIGHTS}, museums, parks, "
         f"shopping districts, and local food experiences."
     )
 
 
+def _forget_late(task: asyncio.Task):
+    _late_lookups.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"[CITY API] Late lookup failed: {task.exception()}")
 
 
-def get_city_and_venue_info(city_name: str, venue_name: str | None = None) -> dict:
+async def _gather_until(deadline: float, **lookups) -> tuple[dict, list]:
+    """
+    Run the lookups concurrently for up to `deadline` seconds. Returns the
+    results of those done ({name: result}) and the names of the late ones,
+    which are left running so their results still reach the caches.
+    """
+    tasks = {name: asyncio.ensure_future(coro) for name, coro in lookups.items()}
+    await asyncio.wait(tasks.values(), timeout=deadline)
+    done, late = {}, []
+    for name, task in tasks.items():
+        if not task.done():
+            late.append(name)
+            _late_lookups.add(task)
+            task.add_done_callback(_forget_late)
+        elif task.exception() is not None:
+            logger.error(f"[CITY API] {name} lookup failed: {task.exception()}")
+        else:
+            done[name] = task.result()
+    return done, late
+
+
+
+
+async def aget_city_and_venue_info(city_name: str, venue_name: str | None = None) -> dict:
     logger.info(f"[CITY API] Fetch started for city={city_name}, venue={venue_name}")
 
-    city_summary = _fetch_wikipedia_summary(city_name)
-    venue_summary = _fetch_wikipedia_summary(venue_name) if venue_name else None
-    tourist_info = _fetch_tourist_highlights(city_name)
+    lookups = {
+        "city_summary": _fetch_wikipedia_summary(city_name),
+        "tourist_info": _fetch_tourist_highlights(city_name),
+    }
+    if venue_name:
+        lookups["venue_summary"] = _fetch_wikipedia_summary(venue_name)
+    done, late = await _gather_until(LOOKUP_DEADLINE, **lookups)
+    if late:
+        logger.warning(f"[CITY API] {', '.join(late)} for {city_name} missed the {LOOKUP_DEADLINE}s deadline")
+
+    city_summary = done.get("city_summary") or f"{NO_SUMMARY} {city_name}."
+    venue_summary = done.get("venue_summary")
+    tourist_info = done.get("tourist_info") or _generic_highlights(city_name)
 
     # ✨ Conversational assistant tone
     combined_summary = (
@@ -124,13 +196,16 @@ def get_city_and_venue_info(city_name: str, venue_name: str | None = None) -> di
         "venue_summary": venue_summary,
         "tourist_info": tourist_info,
         "combined_summary": combined_summary,
+        "timed_out": late,      # lookups left out (past the deadline): a partial guide
     }
 
 
-#@ttl_cache
-def get_city_info(city_name: str) -> dict:
+@ttl_cache(ttl=WIKI_TTL,
+           cacheable=lambda r: bool(r.get("city")) and not r["summary"].startswith("⚠️")
+                               and not r.get("timed_out") and not is_fallback_guide(r))
+async def aget_city_info(city_name: str) -> dict:
     """
-    Wrapper around get_city_and_venue_info() for simpler calls.
+    Wrapper around aget_city_and_venue_info() for simpler calls.
     Used for city-only queries (like user follow-ups or landmarks).
     """
 
@@ -146,7 +221,7 @@ def get_city_info(city_name: str) -> dict:
 
     try:
         # Reuse main Wikipedia fetch logic
-        result = get_city_and_venue_info(city_name, venue_name=None)
+        result = await aget_city_and_venue_info(city_name, venue_name=None)
 
         # Gracefully extract minimal structure
         return {
@@ -154,6 +229,7 @@ def get_city_info(city_name: str) -> dict:
             "summary": result.get("city_summary", "No details found."),
             "tourist_info": result.get("tourist_info", ""),
             "combined_summary": result.get("combined_summary", ""),
+            "timed_out": result.get("timed_out", []),
         }
 
     except Exception as e:
@@ -164,3 +240,14 @@ def get_city_info(city_name: str) -> dict:
             "tourist_info": "",
             "combined_summary": ""
         }
+
+
+# --------------------------------------------------------
+# Sync wrappers (graph nodes, domain LLMs)
+# --------------------------------------------------------
+def get_city_and_venue_info(city_name: str, venue_name: str | None = None) -> dict:
+    return http.run_sync(aget_city_and_venue_info(city_name, venue_name))
+
+
+def get_city_info(city_name: str) -> dict:
+    return http.run_sync(aget_city_info(city_name))
@@ -2,6 +2,8 @@ import logging
 import re
 from openai import AzureOpenAI
 from core.config import settings
+from utils.llm_cache import cached_completions
+from utils.near_dup_cache import near_duplicate_cache
 from core.logging_config import setup_logging
 
 setup_logging()
@@ -13,6 +15,31 @@ client = AzureOpenAI(
     azure_endpoint=settings.azure_openai_endpoint,
     api_version="2024-12-01-preview"
 )
+intent_completions = cached_completions(client, "intent")
+
+# Paraphrases of a query ("india next match" / "India's upcoming game?") share
+# one classification. "fusion_summary" is also the fallback when the LLM call
+# fails, so it is never cached.
+INTENT_CACHE_TTL = 24 * 3600
+
+# Words that decide the intent. Near-duplicate hits must have the same ones,
+# so "india vs australia match weather in mumbai" never answers for
+# "... match travel in mumbai" however similar the rest of the wording.
+INTENT_CUES = {
+    "live", "current", "now", "today", "playing", "score",
+    "next", "upcoming", "future", "fixtures", "schedule", "series",
+    "match", "team", "play", "player", "players", "venue",
+    "weather", "rain", "temp", "temperature", "forecast", "humid", "humidity", "hot",
+    "travel", "bus", "airport", "train", "distance", "reach", "transport", "metro", "taxi", "flight",
+    "city", "place", "about", "things", "restaurant", "restaurants", "attractions", "visit", "hotel",
+    "summary", "summarize", "report", "everything",
+    "hi", "hello", "hey", "thanks",
+}
+
+
+def _intent_cues(query: str) -> frozenset:
+    """The intent-bearing words of a query (near-duplicate cache guard)."""
+    return frozenset(w for w in re.findall(r"[a-z]+", query.lower()) if w in INTENT_CUES)
 
 SYSTEM_PROMPT = """
 You are a friendly sports conversation assistant that classifies user intent.
@@ -32,10 +59,12 @@ Output Rules:
 - Handle natural phrases like "hey", "what's up", or "tell me about tomorrow's match".
 """
 
+@near_duplicate_cache(ttl=INTENT_CACHE_TTL, guard=_intent_cues,
+                      cacheable=lambda intent: intent != "fusion_summary")
 def classify_intent_llm(query: str) -> str:
     """Classify user query into one of the defined intents, with natural fallback handling."""
     try:
-        response = client.chat.completions.create(
+        response = intent_completions.create(
             model="gpt-4.1-mini",
             messages=[
                 {"role": "system", "content": SYSTEM_PROMPT},
@@ -1,8 +1,11 @@
-import requests
 import logging
 import re
-from datetime import datetime
+import time
+from datetime import datetime, timezone
+from typing import NamedTuple
 from core.config import settings
+from utils.cache_utils import ttl_cache
+from utils.http_client import http
 
 # --------------------------------------------------------
 # Logging
@@ -24,6 +27,19 @@ HEADERS = {
 CURRENT_MATCHES_URL = "https://unofficial-cricbuzz.p.rapidapi.com/matches/get-schedules"
 SERIES_MATCHES_URL = "https://unofficial-cricbuzz.p.rapidapi.com/series/get-matches"
 
+# Feed TTLs follow match state (see _match_ttl). Past their TTL, feeds are
+# served stale (refreshed in the background) until the hard expiry; every
+# payload carries the time it was fetched as "as_of".
+SCHEDULES_MAX_STALE = settings.sports_schedules_max_stale_seconds
+SERIES_MAX_STALE = settings.sports_series_max_stale_seconds
+
+# matchDesc / status words of a match in progress
+LIVE_KEYS = ["live", "day", "session", "innings", "stumps"]
+
+# how long after its start a match may still be in play, by format
+MATCH_DURATION = {"TEST": 5 * 86400, "ODI": 9 * 3600, "T20": 4 * 3600}
+DEFAULT_MATCH_DURATION = 9 * 3600
+
 
 # --------------------------------------------------------
 # TEAM NORMALIZATION
@@ -57,53 +73,249 @@ def normalize_team(text: str):
     return None
 
 
-# ============================================================
-# 1️⃣ CURRENT MATCHES (LIVE / ONGOING)
-# ============================================================
-def get_current_match(team_input: str):
-    logger.info(f"[CRICBUZZ] Checking CURRENT match for: {team_input}")
+# --------------------------------------------------------
+# RAW FETCHES
+# --------------------------------------------------------
+def _as_of() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
 
-    team = normalize_team(team_input)
-    if not team:
-        return {"error": f"Team not recognized: {team_input}"}
 
-    params = {"matchType": "international"}
+async def _fetch_schedules() -> dict:
+    """International schedule feed (used for live matches and series detection)."""
+    res = await http.get(CURRENT_MATCHES_URL, headers=HEADERS, params={"matchType": "international"})
+    if res.status_code != 200:
+        return {"error": f"Cricbuzz API error {res.status_code}"}
+    data = res.json()
+    data["as_of"] = _as_of()
+    return data
 
-    try:
-        res = requests.get(CURRENT_MATCHES_URL, headers=HEADERS, params=params, timeout=10)
-        data = res.json()
 
-        LIVE_KEYS = ["live", "day", "session", "innings", "stumps"]
+async def _fetch_series_matches(series_id) -> dict:
+    res = await http.get(SERIES_MATCHES_URL, headers=HEADERS, params={"seriesId": series_id}, timeout=15)
+    if res.status_code != 200:
+        return {"error": f"Cricbuzz API error {res.status_code}"}
+    data = res.json()
+    data["as_of"] = _as_of()
+    return data
 
-        for day in data.get("scheduleAdWrapper", []):
-            block = day.get("matchScheduleMap", {})
-            matches = block.get("matchScheduleList", [])
 
-            for bucket in matches:
-                for match in bucket.get("matchInfo", []):
+# --------------------------------------------------------
+# SNAPSHOTS (parsed once, indexed, cached and shared by every caller)
+# --------------------------------------------------------
+class MatchRecord(NamedTuple):
+    series_id: int | None
+    series_name: str | None
+    team1: str
+    team2: str
+    desc: str | None
+    format: str | None
+    start_ms: int
+    ground: str | None
+    city: str | None
+    country: str | None
+    status: str | None
+
+
+def _record(info: dict, series_id=None, series_name=None) -> MatchRecord | None:
+    try:
+        venue = info.get("venueInfo", {})
+        return MatchRecord(
+            series_id=series_id if series_id is not None else info.get("seriesId"),
+            series_name=series_name or info.get("seriesName"),
+            team1=info["team1"]["teamName"],
+            team2=info["team2"]["teamName"],
+            desc=info.get("matchDesc"),
+            format=info.get("matchFormat"),
+            start_ms=int(info["startDate"]),
+            ground=venue.get("ground"),
+            city=venue.get("city"),
+            country=venue.get("country"),
+            status=info.get("status"),
+        )
+    except (KeyError, TypeError, ValueError):
+        logger.warning(f"[CRICBUZZ] Skipping malformed match entry: {str(info)[:120]}")
+        return None
+
+
+def _match_date(m: MatchRecord) -> datetime:
+    return datetime.fromtimestamp(m.start_ms / 1000)
+
+
+def _team_keys(team_name: str) -> set:
+    """Index keys of a team: its full name and its TEAM_MAP name ("India Women" → "india")."""
+    keys = {team_name.lower()}
+    canonical = normalize_team(team_name)
+    if canonical:
+        keys.add(canonical)
+    return keys
 
-                    t1 = match["team1"]["teamName"].lower()
-                    t2 = match["team2"]["teamName"].lower()
-                    if team not in t1 and team not in t2:
-                        continue
 
-                    desc = match.get("matchDesc", "").lower()
-                    if any(k in desc for k in LIVE_KEYS):
-                        ts = int(match["startDate"]) / 1000
-                        venue = match.get("venueInfo", {})
+# --------------------------------------------------------
+# TTL POLICY (match state and time to start)
+# --------------------------------------------------------
+def _in_play(m: MatchRecord, now: float) -> bool:
+    text = f"{m.desc or ''} {m.status or ''}".lower()
+    if any(k in text for k in LIVE_KEYS):
+        return True
+    started = now - m.start_ms / 1000
+    return 0 <= started < MATCH_DURATION.get((m.format or "").upper(), DEFAULT_MATCH_DURATION)
+
+
+def _match_ttl(m: MatchRecord, now: float) -> float | None:
+    """
+    Seconds data about a match stays fresh: short while it is in play, a
+    share of the time to start before it (clamped, and ending by the start),
+    None once it is over.
+    """
+    if _in_play(m, now):
+        return settings.sports_ttl_live_seconds
+    lead = m.start_ms / 1000 - now
+    if lead <= 0:
+        return None
+    ttl = min(max(lead * settings.sports_ttl_lead_fraction, settings.sports_ttl_min_seconds),
+              settings.sports_ttl_max_seconds)
+    # never serve pre-match data past the start
+    return min(ttl, max(lead, settings.sports_ttl_live_seconds))
+
+
+def _snapshot_ttl(snapshot: dict) -> float:
+    """The TTL of the most urgent match in a snapshot."""
+    now = time.time()
+    ttls = [t for t in (_match_ttl(m, now) for m in snapshot["matches"]) if t is not None]
+    return min(ttls, default=settings.sports_ttl_max_seconds)
+
+
+def seconds_to_match_in(city: str) -> float | None:
+    """
+    Seconds until the next match in a city (0 while one is in play), None if
+    none is scheduled. Uses the cached schedule only, never fetches it.
+    """
+    hit, snapshot = _schedule_snapshot.cache.peek(())
+    if not hit or not city:
+        return None
+    now = time.time()
+    leads = []
+    for i in snapshot["by_city"].get(city.strip().lower(), []):
+        m = snapshot["matches"][i]
+        if _in_play(m, now):
+            return 0
+        if m.start_ms / 1000 > now:
+            leads.append(m.start_ms / 1000 - now)
+    return min(leads, default=None)
+
+
+@ttl_cache(ttl=_snapshot_ttl, max_stale=SCHEDULES_MAX_STALE)
+async def _schedule_snapshot() -> dict:
+    """
+    The schedule feed as MatchRecords (feed order) plus indexes of match
+    positions by team key, series id, date (YYYY-MM-DD) and lowercased
+    ground and city.
+    """
+    data = await _fetch_schedules()
+    if "error" in data:
+        return data
+
+    matches = []
+    for day in data.get("scheduleAdWrapper", []):
+        for bucket in day.get("matchScheduleMap", {}).get("matchScheduleList", []):
+            for info in bucket.get("matchInfo", []):
+                record = _record(info, bucket.get("seriesId"), bucket.get("seriesName"))
+                if record:
+                    matches.append(record)
+
+    by_team, by_series, by_date, by_venue, by_city = {}, {}, {}, {}, {}
+    for i, m in enumerate(matches):
+        for key in _team_keys(m.team1) | _team_keys(m.team2):
+            by_team.setdefault(key, []).append(i)
+        by_series.setdefault(m.series_id, []).append(i)
+        by_date.setdefault(_match_date(m).date().isoformat(), []).append(i)
+        if m.ground:
+            by_venue.setdefault(m.ground.lower(), []).append(i)
+        if m.city:
+            by_city.setdefault(m.city.lower(), []).append(i)
+
+    return {
+        "as_of": data.get("as_of"),
+        "matches": matches,
+        "by_team": by_team,
+        "by_series": by_series,
+        "by_date": by_date,
+        "by_venue": by_venue,
+        "by_city": by_city,
+    }
+
+
+@ttl_cache(ttl=_snapshot_ttl, max_stale=SERIES_MAX_STALE)
+async def _series_snapshot(series_id) -> dict:
+    """All matches of a series as MatchRecords."""
+    data = await _fetch_series_matches(series_id)
+    if "error" in data:
+        return data
+
+    matches = []
+    for block in data.get("adWrapper", []):
+        for match in block.get("matchDetails", {}).get("matches", []):
+            info = match.get("matchInfo")
+            record = _record(info, series_id) if info else None
+            if record:
+                matches.append(record)
+    return {"as_of": data.get("as_of"), "series_id": series_id, "matches": matches}
+
+
+async def afind_matches(team: str | None = None, series_id=None, date: str | None = None,
+                        venue: str | None = None) -> list[MatchRecord]:
+    """Matches in the current schedule snapshot matching every given filter (index lookups)."""
+    snapshot = await _schedule_snapshot()
+    if "error" in snapshot:
+        return []
+    positions = None
+    for index, key in (("by_team", team and (normalize_team(team) or team.lower())),
+                       ("by_series", series_id), ("by_date", date), ("by_venue", venue and venue.lower())):
+        if key is None:
+            continue
+        found = snapshot[index].get(key, [])
+        if positions is None:
+            positions = found
+        else:
+            found = set(found)
+            positions = [i for i in positions if i in found]
+    if positions is None:
+        return list(snapshot["matches"])
+    return [snapshot["matches"][i] for i in positions]
 
-                        return {
-                            "team1": match["team1"]["teamName"],
-                            "team2": match["team2"]["teamName"],
-                            "status": match.get("matchDesc"),
-                            "format": match.get("matchFormat"),
-                            "date": datetime.fromtimestamp(ts).isoformat(),
-                            "venue": venue.get("ground"),
-                            "city": venue.get("city"),
-                            "country": venue.get("country")
-                        }
 
-        return {"message": f"No current match right now for {team}."}
+# ============================================================
+# 1️⃣ CURRENT MATCHES (LIVE / ONGOING)
+# ============================================================
+async def aget_current_match(team_input: str):
+    logger.info(f"[CRICBUZZ] Checking CURRENT match for: {team_input}")
+
+    team = normalize_team(team_input)
+    if not team:
+        return {"error": f"Team not recognized: {team_input}"}
+
+    try:
+        snapshot = await _schedule_snapshot()
+        if "error" in snapshot:     # nothing cached (or past hard expiry) and Cricbuzz is failing
+            return snapshot
+
+        for i in snapshot["by_team"].get(team, []):
+            m = snapshot["matches"][i]
+            desc = (m.desc or "").lower()
+            if any(k in desc for k in LIVE_KEYS):
+                return {
+                    "team1": m.team1,
+                    "team2": m.team2,
+                    "status": m.desc,
+                    "format": m.format,
+                    "date": _match_date(m).isoformat(),
+                    "venue": m.ground,
+                    "city": m.city,
+                    "country": m.country,
+                    "as_of": snapshot["as_of"],
+                }
+
+        return {"message": f"No current match right now for {team}.", "as_of": snapshot["as_of"]}
 
     except Exception as e:
         logger.exception(e)
@@ -113,31 +325,19 @@ def get_current_match(team_input: str):
 # ============================================================
 # 2️⃣ DETECT SERIES FOR TEAM (using CURRENT MATCHES API)
 # ============================================================
-def detect_series_for_team(team: str):
+async def adetect_series_for_team(team: str):
     """Find the series name + seriesId for a team from schedule API"""
 
-    params = {"matchType": "international"}
-
     try:
-        res = requests.get(CURRENT_MATCHES_URL, headers=HEADERS, params=params, timeout=10)
-        data = res.json()
-
-        for day in data.get("scheduleAdWrapper", []):
-            block = day.get("matchScheduleMap", {})
-            matches = block.get("matchScheduleList", [])
-
-            for bucket in matches:
-                series_name = bucket.get("seriesName")
-                series_id = bucket.get("seriesId")
+        snapshot = await _schedule_snapshot()
+        if "error" in snapshot:
+            return None, None
 
-                for match in bucket.get("matchInfo", []):
-                    t1 = match["team1"]["teamName"].lower()
-                    t2 = match["team2"]["teamName"].lower()
-
-                    if team in t1 or team in t2:
-                        return series_name, series_id
-
-        return None, None
+        positions = snapshot["by_team"].get(team)
+        if not positions:
+            return None, None
+        first = snapshot["matches"][positions[0]]
+        return first.series_name, first.series_id
 
     except Exception as e:
         logger.exception(e)
@@ -147,7 +347,7 @@ def detect_series_for_team(team: str):
 # ============================================================
 # 3️⃣ SERIES SCHEDULE BASED ON TEAM NAME
 # ============================================================
-def get_series_schedule_by_team(team_input: str):
+async def aget_series_schedule_by_team(team_input: str):
     team = normalize_team(team_input)
     if not team:
         return {"error": f"Team not recognized: {team_input}"}
@@ -155,52 +355,62 @@ def get_series_schedule_by_team(team_input: str):
     logger.info(f"[CRICBUZZ] Getting SERIES for team: {team}")
 
     # STEP 1: Find series linked to the team
-    series_name, series_id = detect_series_for_team(team)
+    series_name, series_id = await adetect_series_for_team(team)
 
     if not series_id:
         return {"error": f"No active or upcoming series found for {team}"}
 
     # STEP 2: Fetch full series schedule
     try:
-        params = {"seriesId": series_id}
-        res = requests.get(SERIES_MATCHES_URL, headers=HEADERS, params=params, timeout=15)
-        data = res.json()
-
-        matches = []
-
-        for block in data.get("adWrapper", []):
-            matchDetails = block.get("matchDetails", {})
-            for match in matchDetails.get("matches", []):
-                match_info = match.get("matchInfo")
-                if not match_info:
-                    continue
-
-                ts = int(match_info["startDate"]) / 1000
-                dt = datetime.fromtimestamp(ts)
-
-                venue = match_info.get("venueInfo", {})
-
-                matches.append({
-                    "team1": match_info["team1"]["teamName"],
-                    "team2": match_info["team2"]["teamName"],
-                    "match_desc": match_info.get("matchDesc"),
-                    "format": match_info.get("matchFormat"),
-                    "date": dt.isoformat(),
-                    "venue": venue.get("ground"),
-                    "city": venue.get("city"),
-                    "country": venue.get("country"),
-                    "status": match_info.get("status")
-                })
+        snapshot = await _series_snapshot(series_id)
+        if "error" in snapshot:
+            return snapshot
+
+        matches = [
+            {
+                "team1": m.team1,
+                "team2": m.team2,
+                "match_desc": m.desc,
+                "format": m.format,
+                "date": _match_date(m).isoformat(),
+                "venue": m.ground,
+                "city": m.city,
+                "country": m.country,
+                "status": m.status,
+            }
+            for m in snapshot["matches"]
+        ]
 
         return {
             "team": team,
             "series": series_name,
             "seriesId": series_id,
-            "matches": matches
+            "matches": matches,
+            "as_of": snapshot["as_of"],
         }
 
     except Exception as e:
         logger.exception(e)
         return {"error": str(e)}
     
-    
\ No newline at end of file
+    
+
+
+# ============================================================
+# SYNC WRAPPERS (graph nodes, domain LLMs)
+# ============================================================
+def find_matches(team: str | None = None, series_id=None, date: str | None = None,
+                 venue: str | None = None) -> list[MatchRecord]:
+    return http.run_sync(afind_matches(team, series_id, date, venue))
+
+
+def get_current_match(team_input: str):
+    return http.run_sync(aget_current_match(team_input))
+
+
+def detect_series_for_team(team: str):
+    return http.run_sync(adetect_series_for_team(team))
+
+
+def get_series_schedule_by_team(team_input: str):
+    return http.run_sync(aget_series_schedule_by_team(team_input))
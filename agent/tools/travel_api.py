@@ -1,13 +1,34 @@
-import requests
+import asyncio
 import logging
 from geopy.distance import geodesic
 from core.config import settings
 from utils.formatters import clean_api_response
+from utils.cache_utils import ttl_cache
+from utils.http_client import http
+from utils import geohash
+from agent.tools.venue_gazetteer import venue_gazetteer
 
 logger = logging.getLogger("TRAVEL_API")
 
 
-def _geocode(query: str):
+# Coordinates and addresses of places practically never change
+GEO_TTL = 24 * 3600
+POI_TTL = 6 * 3600
+POI_RADIUS_M = 15000
+
+# Transport hubs are cached per geohash cell and category: one search from the
+# cell center, widened by the cell's half-diagonal, covers a POI_RADIUS_M
+# circle around any point of the cell, so venues in the same area share it.
+POI_CELL_PRECISION = settings.poi_geohash_precision
+POI_CELL_FETCH_LIMIT = settings.poi_cell_fetch_limit
+
+# Azure Maps calls in flight at once for one travel lookup (candidate
+# geocodes, then the transport hub categories)
+TRAVEL_CONCURRENCY = settings.travel_lookup_concurrency
+
+
+@ttl_cache(ttl=GEO_TTL, disk="geocode")
+async def _geocode(query: str):
     """Geocode any text globally using Azure Maps."""
     url = "https://atlas.microsoft.com/search/address/json"
     params = {
@@ -16,7 +37,7 @@ def _geocode(query: str):
         "query": query
     }
 
-    resp = requests.get(url, params=params, timeout=10)
+    resp = await http.get(url, params=params)
 
     if resp.status_code != 200:
         return None
@@ -33,7 +54,8 @@ def _geocode(query: str):
     return lat, lon, results[0]
 
 
-def _reverse_geocode(lat, lon):
+@ttl_cache(ttl=GEO_TTL, disk="geocode")
+async def _reverse_geocode(lat, lon):
     """Reverse lookup country & city for validation."""
     url = "https://atlas.microsoft.com/search/address/reverse/json"
     params = {
@@ -42,7 +64,7 @@ def _reverse_geocode(lat, lon):
         "query": f"{lat},{lon}"
     }
 
-    resp = requests.get(url, params=params, timeout=10)
+    resp = await http.get(url, params=params)
     if resp.status_code != 200:
         return None
 
@@ -58,6 +80,82 @@ def _reverse_geocode(lat, lon):
     }
 
 
+@ttl_cache(ttl=POI_TTL, cacheable=lambda items: items is not None)
+async def _search_poi(category: str, lat, lon, radius: int = 15000, limit: int = 5):
+    """Nearby POIs of one category (raw Azure Maps results), None on failure."""
+    params = {
+        "api-version": "1.0",
+        "subscription-key": settings.azure_maps_key,
+        "query": category,
+        "lat": lat,
+        "lon": lon,
+        "radius": radius,
+        "limit": limit,
+    }
+    resp = await http.get("https://atlas.microsoft.com/search/poi/category/json", params=params)
+    if resp.status_code != 200:
+        return None
+    return resp.json().get("results", [])
+
+
+@ttl_cache(ttl=POI_TTL, cacheable=lambda entry: entry is not None)
+async def _search_poi_cell(category: str, cell: str):
+    """POIs of one category around a geohash cell, with the radius they are complete for; None on failure."""
+    lat_lo, lat_hi, lon_lo, lon_hi = geohash.bounds(cell)
+    center = ((lat_lo + lat_hi) / 2, (lon_lo + lon_hi) / 2)
+    fetch_radius = POI_RADIUS_M + geodesic(center, (lat_hi, lon_hi)).m
+
+    items = await _search_poi.uncached(category, center[0], center[1], radius=int(fetch_radius), limit=POI_CELL_FETCH_LIMIT)
+    if items is None:
+        return None
+
+    covered = fetch_radius
+    if len(items) >= POI_CELL_FETCH_LIMIT:
+        # truncated: only trust the distance the results actually reach
+        covered = max((geodesic(center, (i["position"]["lat"], i["position"]["lon"])).m
+                       for i in items if i.get("position")), default=0)
+    return {"center": center, "covered_m": covered, "items": items}
+
+
+def _covers(entry: dict, lat, lon, radius: float) -> bool:
+    return geodesic(entry["center"], (lat, lon)).m + radius <= entry["covered_m"]
+
+
+async def _nearby_poi(category: str, lat, lon, radius: float = POI_RADIUS_M, limit: int = 5):
+    """
+    Nearby POIs of one category, nearest first (raw Azure Maps results), None on failure.
+
+    Served from any cached cell (this one or a neighbour) whose search covers
+    the circle; distances are recomputed from (lat, lon) locally.
+    """
+    cell = geohash.encode(lat, lon, POI_CELL_PRECISION)
+    entry = None
+    for candidate in [cell, *geohash.neighbors(cell)]:
+        hit, cached = _search_poi_cell.cache.peek((category, candidate))
+        if hit and _covers(cached, lat, lon, radius):
+            entry = cached
+            break
+
+    if entry is None:
+        entry = await _search_poi_cell(category, cell)
+        if entry is None:
+            return None
+        if not _covers(entry, lat, lon, radius):
+            # dense area, the cell search was truncated short of this circle
+            return await _search_poi(category, lat, lon, radius=int(radius), limit=limit)
+
+    nearby = []
+    for item in entry["items"]:
+        pos = item.get("position") or {}
+        if pos.get("lat") is None or pos.get("lon") is None:
+            continue
+        dist = geodesic((lat, lon), (pos["lat"], pos["lon"])).m
+        if dist <= radius:
+            nearby.append((dist, item))
+    nearby.sort(key=lambda pair: pair[0])
+    return [item for _, item in nearby[:limit]]
+
+
 def _is_far(lat, lon, city_lat=None, city_lon=None):
     """Check if venue coords are too far from city coords (over 200 km)."""
     if not city_lat or not city_lon:
@@ -69,7 +167,43 @@ def _is_far(lat, lon, city_lat=None, city_lon=None):
         return False
 
 
-def get_travel_info(city: str, venue: str = None) -> dict:
+async def _resolve(query: str, limit: asyncio.Semaphore):
+    """Geocode one candidate query and reverse-geocode the hit (for validation); None if not found."""
+    async with limit:
+        geo = await _geocode(query)
+    if not geo:
+        return None
+    lat, lon, meta = geo
+    async with limit:
+        rev = await _reverse_geocode(lat, lon)
+    return {"query": query, "lat": lat, "lon": lon, "meta": meta, "rev": rev}
+
+
+def _pick_candidate(candidates: list, city: str, venue: str | None, city_lat=None, city_lon=None):
+    """
+    Best valid candidate: with a venue, those reverse-geocoding outside the
+    expected city or over 200 km from it are rejected; venue queries beat
+    the city itself, then the higher Azure Maps match score, then query
+    order. None if every candidate is rejected.
+    """
+    ranked = []
+    for order, c in enumerate(candidates):
+        if venue:
+            detected_city = ((c["rev"] or {}).get("city") or "").lower()
+            if c["rev"] and city.lower() not in detected_city:
+                # Venue but city mismatch → consider suspicious
+                logger.warning(f"[TRAVEL] '{c['query']}' resolves far from expected city → skipping")
+                continue
+            if _is_far(c["lat"], c["lon"], city_lat, city_lon):
+                logger.warning(f"[TRAVEL] '{c['query']}' is too far from city → skipping")
+                continue
+        is_city = c["query"].lower() == city.lower()
+        ranked.append(((is_city, -(c["meta"].get("score") or 0), order), c))
+    return min(ranked, key=lambda pair: pair[0])[1] if ranked else None
+
+
+@ttl_cache(ttl=POI_TTL)
+async def aget_travel_info(city: str, venue: str = None) -> dict:
     """GLOBAL SAFE travel lookup with fallback chain."""
     try:
         # ---------------------------------------------------------
@@ -87,34 +221,51 @@ def get_travel_info(city: str, venue: str = None) -> dict:
         venue_lat = venue_lon = None
         city_lat = city_lon = None
 
-        for q in queries:
-            geo = _geocode(q)
-            if not geo:
-                continue
-
-            lat, lon, meta = geo
-
-            # Assign city coords when matching city-only lookup
+        # Known grounds and cities resolve locally, without any geocoding
+        place = venue_gazetteer.find_venue(venue, city) if venue else None
+        known_city = None if place else venue_gazetteer.find_city(city)
+        if place:
+            venue_lat, venue_lon = place["lat"], place["lon"]
+            logger.info(f"[TRAVEL] Gazetteer coordinates for '{place['name']}' → {venue_lat}, {venue_lon}")
+            queries = []
+        elif known_city:
+            # the city itself (last fallback) needs no lookup
+            queries = [q for q in queries if q.lower() != city.lower()]
+
+        # Every candidate is resolved at once; the best valid one wins
+        limit = asyncio.Semaphore(TRAVEL_CONCURRENCY)
+        resolved = await asyncio.gather(*(_resolve(q, limit) for q in queries), return_exceptions=True)
+        errors = [r for r in resolved if isinstance(r, Exception)]
+        if errors and len(errors) == len(resolved):
+            raise errors[0]
+        candidates = []
+        for q, r in zip(queries, resolved):
+            if isinstance(r, Exception):
+                logger.warning(f"[TRAVEL] Geocoding '{q}' failed: {r}")
+            elif r:
+                candidates.append(r)
+
+        city_candidate = next((c for c in candidates if c["query"].lower() == city.lower()), None)
+        if city_candidate:
+            city_lat, city_lon = city_candidate["lat"], city_candidate["lon"]
+        elif known_city:
+            city_lat, city_lon = known_city["lat"], known_city["lon"]
+
+        best = _pick_candidate(candidates, city, venue, city_lat, city_lon)
+        if best:
+            q, venue_lat, venue_lon, rev = best["query"], best["lat"], best["lon"], best["rev"]
+            logger.info(f"[TRAVEL] VALID coordinates for '{q}' → {venue_lat}, {venue_lon}")
+
+            country = (rev or {}).get("country") or best["meta"].get("address", {}).get("country")
+            # learning rewrites the overlay file: off the event loop
             if q.lower() == city.lower():
-                city_lat, city_lon = lat, lon
-
-            # Reverse-geocode validation
-            rev = _reverse_geocode(lat, lon)
-            if rev:
-                detected_city = (rev.get("city") or "").lower()
-                if city.lower() not in detected_city and venue:
-                    # Venue but city mismatch → consider suspicious
-                    logger.warning(f"[TRAVEL] '{q}' resolves far from expected city → skipping")
-                    continue
-
-            # If too far from city center (>200 km), reject unless it is city lookup
-            if venue and _is_far(lat, lon, city_lat, city_lon):
-                logger.warning(f"[TRAVEL] '{q}' is too far from city → skipping")
-                continue
+                await asyncio.to_thread(venue_gazetteer.learn_city, city, country, venue_lat, venue_lon)
+            elif rev:   # only venues validated against the expected city
+                await asyncio.to_thread(venue_gazetteer.learn_venue, venue, city, country, venue_lat, venue_lon)
 
-            venue_lat, venue_lon = lat, lon
-            logger.info(f"[TRAVEL] VALID coordinates for '{q}' → {lat}, {lon}")
-            break
+        if not venue_lat and known_city:
+            venue_lat, venue_lon = known_city["lat"], known_city["lon"]
+            logger.info(f"[TRAVEL] Gazetteer coordinates for city '{known_city['name']}' → {venue_lat}, {venue_lon}")
 
         if not venue_lat:
             return {"error": f"Could not find valid coordinates for '{venue or city}'"}
@@ -126,26 +277,18 @@ def get_travel_info(city: str, venue: str = None) -> dict:
         results = []
         seen = set()
 
-        base_url = "https://atlas.microsoft.com/search/poi/category/json"
-
-        for cat in categories:
-            logger.info(f"[TRAVEL] Fetching nearby {cat}")
+        async def hubs(cat):
+            async with limit:
+                return await _nearby_poi(cat, venue_lat, venue_lon)
 
-            params = {
-                "api-version": "1.0",
-                "subscription-key": settings.azure_maps_key,
-                "query": cat,
-                "lat": venue_lat,
-                "lon": venue_lon,
-                "radius": 15000,
-                "limit": 5,
-            }
+        logger.info(f"[TRAVEL] Fetching nearby {', '.join(categories)}")
+        found = await asyncio.gather(*(hubs(cat) for cat in categories))
 
-            resp = requests.get(base_url, params=params, timeout=10)
-            if resp.status_code != 200:
+        for cat, items in zip(categories, found):
+            if items is None:
                 continue
 
-            for item in resp.json().get("results", []):
+            for item in items:
                 name = item.get("poi", {}).get("name")
                 if not name or name in seen:
                     continue
@@ -174,4 +317,9 @@ def get_travel_info(city: str, venue: str = None) -> dict:
 
     except Exception as e:
         logger.exception(f"[TRAVEL] ERROR: {e}")
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
+
+
+def get_travel_info(city: str, venue: str = None) -> dict:
+    """Sync wrapper of aget_travel_info() for existing callers."""
+    return http.run_sync(aget_travel_info(city, venue))
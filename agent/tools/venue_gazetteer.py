@@ -0,0 +1,191 @@
+# agent/tools/venue_gazetteer.py
+"""
+Local gazetteer of cricket grounds and their cities.
+
+The bundled agent/data/venues.json holds the international grounds that keep
+coming up (canonical name, aliases, city, country, coordinates) plus their
+cities. Venues and cities resolved by Azure Maps are learned into a small
+JSON overlay (`venue_gazetteer_learned_path`), so each is geocoded at most
+once per deployment. Both files share one format and can be edited by hand.
+"""
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+BUNDLED_PATH = Path(__file__).resolve().parent.parent / "data" / "venues.json"
+
+# dropped for the secondary "core" key: "Wankhede Stadium" ~ "Wankhede"
+GENERIC_WORDS = {"stadium", "cricket", "ground", "international", "complex", "association"}
+
+
+def _norm(text: str) -> str:
+    text = re.sub(r"['’`.]", "", (text or "").lower())
+    text = re.sub(r"[^a-z0-9]+", " ", text).strip()
+    return text[4:] if text.startswith("the ") else text
+
+
+def _core(normed: str) -> str:
+    return " ".join(w for w in normed.split() if w not in GENERIC_WORDS)
+
+
+class VenueGazetteer:
+    def __init__(self, bundled_path: str | Path = BUNDLED_PATH, learned_path: str | Path | None = None,
+                 learn: bool = True):
+        self.bundled_path = Path(bundled_path)
+        self.learned_path = Path(learned_path) if learned_path else None
+        self.learn_enabled = learn and self.learned_path is not None
+
+        self._lock = threading.Lock()
+        self._venues: dict[str, list[dict]] = {}    # normalized name / alias / core → venues
+        self._cities: dict[str, dict] = {}          # normalized name / alias → city
+        self._learned = {"version": 1, "venues": [], "cities": []}
+
+        self.venue_hits = 0
+        self.city_hits = 0
+        self.misses = 0
+        self.learned_venues = 0
+        self.learned_cities = 0
+
+        self._load()
+
+    # --------------------------------------------------------
+    # Loading / indexing
+    # --------------------------------------------------------
+    def _load(self):
+        bundled = json.loads(self.bundled_path.read_text(encoding="utf-8"))
+        if self.learned_path and self.learned_path.exists():
+            try:
+                self._learned = json.loads(self.learned_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                logger.error(f"[GAZETTEER] Ignoring unreadable {self.learned_path}: {e}")
+        for source in (bundled, self._learned):
+            for city in source.get("cities", []):
+                self._index_city(city)
+            for venue in source.get("venues", []):
+                self._index_venue(venue)
+        logger.info(f"[GAZETTEER] Loaded {len(bundled['venues'])} bundled venues, "
+                    f"{len(self._learned['venues'])} learned")
+
+    def _index_city(self, city: dict):
+        for name in [city["name"], *city.get("aliases", [])]:
+            self._cities[_norm(name)] = city
+
+    def _index_venue(self, venue: dict):
+        for name in [venue["name"], *venue.get("aliases", [])]:
+            normed = _norm(name)
+            for key in {normed, _core(normed)} - {""}:
+                bucket = self._venues.setdefault(key, [])
+                # a later entry for the same ground (learned correction) replaces the earlier one
+                bucket[:] = [v for v in bucket if not (v["name"] == venue["name"] and v["city"] == venue["city"])]
+                bucket.append(venue)
+
+    def _same_city(self, a: str, b: str) -> bool:
+        ca, cb = self._cities.get(_norm(a)), self._cities.get(_norm(b))
+        if ca is not None and cb is not None:
+            return ca is cb
+        return _norm(a) == _norm(b)
+
+    # --------------------------------------------------------
+    # Lookups
+    # --------------------------------------------------------
+    def find_venue(self, name: str, city: str | None = None) -> dict | None:
+        """Venue record for a ground name / alias; with `city`, only a ground in that city."""
+        normed = _norm(name)
+        keys = [normed, _core(normed)]
+        if city:
+            # "Wankhede Stadium, Mumbai" → "wankhede stadium"
+            city_norm = _norm(city)
+            if normed.endswith(" " + city_norm):
+                stripped = normed[: -len(city_norm) - 1]
+                keys += [stripped, _core(stripped)]
+        with self._lock:
+            for key in keys:
+                candidates = self._venues.get(key, [])
+                if city:
+                    candidates = [v for v in candidates if self._same_city(v["city"], city)]
+                if len(candidates) == 1:
+                    self.venue_hits += 1
+                    return candidates[0]
+            self.misses += 1
+            return None
+
+    def find_city(self, name: str) -> dict | None:
+        with self._lock:
+            city = self._cities.get(_norm(name))
+            if city is None:
+                self.misses += 1
+            else:
+                self.city_hits += 1
+            return city
+
+    # --------------------------------------------------------
+    # Learning
+    # --------------------------------------------------------
+    def learn_venue(self, name: str, city: str, country: str | None, lat: float, lon: float):
+        if not self.learn_enabled:
+            return
+        venue = {"name": name.strip(), "aliases": [], "city": city.strip(), "country": country,
+                 "lat": lat, "lon": lon, "source": "learned"}
+        with self._lock:
+            # concurrent misses for one ground all geocode it; only the first is recorded
+            if any(self._same_city(v["city"], city) for v in self._venues.get(_norm(name), [])):
+                return
+            self._index_venue(venue)
+            self._learned["venues"].append(venue)
+            self.learned_venues += 1
+            self._save()
+        logger.info(f"[GAZETTEER] Learned venue '{name}' ({city}) → {lat}, {lon}")
+
+    def learn_city(self, name: str, country: str | None, lat: float, lon: float):
+        if not self.learn_enabled:
+            return
+        city = {"name": name.strip(), "aliases": [], "country": country, "lat": lat, "lon": lon, "source": "learned"}
+        with self._lock:
+            if _norm(name) in self._cities:
+                return
+            self._index_city(city)
+            self._learned["cities"].append(city)
+            self.learned_cities += 1
+            self._save()
+        logger.info(f"[GAZETTEER] Learned city '{name}' → {lat}, {lon}")
+
+    def _save(self):
+        path = self.learned_path
+        tmp_path = None
+        try:
+            # per-writer temp file: workers sharing the path must not interleave one ".tmp"
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._learned, f, indent=1, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            if tmp_path is not None:
+                Path(tmp_path).unlink(missing_ok=True)
+            # still learned in memory for this process
+            logger.error(f"[GAZETTEER] Could not save learned places: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "venues": len({id(v) for bucket in self._venues.values() for v in bucket}),
+                "cities": len({id(c) for c in self._cities.values()}),
+                "venue_hits": self.venue_hits,
+                "city_hits": self.city_hits,
+                "misses": self.misses,
+                "learned_venues": self.learned_venues,
+                "learned_cities": self.learned_cities,
+            }
+
+
+venue_gazetteer = VenueGazetteer(
+    learned_path=settings.venue_gazetteer_learned_path,
+    learn=settings.venue_gazetteer_learn,
+)
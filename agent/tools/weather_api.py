@@ -1,15 +1,25 @@
-import requests
 import logging
 from core.config import settings
 from core.logging_config import setup_logging
 from utils.formatters import clean_api_response
-#from utils.cache_utils import ttl_cache
+from utils.cache_utils import ttl_cache
+from utils.http_client import http
+from agent.tools.sports_api import seconds_to_match_in
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
-#@ttl_cache
-def get_weather(city: str) -> dict:
+
+def _weather_ttl(weather: dict) -> float:
+    """Venue weather matters close to start time: refresh it often around a match in the city."""
+    lead = seconds_to_match_in(weather.get("city"))
+    if lead is not None and lead <= settings.weather_near_match_hours * 3600:
+        return settings.weather_ttl_near_match_seconds
+    return settings.weather_ttl_seconds
+
+
+@ttl_cache(ttl=_weather_ttl)
+async def aget_weather(city: str) -> dict:
     """
     Fetch current weather data for a given city using OpenWeatherMap API.
     """
@@ -23,7 +33,7 @@ def get_weather(city: str) -> dict:
             "units": "metric"
         }
 
-        response = requests.get(base_url, params=params, timeout=10)
+        response = await http.get(base_url, params=params)
         if response.status_code != 200:
             logger.error(f"[WEATHER API] API returned {response.status_code}: {response.text}")
             return {"error": f"OpenWeatherMap API error {response.status_code}"}
@@ -50,3 +60,8 @@ def get_weather(city: str) -> dict:
     except Exception as e:
         logger.error(f"[WEATHER API] Error fetching weather for {city}: {e}")
         return {"error": str(e)}
+
+
+def get_weather(city: str) -> dict:
+    """Sync wrapper of aget_weather() for existing callers."""
+    return http.run_sync(aget_weather(city))
@@ -0,0 +1,73 @@
+"""
+Benchmark: upstream schedule calls per day, fixed vs match-state-aware TTLs.
+
+    python -m benchmarks.bench_adaptive_ttl [--hours 24] [--every 5] [--fixed-ttl 30]
+
+Simulates a steady stream of requests (one every `--every` seconds) against
+the schedule snapshot cache for a few schedules, on a simulated clock, and
+counts the upstream fetches each TTL policy causes, plus the oldest data
+served while a match was in play.
+"""
+import argparse
+
+from agent.tools.sports_api import MatchRecord, _in_play, _match_ttl
+from core.config import settings
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+def _match(start_in: float, fmt: str = "T20", desc: str = "1st T20I") -> MatchRecord:
+    return MatchRecord(1, "Series", "India", "Australia", desc, fmt, int(start_in * 1000),
+                       "Wankhede Stadium", "Mumbai", "India", None)
+
+
+SCENARIOS = {
+    "fixture in 3 weeks": [_match(21 * DAY)],
+    "T20 starts in 6 h": [_match(6 * HOUR)],
+    "Test in play all day": [_match(-DAY, fmt="TEST", desc="2nd Test")],
+    "ODI in 2 days + T20 in 10 days": [_match(2 * DAY, fmt="ODI"), _match(10 * DAY)],
+}
+
+
+def _simulate(matches, policy, hours: float, every: float) -> tuple[int, float]:
+    calls, fetched_at, expires = 0, None, -1.0
+    worst_live_age = 0.0
+    now = 0.0
+    while now < hours * HOUR:
+        if now >= expires:
+            calls += 1
+            fetched_at = now
+            expires = now + policy(matches, now)
+        if any(_in_play(m, now) for m in matches):
+            worst_live_age = max(worst_live_age, now - fetched_at)
+        now += every
+    return calls, worst_live_age
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hours", type=float, default=24)
+    parser.add_argument("--every", type=float, default=5, help="seconds between requests")
+    parser.add_argument("--fixed-ttl", type=float, default=30, help="the previous fixed schedule TTL")
+    args = parser.parse_args()
+
+    def fixed(matches, now):
+        return args.fixed_ttl
+
+    def adaptive(matches, now):
+        ttls = [t for t in (_match_ttl(m, now) for m in matches) if t is not None]
+        return min(ttls, default=settings.sports_ttl_max_seconds)
+
+    print(f"{args.hours:g} h, one request every {args.every:g} s")
+    print(f"{'schedule':<32} | {'fixed calls':>11} | {'adaptive calls':>14} | {'max live age (fixed/adaptive)':>30}")
+    print("-" * 97)
+    for name, matches in SCENARIOS.items():
+        fixed_calls, fixed_age = _simulate(matches, fixed, args.hours, args.every)
+        adaptive_calls, adaptive_age = _simulate(matches, adaptive, args.hours, args.every)
+        ages = f"{fixed_age:.0f} s / {adaptive_age:.0f} s" if fixed_age or adaptive_age else "-"
+        print(f"{name:<32} | {fixed_calls:>11} | {adaptive_calls:>14} | {ages:>30}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: tail latency of unrelated requests while one session writes.
+
+    python -m benchmarks.bench_async_memory [--readers 50] [--seconds 3]
+
+Runs on the SQLite backend. "blocking" calls the sync SessionMemory straight
+from coroutines with no cache and write-through, which is what /chat used to
+do. "async" goes through AsyncSessionMemory, which adds a read-through cache
+and write-behind (the database is marked single-process: a shared one is
+always write-through). Reader latency includes the time the event loop was
+blocked by someone else, which is what spikes p99.
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from agent.state.async_memory import AsyncSessionMemory
+from agent.state.session_memory import SessionMemory
+from agent.state.sqlite_store import SQLiteStore
+
+BIG_VALUE = "x" * 200_000
+
+
+async def _reader(mem, blocking: bool, session_id: str, stop: float, samples: list):
+    while time.perf_counter() < stop:
+        t0 = time.perf_counter()
+        await asyncio.sleep(0.001)
+        if blocking:
+            mem._memory.get_all(session_id)
+        else:
+            await mem.aget_all(session_id)
+        samples.append((time.perf_counter() - t0 - 0.001) * 1000)
+
+
+async def _writer(mem, blocking: bool, stop: float):
+    i = 0
+    while time.perf_counter() < stop:
+        if blocking:
+            mem._memory.set_context("hot-session", "weather_raw", f"{i}{BIG_VALUE}")
+        else:
+            await mem.aset("hot-session", "weather_raw", f"{i}{BIG_VALUE}")
+        i += 1
+        await asyncio.sleep(0.005)
+
+
+async def run(mode: str, readers: int, seconds: float) -> list[float]:
+    blocking = mode == "blocking"
+    with tempfile.TemporaryDirectory() as tmp:
+        # one process: the cache and write buffer are allowed (off for a shared store)
+        store = SQLiteStore(Path(tmp) / "memory_store.db", shared=blocking)
+        if blocking:
+            sync_memory = SessionMemory(store, cache_max_sessions=0, write_behind_ms=0)
+        else:
+            sync_memory = SessionMemory(store, cache_ttl_seconds=1.0)
+        for r in range(readers):
+            sync_memory.update(f"reader-{r}", {"team": "india", "city": "Mumbai"})
+        sync_memory.flush()
+
+        mem = AsyncSessionMemory(sync_memory)
+        samples: list[float] = []
+        stop = time.perf_counter() + seconds
+        await asyncio.gather(
+            _writer(mem, blocking, stop),
+            *[_reader(mem, blocking, f"reader-{r}", stop, samples) for r in range(readers)],
+        )
+        sync_memory.close()
+    return sorted(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--readers", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    print(f"{'mode':>9} | {'requests':>8} | {'p50 (ms)':>8} | {'p99 (ms)':>8} | {'max (ms)':>8}")
+    print("-" * 54)
+    for mode in ("blocking", "async"):
+        s = asyncio.run(run(mode, args.readers, args.seconds))
+        print(
+            f"{mode:>9} | {len(s):>8} | {s[len(s) // 2]:>8.2f} | "
+            f"{s[int(len(s) * 0.99)]:>8.2f} | {s[-1]:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark: many concurrent tool lookups on one worker, native async vs thread offload.
+
+    python -m benchmarks.bench_async_tools [--requests 300] [--http-ms 200]
+
+Each lookup is a weather fetch for a distinct city (no cache hits) against
+OpenWeatherMap replaced by a canned response after a fixed delay. "async"
+awaits aget_weather() on the event loop; "to_thread" is how the fusion path
+called tools before: the sync get_weather() in asyncio.to_thread, so at most
+one lookup per default-executor thread is in flight.
+"""
+import argparse
+import asyncio
+import threading
+import time
+
+import httpx
+
+from agent.tools.weather_api import aget_weather, get_weather
+from utils.http_client import http
+
+
+def _fake_http(http_ms: float):
+    async def send(client, request, **kwargs):
+        await asyncio.sleep(http_ms / 1000)
+        return httpx.Response(200, request=request, json={
+            "main": {"temp": 31, "feels_like": 35, "humidity": 70},
+            "weather": [{"description": "haze"}], "wind": {"speed": 3},
+        })
+
+    return send
+
+
+async def _run(mode: str, n: int) -> tuple[float, int]:
+    start = time.perf_counter()
+    if mode == "async":
+        await asyncio.gather(*(aget_weather(f"async-{i}") for i in range(n)))
+    else:
+        await asyncio.gather(*(asyncio.to_thread(get_weather, f"thread-{i}") for i in range(n)))
+    return time.perf_counter() - start, threading.active_count()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--http-ms", type=float, default=200)
+    args = parser.parse_args()
+
+    httpx.AsyncClient.send = _fake_http(args.http_ms)
+
+    print(f"{args.requests} concurrent lookups, upstream delay {args.http_ms:g} ms")
+    print(f"{'mode':>9} | {'wall (s)':>8} | {'threads':>7}")
+    print("-" * 31)
+    for mode in ("async", "to_thread"):
+        wall, threads = asyncio.run(_run(mode, args.requests))
+        print(f"{mode:>9} | {wall:>8.2f} | {threads:>7}")
+    http.close()
+
+
+if __name__ == "__main__":
+    main()
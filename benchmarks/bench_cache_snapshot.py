@@ -0,0 +1,175 @@
+"""
+Benchmark: first-request latency after a restart, with and without a cache snapshot.
+
+    python -m benchmarks.bench_cache_snapshot [--http-ms 200] [--llm-ms 600]
+
+Runs the real graph in fresh interpreters with the upstreams (Cricbuzz,
+OpenWeatherMap, Azure Maps, Wikipedia, Azure OpenAI) replaced by canned
+responses after a fixed delay. One process warms the caches and saves a
+snapshot; two "restarted" processes then time the first request of each
+kind, one restoring the snapshot at startup and one starting cold.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+QUERIES = {
+    "current_match": "india live score",
+    "weather_info": "weather in Mumbai",
+    "city_info": "tell me about Chennai",
+    "travel_info": "travel options in Mumbai",
+}
+
+
+def _fake_http(http_ms: float):
+    now_ms = int(time.time() * 1000)
+    match = {"team1": {"teamName": "India"}, "team2": {"teamName": "Australia"}, "matchDesc": "Day 2",
+             "matchFormat": "TEST", "startDate": str(now_ms - 3600 * 1000),
+             "venueInfo": {"ground": "Wankhede Stadium", "city": "Mumbai", "country": "India"}}
+
+    def payload(url):
+        if "get-schedules" in url:
+            return {"scheduleAdWrapper": [{"matchScheduleMap": {"matchScheduleList": [
+                {"seriesName": "Border-Gavaskar Trophy", "seriesId": 7, "matchInfo": [match]}]}}]}
+        if "get-matches" in url:
+            return {"adWrapper": [{"matchDetails": {"matches": [{"matchInfo": match}]}}]}
+        if "openweathermap" in url:
+            return {"main": {"temp": 31, "feels_like": 35, "humidity": 70},
+                    "weather": [{"description": "haze"}], "wind": {"speed": 3}}
+        if "search/poi" in url:
+            return {"results": [{"poi": {"name": "Mumbai Central"}, "position": {"lat": 18.97, "lon": 72.82},
+                                 "address": {"freeformAddress": "Mumbai Central, Mumbai"}}]}
+        if "reverse" in url:
+            return {"addresses": [{"address": {"country": "India", "municipality": "Mumbai"}}]}
+        if "atlas.microsoft.com" in url:
+            return {"results": [{"position": {"lat": 19.07, "lon": 72.87}, "address": {"country": "India"}}]}
+        if "wikipedia" in url:
+            return {"extract": "A coastal city in south India. " * 20, "query": {"search": [{"title": "Chennai"}]}}
+        return None
+
+    async def send(client, request, **kwargs):
+        await asyncio.sleep(http_ms / 1000)
+        data = payload(str(request.url))
+        if data is None:
+            return httpx.Response(404, request=request)
+        return httpx.Response(200, json=data, request=request)
+
+    return send
+
+
+def _fake_llm(llm_ms: float):
+    """(sync, async) replacements for Completions.create / AsyncCompletions.create."""
+    from openai.types.chat import ChatCompletion
+
+    def answer(request):
+        messages = request.get("messages", [])
+        question = messages[-1]["content"].lower() if messages else ""
+        content = "Here is your answer."
+        if len(messages) == 2 and "intent" in messages[0]["content"].lower():
+            content = next((intent for intent, q in QUERIES.items() if q.lower() == question), "chitchat")
+        elif request.get("max_tokens") == 10:
+            content = "Chennai" if "chennai" in question else "Mumbai"
+        return ChatCompletion.model_validate({
+            "id": "bench", "object": "chat.completion", "created": 0, "model": request.get("model", "x"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 50, "total_tokens": 150},
+        })
+
+    def create(self, **request):
+        time.sleep(llm_ms / 1000)
+        return answer(request)
+
+    async def acreate(self, **request):
+        await asyncio.sleep(llm_ms / 1000)
+        return answer(request)
+
+    return create, acreate
+
+
+def _child(args):
+    from openai.resources.chat.completions import AsyncCompletions, Completions
+
+    httpx.AsyncClient.send = _fake_http(args.http_ms)
+    Completions.create, AsyncCompletions.create = _fake_llm(args.llm_ms)
+
+    from agent.graph.sports_agent_graph import build_graph
+    from utils.cache_snapshot import restore_caches, save_snapshot
+
+    restore_ms = None
+    if args.phase == "restored":
+        start = time.perf_counter()
+        restore_caches()
+        restore_ms = (time.perf_counter() - start) * 1000
+
+    graph = build_graph()
+
+    async def ask(session: str, text: str) -> float:
+        start = time.perf_counter()
+        await graph.ainvoke({"user_input": text, "session_id": session},
+                            config={"configurable": {"thread_id": session}})
+        return (time.perf_counter() - start) * 1000
+
+    async def run():
+        return {intent: await ask(f"{args.phase}-{intent}", text) for intent, text in QUERIES.items()}
+
+    timings = asyncio.run(run())
+    result = {"timings": timings, "restore_ms": restore_ms}
+    if args.phase == "warm":
+        result["snapshot"] = save_snapshot()
+    print(json.dumps(result))
+
+
+def _spawn(phase: str, args, workdir: str, snapshot: str) -> dict:
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(Path(__file__).resolve().parent.parent),
+        "OPENAI_API_KEY": "x", "AZURE_OPENAI_ENDPOINT": "https://bench.openai.azure.com",
+        "CACHE_SNAPSHOT_PATH": snapshot, "CACHE_SNAPSHOT_SEED_PATH": "", "CACHE_SNAPSHOT_SECRET": "bench",
+        "CACHE_DISK_PATH": "", "VENUE_GAZETTEER_LEARN": "false", "LOG_LEVEL": "WARNING",
+    }
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_cache_snapshot", "--phase", phase,
+         "--http-ms", str(args.http_ms), "--llm-ms", str(args.llm_ms)],
+        cwd=workdir, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--http-ms", type=float, default=200)
+    parser.add_argument("--llm-ms", type=float, default=600)
+    parser.add_argument("--phase", choices=["warm", "restored", "cold"])
+    args = parser.parse_args()
+
+    if args.phase:
+        _child(args)
+        return
+
+    with tempfile.TemporaryDirectory() as workdir:
+        snapshot = str(Path(workdir) / "cache_snapshot.pkl.gz")
+        warm = _spawn("warm", args, workdir, snapshot)
+        restored = _spawn("restored", args, workdir, snapshot)
+        cold = _spawn("cold", args, workdir, str(Path(workdir) / "missing.pkl.gz"))
+
+    saved = warm["snapshot"]
+    print(f"upstream delay: http {args.http_ms:g} ms, llm {args.llm_ms:g} ms")
+    print(f"snapshot: {saved['entries']} entries from {saved['caches']} caches, {saved['bytes']} bytes; "
+          f"restored in {restored['restore_ms']:.1f} ms")
+    print(f"{'first request':<16} | {'cold (ms)':>10} | {'restored (ms)':>13}")
+    print("-" * 46)
+    for intent in QUERIES:
+        print(f"{intent:<16} | {cold['timings'][intent]:>10.0f} | {restored['timings'][intent]:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
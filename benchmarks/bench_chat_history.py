@@ -0,0 +1,69 @@
+"""
+Benchmark: chat history footprint as distinct session ids keep arriving.
+
+    python -m benchmarks.bench_chat_history [--sessions 200000] [--turns 3]
+
+Compares the old `chat_memory` dict (last 5 turns as dicts, never evicted)
+with ChatHistoryStore under a small budget, measuring traced memory
+(tracemalloc) after every 20% of the sessions.
+"""
+import argparse
+import tracemalloc
+
+from agent.state.chat_history import ChatHistoryStore
+
+USER = "who won the last india vs australia match?"
+AGENT = "India won by 6 wickets at Wankhede; Kohli top-scored with 82*. " * 6
+
+
+def _dict_history(n_sessions: int, turns: int, checkpoints: set):
+    chat_memory, footprints = {}, []
+    for s in range(n_sessions):
+        history = chat_memory.get(f"s{s}", [])
+        for t in range(turns):
+            history.append({"user": f"{USER} {t}", "agent": AGENT})
+        chat_memory[f"s{s}"] = history[-5:]
+        if s + 1 in checkpoints:
+            footprints.append(tracemalloc.get_traced_memory()[0])
+    return chat_memory, footprints
+
+
+def _store_history(n_sessions: int, turns: int, checkpoints: set, max_bytes: int):
+    store, footprints = ChatHistoryStore(max_bytes=max_bytes, max_sessions=n_sessions), []
+    for s in range(n_sessions):
+        for t in range(turns):
+            store.append(f"s{s}", f"{USER} {t}", AGENT)
+        if s + 1 in checkpoints:
+            footprints.append(tracemalloc.get_traced_memory()[0])
+    return store, footprints
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=200_000)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--max-bytes", type=int, default=8_000_000)
+    args = parser.parse_args()
+    checkpoints = {args.sessions * i // 5 for i in range(1, 6)}
+
+    rows = []
+    for name, fn in [
+        ("dict (old)", lambda: _dict_history(args.sessions, args.turns, checkpoints)),
+        (f"ChatHistoryStore ({args.max_bytes / 1e6:g} MB)",
+         lambda: _store_history(args.sessions, args.turns, checkpoints, args.max_bytes)),
+    ]:
+        tracemalloc.start()
+        held, footprints = fn()
+        tracemalloc.stop()
+        rows.append((name, footprints, held))
+
+    print(f"traced MB after N distinct sessions ({args.turns} turns each)")
+    print(f"{'':<28} | " + " | ".join(f"{c:>9}" for c in sorted(checkpoints)))
+    print("-" * (31 + 12 * len(checkpoints)))
+    for name, footprints, _ in rows:
+        print(f"{name:<28} | " + " | ".join(f"{f / 1e6:>9.1f}" for f in footprints))
+    print(rows[1][2].stats())
+
+
+if __name__ == "__main__":
+    main()
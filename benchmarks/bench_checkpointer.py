@@ -0,0 +1,134 @@
+"""
+Benchmark: checkpointer memory footprint, 10k sessions x 20 turns.
+
+    python -m benchmarks.bench_checkpointer [--sessions 10000] [--turns 20] [--sqlite]
+                                            [--unbounded-turns 2]
+
+Drives a graph shaped like the sports agent (classifier → routed node, state
+= SportsState, ~1.5 KB replies) with thread_id = session_id, and reports
+the memory held by the checkpointer after every session has run all its
+turns: unbounded MemorySaver vs BoundedMemorySaver.
+
+Memory is the deep size of the checkpointer's own containers (checkpoints,
+blobs, writes and the bounded saver's indexes), measured after the run;
+tracing every allocation with tracemalloc would slow 200k turns ~5x.
+
+MemorySaver grows by the same amount every turn (and needs several GB for
+the full run), so by default it runs `--unbounded-turns` turns and its
+numbers are scaled linearly to `--turns`.
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import TypedDict
+
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, StateGraph
+
+from agent.state.checkpointer import BoundedMemorySaver
+
+REPLY = "Rohit Sharma scored 87 off 64 balls at Wankhede. " * 30      # ~1.5 KB, like an LLM summary
+
+
+class SportsState(TypedDict):
+    user_input: str
+    output: str
+    session_id: str
+    intent: str
+
+
+def _build(checkpointer):
+    graph = StateGraph(SportsState)
+    graph.add_node("IntentClassifier", lambda s: {"intent": "match_summary"})
+    graph.add_node("FusionNode", lambda s: {"output": f"{REPLY}{s['user_input']}"})
+    graph.set_entry_point("IntentClassifier")
+    graph.add_edge("IntentClassifier", "FusionNode")
+    graph.add_edge("FusionNode", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+def _deep_size(obj, seen: set) -> int:
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_size(k, seen) + _deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_deep_size(item, seen) for item in obj)
+    return size
+
+
+def footprint(checkpointer) -> int:
+    seen: set = set()
+    parts = [checkpointer.storage, checkpointer.writes, checkpointer.blobs]
+    for attr in ("_threads", "_thread_writes", "_thread_blobs", "_versions"):
+        if hasattr(checkpointer, attr):
+            parts.append(getattr(checkpointer, attr))
+    return sum(_deep_size(part, seen) for part in parts)
+
+
+def run(name: str, checkpointer, n_sessions: int, turns: int) -> dict:
+    graph = _build(checkpointer)
+    t0 = time.perf_counter()
+    for turn in range(turns):
+        for s in range(n_sessions):
+            session_id = f"session-{s}"
+            graph.invoke(
+                {"user_input": f"turn {turn}", "session_id": session_id},
+                config={"configurable": {"thread_id": session_id}},
+            )
+    elapsed = time.perf_counter() - t0
+    held = footprint(checkpointer)
+    checkpoints = sum(len(c) for ns in checkpointer.storage.values() for c in ns.values())
+    return {
+        "name": name,
+        "mb": held / 1e6,
+        "checkpoints": checkpoints,
+        "blobs": len(checkpointer.blobs),
+        "turns_per_s": n_sessions * turns / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=10_000)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--max-threads", type=int, default=5_000)
+    parser.add_argument("--sqlite", action="store_true", help="also run the SQLite-backed variant")
+    parser.add_argument("--unbounded-turns", type=int, default=2, help="turns to actually run MemorySaver for")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        variants = [
+            ("Bounded (4/thread, all threads)", lambda: BoundedMemorySaver(4, max_threads=args.sessions)),
+            (f"Bounded (4/thread, {args.max_threads} threads)", lambda: BoundedMemorySaver(4, max_threads=args.max_threads)),
+        ]
+        if args.sqlite:
+            db = Path(tmp) / "checkpoints.db"
+            variants.append((
+                f"Bounded + SQLite ({args.max_threads} threads)",
+                lambda: BoundedMemorySaver(4, max_threads=args.max_threads, sqlite_path=db),
+            ))
+
+        print(f"{args.sessions} sessions x {args.turns} turns")
+        print(f"{'checkpointer':<38} | {'MB held':>8} | {'checkpoints':>11} | {'blobs':>8} | turns/s")
+        print("-" * 84)
+
+        measured = min(args.unbounded_turns, args.turns)
+        r = run("MemorySaver", MemorySaver(), args.sessions, measured)
+        scale = args.turns / measured
+        label = "MemorySaver" + (f" ({measured} turns x{scale:g})" if scale != 1 else "")
+        print(
+            f"{label:<38} | {r['mb'] * scale:>8.1f} | {int(r['checkpoints'] * scale):>11} | "
+            f"{int(r['blobs'] * scale):>8} | {r['turns_per_s']:.0f}"
+        )
+        for name, factory in variants:
+            r = run(name, factory(), args.sessions, args.turns)
+            print(f"{r['name']:<38} | {r['mb']:>8.1f} | {r['checkpoints']:>11} | {r['blobs']:>8} | {r['turns_per_s']:.0f}")
+
+
+if __name__ == "__main__":
+    main()
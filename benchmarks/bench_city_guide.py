@@ -0,0 +1,82 @@
+"""
+Benchmark: latency of one cold city guide (city + venue + tourist pages).
+
+    python -m benchmarks.bench_city_guide [--http-ms 200] [--slow-ms 8000]
+
+Wikipedia is replaced by canned summaries after a fixed delay. The guide
+needs five REST calls (city, venue, three tourist pages), and the venue
+page also goes through the search-API fallback in the "fallback" case. The
+"serial" column is the sum of the upstream calls, what the one-after-another
+lookups used to take; "guide" is the measured wall time. In the "slow venue"
+case the venue page takes `--slow-ms` and the guide returns at the
+`city_lookup_deadline_seconds` deadline without it.
+"""
+import argparse
+import asyncio
+import os
+import time
+from urllib.parse import unquote
+
+# fake upstream results must not reach the real disk cache
+os.environ["CACHE_DISK_PATH"] = ""
+
+import httpx
+
+from agent.tools.city_api import aget_city_and_venue_info
+from core.config import settings
+from utils.cache_utils import cache_clear
+from utils.http_client import http
+
+
+def _fake_http(delays: dict, spent: list):
+    async def send(client, request, **kwargs):
+        url = unquote(str(request.url))
+        delay = next((ms for marker, ms in delays.items() if marker in url), delays["default"])
+        spent.append(delay)
+        await asyncio.sleep(delay / 1000)
+        if "action=query" in url:
+            data = {"query": {"search": [{"title": "Eden Gardens"}]}}
+        elif "Unknown Ground" in url:
+            return httpx.Response(404, request=request)
+        else:
+            data = {"extract": "A page about the place. " * 10}
+        return httpx.Response(200, request=request, json=data)
+
+    return send
+
+
+async def _guide(venue: str) -> tuple[float, list]:
+    start = time.perf_counter()
+    result = await aget_city_and_venue_info("Kolkata", venue)
+    return time.perf_counter() - start, result["timed_out"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--http-ms", type=float, default=200)
+    parser.add_argument("--slow-ms", type=float, default=8000)
+    args = parser.parse_args()
+
+    scenarios = {
+        "all pages found": ("Eden Gardens", {"default": args.http_ms}),
+        "venue via fallback": ("Unknown Ground", {"default": args.http_ms}),
+        "slow venue": ("Eden Gardens", {"summary/Eden Gardens": args.slow_ms, "default": args.http_ms}),
+    }
+
+    print(f"cold city guide, Wikipedia delay {args.http_ms:g} ms, "
+          f"deadline {settings.city_lookup_deadline_seconds:g} s")
+    print(f"{'scenario':<20} | {'calls':>5} | {'serial (ms)':>11} | {'guide (ms)':>10} | timed out")
+    print("-" * 68)
+    httpx.AsyncClient.send = _fake_http({"default": 0}, [])
+    asyncio.run(http.get("https://en.wikipedia.org/warm-up"))     # start the client's I/O loop
+    for name, (venue, delays) in scenarios.items():
+        spent = []
+        httpx.AsyncClient.send = _fake_http(delays, spent)
+        cache_clear()
+        wall, late = asyncio.run(_guide(venue))
+        print(f"{name:<20} | {len(spent):>5} | {sum(spent):>11.0f} | {wall * 1000:>10.0f} | {', '.join(late) or '-'}")
+    http.close()
+
+
+if __name__ == "__main__":
+    main()
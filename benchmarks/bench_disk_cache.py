@@ -0,0 +1,80 @@
+"""
+Benchmark: cold-start latency for popular cities with the disk cache tier.
+
+    python -m benchmarks.bench_disk_cache [--cities 200] [--upstream-ms 400]
+
+Warms a wikipedia-like fetcher (upstream simulated with a sleep), then
+"restarts" in a fresh interpreter with empty in-memory caches and times the
+first lookup of each city, with and without the SQLite tier.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from utils.cache_utils import ttl_cache
+from utils.disk_cache import DiskCache
+
+SUMMARY = "Mumbai is the capital city of the Indian state of Maharashtra. " * 20
+
+
+def _fetcher(db_path: str | None, upstream_ms: float):
+    disk = DiskCache(db_path).namespace("wikipedia", ttl=3600) if db_path else None
+
+    @ttl_cache(ttl=3600, disk=disk, name=f"bench.wiki.{bool(db_path)}")
+    def fetch(city: str) -> str:
+        time.sleep(upstream_ms / 1000)
+        return f"{city}: {SUMMARY}"
+
+    return fetch
+
+
+def _run(db_path: str | None, cities: int, upstream_ms: float) -> list[float]:
+    fetch = _fetcher(db_path, upstream_ms)
+    timings = []
+    for i in range(cities):
+        start = time.perf_counter()
+        fetch(f"city-{i}")
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _summary(label: str, timings: list[float]) -> str:
+    timings = sorted(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    return f"{label:<34} | {statistics.median(timings):>9.3f} | {p99:>9.3f} | {sum(timings) / 1000:>8.2f}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cities", type=int, default=200)
+    parser.add_argument("--upstream-ms", type=float, default=400)
+    parser.add_argument("--phase", choices=["all", "cold"], default="all")
+    parser.add_argument("--db")
+    args = parser.parse_args()
+
+    if args.phase == "cold":
+        # child process: empty memory tier, only what is on disk
+        print(_summary(f"after restart ({'disk' if args.db else 'memory only'})",
+                       _run(args.db, args.cities, args.upstream_ms)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "tool_cache.db")
+        print(f"first lookup of {args.cities} cities, upstream {args.upstream_ms:g} ms")
+        print(f"{'':<34} | {'p50 ms':>9} | {'p99 ms':>9} | {'total s':>8}")
+        print("-" * 70)
+        print(_summary("warm-up (upstream)", _run(db, args.cities, args.upstream_ms)))
+        for db_arg in ([], ["--db", db]):
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_disk_cache", "--phase", "cold",
+                 "--cities", str(args.cities), "--upstream-ms", str(args.upstream_ms), *db_arg],
+                check=True,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark: concurrent fusion requests, awaited domain LLMs vs thread offload.
+
+    python -m benchmarks.bench_fusion_fanout [--requests 50] [--http-ms 200] [--llm-ms 600]
+
+Every upstream (Cricbuzz, OpenWeatherMap, Azure Maps, Wikipedia, Azure
+OpenAI) is replaced by a canned response after a fixed delay, and caching is
+off so each request does the full fan-out. "async" is run_fusion_llm_async as
+is: the four domain LLMs and the fusion completion are awaited. "to_thread"
+is how it fanned out before: each sync run_*_llm, and the fusion completion,
+in asyncio.to_thread, so a request holds up to four default-executor threads
+while its upstream calls are in flight.
+"""
+import argparse
+import asyncio
+import os
+import threading
+import time
+
+# every request goes upstream; fake results must not reach the disk cache
+os.environ["CACHE_ENABLED"] = "false"
+os.environ["CACHE_DISK_PATH"] = ""
+os.environ["VENUE_GAZETTEER_LEARN"] = "false"
+
+import httpx
+from openai.resources.chat.completions import AsyncCompletions, Completions
+
+import agent.llms.complete_llm as complete_llm
+from agent.llms.city_llm import run_city_llm
+from agent.llms.sports_llm import run_sports_llm
+from agent.llms.travel_llm import run_travel_llm
+from agent.llms.weather_llm import run_weather_llm
+from benchmarks.bench_cache_snapshot import _fake_http, _fake_llm
+from utils.http_client import http
+
+ASYNC_RUNNERS = {
+    "arun_sports_llm": complete_llm.arun_sports_llm,
+    "arun_weather_llm": complete_llm.arun_weather_llm,
+    "arun_city_llm": complete_llm.arun_city_llm,
+    "arun_travel_llm": complete_llm.arun_travel_llm,
+}
+THREAD_RUNNERS = {
+    "arun_sports_llm": run_sports_llm,
+    "arun_weather_llm": run_weather_llm,
+    "arun_city_llm": run_city_llm,
+    "arun_travel_llm": run_travel_llm,
+}
+
+
+class _ThreadedCompletions:
+    """fusion_completions as the old fan-out used it: create() in a worker thread."""
+
+    def __init__(self, completions):
+        self._completions = completions
+
+    async def acreate(self, **request):
+        return await asyncio.to_thread(self._completions.create, **request)
+
+
+def _use(mode: str, fusion_completions):
+    for name, runner in ASYNC_RUNNERS.items():
+        if mode == "async":
+            setattr(complete_llm, name, runner)
+        else:
+            setattr(complete_llm, name,
+                    lambda *args, _run=THREAD_RUNNERS[name]: asyncio.to_thread(_run, *args))
+    complete_llm.fusion_completions = (fusion_completions if mode == "async"
+                                       else _ThreadedCompletions(fusion_completions))
+
+
+async def _run(n: int) -> tuple[float, int]:
+    peak = threading.active_count()
+    done = asyncio.Event()
+
+    async def sample():
+        nonlocal peak
+        while not done.is_set():
+            peak = max(peak, threading.active_count())
+            await asyncio.sleep(0.01)
+
+    sampler = asyncio.create_task(sample())
+    start = time.perf_counter()
+    results = await asyncio.gather(*(complete_llm.run_fusion_llm_async(f"fusion-{i}", "india full report")
+                                     for i in range(n)))
+    wall = time.perf_counter() - start
+    done.set()
+    await sampler
+    errors = [r["error"] for r in results if "error" in r]
+    assert not errors, errors[:3]
+    return wall, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--http-ms", type=float, default=200)
+    parser.add_argument("--llm-ms", type=float, default=600)
+    args = parser.parse_args()
+
+    httpx.AsyncClient.send = _fake_http(args.http_ms)
+    Completions.create, AsyncCompletions.create = _fake_llm(args.llm_ms)
+    fusion_completions = complete_llm.fusion_completions
+
+    print(f"{args.requests} concurrent fusion requests, http {args.http_ms:g} ms, llm {args.llm_ms:g} ms")
+    print(f"{'mode':>9} | {'wall (s)':>8} | {'peak threads':>12}")
+    print("-" * 36)
+    for mode in ("async", "to_thread"):
+        _use(mode, fusion_completions)
+        wall, threads = asyncio.run(_run(args.requests))
+        print(f"{mode:>9} | {wall:>8.2f} | {threads:>12}")
+    http.close()
+
+
+if __name__ == "__main__":
+    main()
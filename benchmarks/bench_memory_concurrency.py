@@ -0,0 +1,77 @@
+"""
+Benchmark: N worker processes hammering one SQLite (WAL) session store.
+
+    python -m benchmarks.bench_memory_concurrency [--procs 1,2,4,8] [--ops 2000]
+
+Each process alternates set_context / get_all on a shared pool of sessions,
+writing keys unique to itself, so the final key count also proves that no
+update was lost between processes (the old shared JSON file lost them).
+"""
+import argparse
+import multiprocessing as mp
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from agent.state.session_memory import SessionMemory
+from agent.state.sqlite_store import SQLiteStore
+
+N_SESSIONS = 200
+
+
+def _worker(db_path: str, proc_id: int, ops: int, start_evt, out: mp.Queue):
+    # write-through + no read cache: every call hits the shared database
+    memory = SessionMemory(SQLiteStore(db_path), cache_max_sessions=0, write_behind_ms=0)
+    rng = random.Random(proc_id)
+    start_evt.wait()
+    t0 = time.perf_counter()
+    for i in range(ops):
+        session_id = f"session-{rng.randrange(N_SESSIONS)}"
+        if i % 2 == 0:
+            memory.set_context(session_id, f"p{proc_id}-k{i}", i)
+        else:
+            memory.get_all(session_id)
+    out.put(time.perf_counter() - t0)
+    memory.close()
+
+
+def run(n_procs: int, ops: int) -> tuple[float, int, int]:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "memory_store.db")
+        SessionMemory(SQLiteStore(db_path)).get_all("warmup")   # create schema
+
+        ctx = mp.get_context("spawn")
+        start_evt, out = ctx.Event(), ctx.Queue()
+        procs = [
+            ctx.Process(target=_worker, args=(db_path, p, ops, start_evt, out))
+            for p in range(n_procs)
+        ]
+        for p in procs:
+            p.start()
+        time.sleep(1.0)             # let every process import and connect
+        start_evt.set()
+        elapsed = max(out.get() for _ in procs)
+        for p in procs:
+            p.join()
+
+        keys = SQLiteStore(db_path).stats()["keys"]
+        expected = n_procs * ((ops + 1) // 2)
+        return n_procs * ops / elapsed, keys, expected
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--procs", default="1,2,4,8")
+    parser.add_argument("--ops", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'procs':>6} | {'ops/s':>10} | {'keys':>8} | {'expected':>8} | lost")
+    print("-" * 52)
+    for n in [int(x) for x in args.procs.split(",")]:
+        throughput, keys, expected = run(n, args.ops)
+        print(f"{n:>6} | {throughput:>10.0f} | {keys:>8} | {expected:>8} | {expected - keys}")
+
+
+if __name__ == "__main__":
+    main()
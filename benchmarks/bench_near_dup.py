@@ -0,0 +1,99 @@
+"""
+Benchmark: near-duplicate intent cache hit rate vs false hits, by threshold.
+
+    python -m benchmarks.bench_near_dup [--thresholds 0.5 0.6 0.7 0.8 0.9] [--shuffles 50]
+
+Streams a labelled set of distinct paraphrased queries once (in several
+random orders) through a NearDuplicateCache the way classify_intent_llm uses
+it: a miss "classifies" the query (its label) and caches it. Every hit is a
+paraphrase answered without the LLM; a hit whose cached label differs from
+the query's own label is a false hit.
+"""
+import argparse
+import random
+import time
+
+from utils.near_dup_cache import NearDuplicateCache
+
+LABELLED = {
+    "next_series": [
+        "india next match", "when is India's next match?", "India upcoming game",
+        "what is india's next cricket fixture please", "show me the upcoming fixtures for australia",
+        "australia next series", "when does england play next", "england upcoming matches schedule",
+        "next match for pakistan", "pakistan fixtures",
+    ],
+    "current_match": [
+        "is india playing live right now", "india live score", "current match india",
+        "live match australia", "what's the live score of the australia game",
+        "england playing now?", "is there a live match right now",
+    ],
+    "weather_info": [
+        "weather in mumbai", "mumbai weather today", "will it rain in mumbai", "what's the temperature in delhi",
+        "delhi forecast", "weather at the venue", "is it going to rain at the match",
+        "how hot is it in chennai", "chennai weather",
+    ],
+    "travel_info": [
+        "how do i get to wankhede stadium", "travel to wankhede", "nearest airport to the venue",
+        "how to reach eden gardens", "train to eden gardens", "bus to the stadium in kolkata",
+        "distance from airport to mcg",
+    ],
+    "city_info": [
+        "tell me about mumbai", "things to do in mumbai", "places to visit in melbourne",
+        "melbourne city guide", "best restaurants near the venue", "what to see in kolkata",
+        "tourist places in delhi",
+    ],
+    "chitchat": ["hi", "hello there", "hey how are you", "good morning", "what's up"],
+    "fusion_summary": [
+        "give me a full summary", "full report for india's match", "summarize everything about the match",
+        "complete overview of the next india game with weather and travel",
+    ],
+}
+
+
+def _run(threshold: float, queries: list[tuple[str, str]], examples: list) -> tuple[int, int, int, float]:
+    cache = NearDuplicateCache("bench", threshold=threshold, ttl=3600)
+    hits = false_hits = 0
+    elapsed = 0.0
+    for text, label in queries:
+        start = time.perf_counter()
+        kind, value, similarity = cache.lookup(text)
+        elapsed += time.perf_counter() - start
+        if kind is None:
+            cache.add(text, label)
+            continue
+        hits += 1
+        if value != label:
+            false_hits += 1
+            if len(examples) < 3 and text not in " ".join(examples):
+                examples.append(f"{text!r} -> {value} ({similarity})")
+    return hits, false_hits, len(queries), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.5, 0.6, 0.7, 0.8, 0.9])
+    parser.add_argument("--shuffles", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    queries = [(q, label) for label, qs in LABELLED.items() for q in qs]
+    print(f"{len(queries)} distinct labelled queries, {args.shuffles} random orders")
+    print(f"{'threshold':>9} | {'hit rate':>8} | {'false hits':>10} | {'false/hit':>9} | {'µs/lookup':>9}")
+    print("-" * 58)
+    for threshold in args.thresholds:
+        rng = random.Random(args.seed)
+        hits = false_hits = lookups = 0
+        elapsed = 0.0
+        examples = []
+        for _ in range(args.shuffles):
+            rng.shuffle(queries)
+            h, f, n, t = _run(threshold, queries, examples)
+            hits, false_hits, lookups, elapsed = hits + h, false_hits + f, lookups + n, elapsed + t
+        print(f"{threshold:>9.2f} | {hits / lookups:>8.1%} | {false_hits / args.shuffles:>10.2f} | "
+              f"{(false_hits / hits if hits else 0):>9.1%} | {elapsed / lookups * 1e6:>9.1f}")
+        for example in examples:
+            print(f"{'':>12}e.g. {example}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark: SessionMemory.set_context latency vs. number of stored sessions.
+
+    python -m benchmarks.bench_session_memory [--sizes 100,1000,10000,100000]
+
+With the log-structured store, per-call latency should stay flat as the
+number of sessions grows (the old whole-file JSON rewrite grew linearly).
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from agent.state.log_store import LogStructuredStore
+from agent.state.session_memory import SessionMemory
+
+
+def _populate(memory: SessionMemory, n_sessions: int):
+    for i in range(n_sessions):
+        memory.set_context(f"session-{i}", "team", "india")
+        memory.set_context(f"session-{i}", "city", "Mumbai")
+
+
+def _measure(memory: SessionMemory, n_sessions: int, calls: int) -> list[float]:
+    samples = []
+    for i in range(calls):
+        session_id = f"session-{(i * 7919) % n_sessions}"
+        start = time.perf_counter()
+        memory.set_context(session_id, "last_question", f"question {i}")
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="100,1000,10000,100000")
+    parser.add_argument("--calls", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'sessions':>10} | {'p50 (us)':>10} | {'p99 (us)':>10} | {'mean (us)':>10}")
+    print("-" * 50)
+    for n in [int(x) for x in args.sizes.split(",")]:
+        with tempfile.TemporaryDirectory() as tmp:
+            memory = SessionMemory(
+                LogStructuredStore(Path(tmp) / "memory_store.json", Path(tmp) / "memory_store.log"),
+                write_behind_ms=0,      # measure the store itself, not the write buffer
+            )
+            _populate(memory, n)
+            samples = _measure(memory, n, args.calls)
+            memory.close()
+
+        samples.sort()
+        p50 = samples[len(samples) // 2]
+        p99 = samples[int(len(samples) * 0.99)]
+        print(f"{n:>10} | {p50:>10.1f} | {p99:>10.1f} | {statistics.mean(samples):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark: latency of one cold travel lookup, serial vs concurrent Azure Maps calls.
+
+    python -m benchmarks.bench_travel_lookup [--http-ms 150] [--runs 5]
+
+Azure Maps (geocode, reverse geocode, POI search) is replaced by canned
+results after a fixed delay; the venue and city are unknown to the
+gazetteer, so every lookup geocodes its three candidates and searches the
+four transport hub categories. "serial" runs with one call in flight, like
+the previous one-after-another lookup; "concurrent" with
+`travel_lookup_concurrency`.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+# fake upstream results must not reach the real disk cache
+os.environ["CACHE_DISK_PATH"] = ""
+
+import httpx
+
+import agent.tools.travel_api as travel_api
+from core.config import settings
+from utils.cache_utils import cache_clear
+from utils.http_client import http
+
+CITY = "Atlantis"
+
+
+def _fake_http(http_ms: float, calls: list):
+    async def send(client, request, **kwargs):
+        calls.append(request.url.path)
+        await asyncio.sleep(http_ms / 1000)
+        path = request.url.path
+        if "search/poi" in path:
+            data = {"results": [{"poi": {"name": f"{request.url.params['query']} 1"},
+                                 "position": {"lat": 10.01, "lon": 20.01},
+                                 "address": {"freeformAddress": f"1 Harbour Road, {CITY}"}}]}
+        elif "reverse" in path:
+            data = {"addresses": [{"address": {"country": "Oceania", "municipality": CITY}}]}
+        else:
+            data = {"results": [{"position": {"lat": 10.0, "lon": 20.0}, "score": 9.5,
+                                 "address": {"country": "Oceania"}}]}
+        return httpx.Response(200, request=request, json=data)
+
+    return send
+
+
+async def _lookup(i: int) -> float:
+    cache_clear()
+    start = time.perf_counter()
+    result = await travel_api.aget_travel_info(CITY, f"Test Ground {i}")
+    assert "error" not in result, result
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--http-ms", type=float, default=150)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    calls = []
+    httpx.AsyncClient.send = _fake_http(args.http_ms, calls)
+    travel_api.venue_gazetteer.learn_enabled = False
+
+    print(f"cold travel lookup, Azure Maps delay {args.http_ms:g} ms, median of {args.runs}")
+    print(f"{'mode':>10} | {'in flight':>9} | {'calls':>5} | {'latency (ms)':>12}")
+    print("-" * 47)
+    for mode, concurrency in (("serial", 1), ("concurrent", settings.travel_lookup_concurrency)):
+        travel_api.TRAVEL_CONCURRENCY = concurrency
+        calls.clear()
+        timings = [asyncio.run(_lookup(i)) for i in range(args.runs)]
+        print(f"{mode:>10} | {concurrency:>9} | {len(calls) // args.runs:>5} | "
+              f"{statistics.median(timings) * 1000:>12.0f}")
+    http.close()
+
+
+if __name__ == "__main__":
+    main()
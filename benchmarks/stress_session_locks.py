@@ -0,0 +1,136 @@
+"""
+Stress test: parallel fan-out writes to the same sessions, on both backends.
+
+    python -m benchmarks.stress_session_locks [--sessions 20] [--turns 50] [--fanout 8]
+
+Every turn fans out `fanout` workers on one session, half as threads and half
+as asyncio.to_thread tasks (like the fusion node), with and without a shared
+transaction. Each worker writes a key unique to itself and bumps a shared
+per-session counter through memory.modify(). Meanwhile a background thread
+keeps flushing and sweeping. Afterwards the store is reopened from disk and
+checked: every unique key must be there and every counter must be exact.
+"""
+import argparse
+import asyncio
+import contextvars
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from agent.state.async_memory import AsyncSessionMemory
+from agent.state.log_store import LogStructuredStore
+from agent.state.session_memory import SessionMemory
+from agent.state.sqlite_store import SQLiteStore
+
+
+def _make_store(backend: str, tmp: Path):
+    if backend == "log":
+        return LogStructuredStore(tmp / "memory_store.json", tmp / "memory_store.log", compact_min_records=200)
+    return SQLiteStore(tmp / "memory_store.db")
+
+
+def _bump(current: dict) -> dict:
+    return {"counter": current.get("counter", 0) + 1}
+
+
+def _worker(memory: SessionMemory, session_id: str, turn: int, worker: int):
+    memory.update(session_id, {f"t{turn}-w{worker}": worker})
+    memory.modify(session_id, _bump)
+    memory.get_all(session_id)
+
+
+async def _turn(memory: SessionMemory, amemory: AsyncSessionMemory, pool, session_id, turn, fanout, shared_tx):
+    loop = asyncio.get_running_loop()
+
+    async def fan_out():
+        jobs = []
+        for w in range(fanout):
+            if w % 2:
+                jobs.append(asyncio.to_thread(_worker, memory, session_id, turn, w))
+            else:
+                # like run_fusion_llm: pool jobs run in a copy of the caller's context
+                ctx = contextvars.copy_context()
+                jobs.append(loop.run_in_executor(pool, ctx.run, _worker, memory, session_id, turn, w))
+        await asyncio.gather(*jobs)
+
+    if shared_tx:
+        async with amemory.transaction(session_id):
+            await fan_out()
+    else:
+        await fan_out()
+
+
+async def _run(memory, n_sessions, turns, fanout):
+    amemory = AsyncSessionMemory(memory)
+    with ThreadPoolExecutor(max_workers=fanout) as pool:
+        for turn in range(turns):
+            await asyncio.gather(*[
+                _turn(memory, amemory, pool, f"session-{s}", turn, fanout, shared_tx=turn % 2 == 1)
+                for s in range(n_sessions)
+            ])
+
+
+def run(backend: str, n_sessions: int, turns: int, fanout: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        memory = SessionMemory(_make_store(backend, tmp), write_behind_ms=5)
+
+        stop = threading.Event()
+
+        def background():
+            while not stop.wait(0.01):
+                memory.flush()
+                memory.sweep()
+
+        churn = threading.Thread(target=background, daemon=True)
+        churn.start()
+        t0 = time.perf_counter()
+        asyncio.run(_run(memory, n_sessions, turns, fanout))
+        elapsed = time.perf_counter() - t0
+        stop.set()
+        churn.join()
+        stats = memory.stats()
+        memory.close()
+
+        # reload from disk with a fresh store: nothing may live only in memory
+        reloaded = SessionMemory(_make_store(backend, tmp), write_behind_ms=0)
+        lost_keys = bad_counters = 0
+        for s in range(n_sessions):
+            data = reloaded.get_all(f"session-{s}")
+            lost_keys += sum(
+                f"t{t}-w{w}" not in data for t in range(turns) for w in range(fanout)
+            )
+            bad_counters += data.get("counter") != turns * fanout
+        reloaded.close()
+
+    return {
+        "ops": n_sessions * turns * fanout * 3,
+        "elapsed": elapsed,
+        "lost_keys": lost_keys,
+        "bad_counters": bad_counters,
+        "contended": stats["lock_contended"],
+        "wait_max_ms": stats["lock_wait_max_ms"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--fanout", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{'backend':>8} | {'ops/s':>8} | {'lost keys':>9} | {'bad ctrs':>8} | {'contended':>9} | max wait ms")
+    print("-" * 70)
+    for backend in ("log", "sqlite"):
+        r = run(backend, args.sessions, args.turns, args.fanout)
+        print(
+            f"{backend:>8} | {r['ops'] / r['elapsed']:>8.0f} | {r['lost_keys']:>9} | "
+            f"{r['bad_counters']:>8} | {r['contended']:>9} | {r['wait_max_ms']:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,133 @@ class Settings(BaseSettings):
     azure_region: str | None = "eastus"
     log_level: str | None = "INFO"
 
+    # === Session Memory ===
+    session_backend: str = "log"                  # "log" (single worker) | "sqlite" (multi-worker)
+    session_sqlite_path: str = "memory_store.db"
+    session_sqlite_pool_size: int = 4
+    session_sqlite_busy_timeout_ms: int = 5000
+    session_ttl_seconds: int = 6 * 3600           # idle sessions are evicted after this
+    session_max_bytes: int = 64_000               # per-session cap, oldest keys evicted first
+    session_sweep_interval_seconds: int = 60      # background eviction sweep period
+    session_cache_max_sessions: int = 10_000      # read-through cache in front of the store ("log" backend)
+    session_cache_ttl_seconds: float = 2.0        # bounds staleness of cached sessions
+    session_write_behind_ms: int = 200            # buffered write flush period (0 = write-through; "sqlite" is always write-through)
+
+    # === Tool Result Caches (utils/cache_utils.ttl_cache) ===
+    cache_enabled: bool = True
+    cache_default_max_entries: int = 1024         # per cached function
+    cache_default_max_bytes: int = 8_000_000      # per cached function
+
+    # === Upstream HTTP Client (utils/http_client.py) ===
+    http_connect_timeout_seconds: float = 3.05
+    http_read_timeout_seconds: float = 10
+    http_max_connections: int = 256               # open at once, all hosts (more requests wait for one)
+    http_max_keepalive_connections: int = 64      # idle connections kept for reuse
+    http_max_retries: int = 2                     # GET retries on errors, timeouts, 429 / 5xx
+    http_backoff_base_seconds: float = 0.25       # full jitter: uniform(0, base * 2^attempt)...
+    http_backoff_max_seconds: float = 4           # ...capped here
+    http_retry_after_max_seconds: float = 10      # a longer Retry-After returns the response instead
+
+    # === Disk Cache Tier (utils/disk_cache.py) ===
+    cache_disk_path: str | None = "tool_cache.db"  # None disables; mount a volume to keep it across deploys
+    cache_disk_wikipedia_ttl_seconds: float = 7 * 24 * 3600
+    cache_disk_wikipedia_max_bytes: int = 50_000_000
+    cache_disk_geocode_ttl_seconds: float = 30 * 24 * 3600
+    cache_disk_geocode_max_bytes: int = 20_000_000
+
+    # === Cache Snapshots (utils/cache_snapshot.py) ===
+    cache_snapshot_path: str | None = "cache_snapshot.pkl.gz"    # None disables save / restore
+    cache_snapshot_seed_path: str | None = "cache_seed.pkl.gz"    # shipped with the image, fills what the local one lacks
+    cache_snapshot_interval_seconds: float = 300                  # 0 = on shutdown only
+    cache_snapshot_version: str = "1"                             # bump when cached value shapes change
+    cache_snapshot_secret: str | None = None                      # HMAC-SHA256 key; no snapshots without one
+    cache_snapshot_caches: list[str] = [                          # ttl_cache names (fnmatch patterns)
+        "agent.tools.sports_api.*",
+        "agent.tools.travel_api._geocode",
+        "agent.tools.travel_api._reverse_geocode",
+        "agent.tools.travel_api._search_poi_cell",
+        "agent.tools.city_api.*",
+        "agent.tools.weather_api.aget_weather",
+        "llm.*",
+    ]
+
+    # === Venue Gazetteer (agent/tools/venue_gazetteer.py) ===
+    venue_gazetteer_learned_path: str | None = "venues_learned.json"  # geocoded venues / cities
+    venue_gazetteer_learn: bool = True
+
+    # === Transport Hub (POI) Cache ===
+    poi_geohash_precision: int = 5                # ~4.9 km cells; one search per cell and category
+    poi_cell_fetch_limit: int = 50                # results fetched per cell (filtered locally)
+    travel_lookup_concurrency: int = 4            # Azure Maps calls in flight per travel lookup
+
+    # === City Guide (agent/tools/city_api.py) ===
+    city_lookup_deadline_seconds: float = 4       # Wikipedia lookups of one guide; late ones are left out
+
+    # === Sports Data Freshness (adaptive TTLs + stale-while-revalidate) ===
+    sports_ttl_live_seconds: float = 15                     # a match in play
+    sports_ttl_lead_fraction: float = 0.05                  # before it: 5% of the time to start...
+    sports_ttl_min_seconds: float = 60                      # ...clamped to these bounds
+    sports_ttl_max_seconds: float = 12 * 3600
+    sports_schedules_max_stale_seconds: float = 30 * 60     # hard expiry = ttl + max_stale
+    sports_series_max_stale_seconds: float = 24 * 3600
+
+    # === Weather Freshness ===
+    weather_ttl_seconds: float = 3600                       # no match in the city soon
+    weather_ttl_near_match_seconds: float = 5 * 60          # a match in the city in play or starting soon
+    weather_near_match_hours: float = 6
+
+    # === LLM Response Cache (utils/llm_cache.py) ===
+    llm_cache_default_ttl_seconds: float = 3600
+    llm_cache_ttl_seconds: dict[str, float] = {   # per call site; 0 disables caching there
+        "intent": 7 * 24 * 3600,
+        "city_spelling": 30 * 24 * 3600,
+        "weather_spelling": 30 * 24 * 3600,
+        "sports_summary": 60,                     # live match state
+        "schedule_summary": 30 * 60,
+        "weather_summary": 10 * 60,
+        "city_summary": 24 * 3600,
+        "travel_summary": 6 * 3600,
+        "fusion_summary": 60,
+    }
+    llm_price_prompt_per_1k: float = 0.0004       # USD, gpt-4.1-mini
+    llm_price_completion_per_1k: float = 0.0016
+
+    # === Near-Duplicate Query Cache (utils/near_dup_cache.py) ===
+    near_dup_threshold: float = 0.7               # min Jaccard of normalized word shingles
+    near_dup_max_entries: int = 5000              # per cached function
+    near_dup_audit_rate: float = 0.01             # share of near hits recomputed to count false hits
+
+    # === Graph Node Memoization (agent/graph/node_cache.py) ===
+    node_cache_ttl_seconds: dict[str, float] = {   # per intent; node answers are shared within a window
+        "current_match": 30,
+        "match_info": 30,
+        "next_series": 60,
+        "schedule_match": 60,
+        "weather_info": 10 * 60,
+        "city_info": 24 * 3600,
+        "travel_info": 6 * 3600,
+    }
+
+    # === Graph Checkpoints ===
+    checkpoint_max_per_thread: int = 4            # one /chat turn writes 4 checkpoints
+    checkpoint_max_threads: int = 5_000           # threads kept in memory (LRU)
+    checkpoint_ttl_seconds: int = 6 * 3600        # idle threads are dropped after this
+    checkpoint_sqlite_path: str | None = None     # e.g. "checkpoints.db" to persist / reload threads
+
+    # === Chat History (last turns echoed to the UI) ===
+    chat_history_turns: int = 5
+    chat_history_max_sessions: int = 10_000
+    chat_history_ttl_seconds: int = 6 * 3600
+    chat_history_max_bytes: int = 32_000_000     # total budget across sessions (LRU evicted)
+
+    # === Stateless Context Tokens ===
+    stateless_context: bool = False               # return a signed context token from /chat
+    context_token_secret: str | None = None       # shared by all replicas (HMAC-SHA256 key)
+    context_token_ttl_seconds: int = 24 * 3600
+    context_artifacts: str = "inline"             # "inline" (any replica) | "local" (large values stay in-process)
+    context_token_inline_max_bytes: int = 256     # "local": larger values go to the artifact cache
+    context_artifact_cache_max_entries: int = 2000
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -1,18 +1,51 @@
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse
 from agent.state.session_memory import memory
+from agent.state.async_memory import async_memory
+from agent.state.context_token import InvalidContextToken, context_tokens
+from agent.state.checkpointer import checkpointer
+from agent.state.chat_history import chat_history
+from utils.cache_utils import cache_stats
+from utils.http_client import http
+from utils.cache_snapshot import restore_caches, save_snapshot, snapshot_stats, start_snapshotter, stop_snapshotter
+from utils.disk_cache import disk_cache
+from utils.llm_cache import llm_cache_stats
+from utils.near_dup_cache import near_dup_stats
+from agent.tools.venue_gazetteer import venue_gazetteer
+from agent.graph.node_cache import node_cache_stats
+from core.config import settings
 # Import your existing AI agent function
 from agent.graph.sports_agent_graph import build_graph
 sports_agent_graph = build_graph()
 
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    memory.start_sweeper()
+    snapshots = settings.cache_snapshot_path and settings.cache_snapshot_secret
+    if snapshots:
+        restore_caches()
+        start_snapshotter()
+    yield
+    if snapshots:
+        stop_snapshotter()
+        save_snapshot()
+    memory.stop_sweeper()
+    await asyncio.to_thread(http.close)
+    await async_memory.aflush()
+    memory.compact()
+    checkpointer.close()
+
+
 # Initialize FastAPI app
-app = FastAPI(title="Global Sports Intelligence Agent", version="1.0")
+app = FastAPI(title="Global Sports Intelligence Agent", version="1.0", lifespan=lifespan)
 
 # --- CORS so frontend apps or local HTML can call this ---
 app.add_middleware(
@@ -26,13 +59,11 @@ app.add_middleware(
 # --- Logging setup ---
 logger = logging.getLogger(__name__)
 
-# --- In-memory chat memory ---
-chat_memory = {}
-
 # --- Pydantic model for request body ---
 class ChatRequest(BaseModel):
     message: str
     session_id: str | None = "default"
+    context_token: str | None = None    # returned by the previous /chat (stateless mode)
 
 class SessionRequest(BaseModel):
     session_id: str
@@ -56,27 +87,58 @@ async def chat(req: ChatRequest):
 
     logger.info(f"[CHAT] User ({session_id}): {user_message}")
 
-    history = chat_memory.get(session_id, [])
-
-    result = sports_agent_graph.invoke(
-        {"user_input": user_message, "session_id": session_id},
-        config={"configurable": {"thread_id": session_id}}
-    )
+    if settings.stateless_context and req.context_token:
+        # the client's token is the freshest copy of the context → seed this replica
+        try:
+            context, last_intent = context_tokens.decode(session_id, req.context_token)
+            await async_memory.aupdate(session_id, context)
+            logger.info(f"[CONTEXT] Restored {list(context)} for {session_id} (last intent: {last_intent})")
+        except InvalidContextToken as e:
+            logger.warning(f"[CONTEXT] Ignoring context token for {session_id}: {e}")
+
+    with memory.track_round_trips() as trips:
+        # ainvoke: sync nodes run in executor threads, the loop stays free
+        result = await sports_agent_graph.ainvoke(
+            {"user_input": user_message, "session_id": session_id},
+            config={"configurable": {"thread_id": session_id}}
+        )
+    logger.info(f"[MEMORY] {trips.count} store round trips this turn {trips.ops}")
     reply = result.get("output", str(result))
 
-    history.append({"user": user_message, "agent": reply})
-    chat_memory[session_id] = history[-5:]
+    history = chat_history.append(session_id, user_message, reply)
 
-    return {
+    response = {
         "reply": reply,
         "session_id": session_id,
-        "memory": chat_memory[session_id],
+        "memory": history,
     }
+    if settings.stateless_context:
+        context = await async_memory.aget_all(session_id)
+        response["context_token"] = context_tokens.encode(session_id, context, last_intent=result.get("intent"))
+    return response
     
 @app.post("/clear")
-def clear_session(req: SessionRequest):
+async def clear_session(req: SessionRequest):
     session_id = req.session_id
-    memory.clear(session_id)
-    chat_memory[session_id] = []
+    await async_memory.aclear(session_id)
+    await checkpointer.adelete_thread(session_id)
+    chat_history.clear(session_id)
     return {"status": "cleared", "session_id": session_id}
 
+
+@app.get("/stats")
+def stats():
+    return {
+        "memory": memory.stats(),
+        "context_tokens": context_tokens.stats(),
+        "checkpoints": checkpointer.stats(),
+        "chat_history": chat_history.stats(),
+        "caches": cache_stats(),
+        "disk_cache": disk_cache.stats() if disk_cache else None,
+        "llm_cache": llm_cache_stats(),
+        "near_dup": near_dup_stats(),
+        "gazetteer": venue_gazetteer.stats(),
+        "nodes": node_cache_stats(),
+        "cache_snapshot": snapshot_stats(),
+        "http": http.stats(),
+    }
@@ -0,0 +1,203 @@
+"""
+Snapshot / restore of the warm in-memory caches across restarts and deploys.
+
+A new revision starts with empty caches, so its first minutes of traffic pay
+full upstream and LLM latency. The caches named in `cache_snapshot_caches`
+(schedule snapshots, geocodes, Wikipedia, LLM responses...) are saved to
+`cache_snapshot_path` periodically and on shutdown, and loaded on startup:
+the local one first, then the seed snapshot shipped with the image
+(`cache_snapshot_seed_path`) fills in the rest. Entries keep their remaining
+freshness; expired ones are dropped, and a snapshot of another format,
+`cache_snapshot_version` or Python version is ignored.
+
+Files are gzipped pickles (LLM responses and cache keys are not plain JSON),
+prefixed with an HMAC-SHA256 of the rest keyed by `cache_snapshot_secret`.
+A file is only unpickled once its signature checks out, so whoever can write
+the snapshot path cannot run code in the app without the secret. Without a
+secret, snapshots are neither saved nor loaded.
+"""
+import fnmatch
+import gzip
+import hashlib
+import hmac
+import logging
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from core.config import settings
+from utils.cache_utils import _registry, _registry_lock
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 2
+SIGNATURE_BYTES = 32
+
+_stats_lock = threading.Lock()
+_stats = {"saves": 0, "last_save": None, "loads": []}
+
+_snapshotter: threading.Thread | None = None
+_snapshotter_stop = threading.Event()
+
+if settings.cache_snapshot_path and not settings.cache_snapshot_secret:
+    logger.warning("[CACHE SNAPSHOT] No cache_snapshot_secret configured, cache snapshots are disabled")
+
+
+def _header() -> dict:
+    return {
+        "format": SNAPSHOT_FORMAT,
+        "version": settings.cache_snapshot_version,
+        "python": list(sys.version_info[:2]),
+    }
+
+
+def _sign(data: bytes) -> bytes:
+    return hmac.new(settings.cache_snapshot_secret.encode("utf-8"), data, hashlib.sha256).digest()
+
+
+def _selected_caches() -> dict:
+    with _registry_lock:
+        caches = dict(_registry)
+    return {name: cache for name, cache in caches.items()
+            if any(fnmatch.fnmatchcase(name, pattern) for pattern in settings.cache_snapshot_caches)}
+
+
+def save_snapshot(path: str | Path | None = None) -> dict:
+    """Write the selected caches to `path` (atomically, signed); returns what was saved."""
+    path = Path(path or settings.cache_snapshot_path)
+    if not settings.cache_snapshot_secret:
+        logger.warning("[CACHE SNAPSHOT] No cache_snapshot_secret configured, not saving")
+        return {"path": str(path), "error": "no secret"}
+    start = time.perf_counter()
+    caches, entries = {}, 0
+    for name, cache in _selected_caches().items():
+        exported = cache.export()
+        if not exported:
+            continue
+        try:
+            caches[name] = pickle.dumps(exported, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:     # an unpicklable value skips its cache, not the snapshot
+            logger.warning(f"[CACHE SNAPSHOT] Skipping {name}: {e}")
+            continue
+        entries += len(exported)
+
+    data = gzip.compress(pickle.dumps({**_header(), "saved_at": time.time(), "caches": caches},
+                                      protocol=pickle.HIGHEST_PROTOCOL))
+    data = _sign(data) + data
+    # a temp file of its own: several workers save to the same path
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+    result = {"path": str(path), "caches": len(caches), "entries": entries, "bytes": len(data),
+              "ms": round((time.perf_counter() - start) * 1000, 1)}
+    with _stats_lock:
+        _stats["saves"] += 1
+        _stats["last_save"] = result
+    logger.info(f"[CACHE SNAPSHOT] Saved {entries} entries from {len(caches)} caches "
+                f"to {path} ({len(data)} bytes)")
+    return result
+
+
+def load_snapshot(path: str | Path) -> dict:
+    """Load a snapshot into the matching registered caches (existing entries win)."""
+    path = Path(path)
+    result = {"path": str(path), "loaded": 0, "expired": 0, "skipped": 0}
+    if not path.exists():
+        return result
+    if not settings.cache_snapshot_secret:
+        logger.warning(f"[CACHE SNAPSHOT] No cache_snapshot_secret configured, not loading {path}")
+        return {**result, "error": "no secret"}
+    raw = path.read_bytes()
+    signature, data = raw[:SIGNATURE_BYTES], raw[SIGNATURE_BYTES:]
+    if not hmac.compare_digest(signature, _sign(data)):
+        logger.error(f"[CACHE SNAPSHOT] Ignoring {path}: bad signature")
+        return {**result, "error": "bad signature"}
+    try:
+        payload = pickle.loads(gzip.decompress(data))
+    except Exception as e:
+        logger.error(f"[CACHE SNAPSHOT] Ignoring unreadable {path}: {e}")
+        return {**result, "error": str(e)}
+
+    header = {k: payload.get(k) for k in _header()}
+    if header != _header():
+        logger.warning(f"[CACHE SNAPSHOT] Ignoring {path}: written by {header}, running {_header()}")
+        return {**result, "error": "version mismatch"}
+
+    elapsed = max(0.0, time.time() - payload["saved_at"])
+    caches = _selected_caches()
+    for name, blob in payload["caches"].items():
+        cache = caches.get(name)
+        if cache is None:
+            continue
+        try:
+            entries = pickle.loads(blob)
+        except Exception as e:     # e.g. a cached type moved since the snapshot was taken
+            logger.warning(f"[CACHE SNAPSHOT] Skipping {name}: {e}")
+            continue
+        for key, value, fresh_for, expires_in in entries:
+            if expires_in - elapsed <= 0:
+                result["expired"] += 1
+            elif cache.restore(key, value, fresh_for - elapsed, expires_in - elapsed):
+                result["loaded"] += 1
+            else:
+                result["skipped"] += 1
+
+    result["age_s"] = round(elapsed)
+    with _stats_lock:
+        _stats["loads"].append(result)
+    logger.info(f"[CACHE SNAPSHOT] Loaded {result['loaded']} entries from {path} "
+                f"({result['expired']} expired, age {result['age_s']}s)")
+    return result
+
+
+def restore_caches() -> list[dict]:
+    """Startup: the local snapshot first (newest entries win), then the image's seed."""
+    results = []
+    for path in (settings.cache_snapshot_path, settings.cache_snapshot_seed_path):
+        if path:
+            results.append(load_snapshot(path))
+    return results
+
+
+def start_snapshotter(interval: float | None = None):
+    """Save a snapshot periodically in a daemon thread."""
+    global _snapshotter
+    interval = interval if interval is not None else settings.cache_snapshot_interval_seconds
+    if (not settings.cache_snapshot_path or not settings.cache_snapshot_secret or not interval
+            or (_snapshotter and _snapshotter.is_alive())):
+        return
+    _snapshotter_stop.clear()
+
+    def loop():
+        while not _snapshotter_stop.wait(interval):
+            try:
+                save_snapshot()
+            except Exception as e:
+                logger.error(f"[CACHE SNAPSHOT] Save failed: {e}")
+
+    _snapshotter = threading.Thread(target=loop, name="cache-snapshotter", daemon=True)
+    _snapshotter.start()
+    logger.info(f"[CACHE SNAPSHOT] Saving every {interval}s to {settings.cache_snapshot_path}")
+
+
+def stop_snapshotter():
+    global _snapshotter
+    _snapshotter_stop.set()
+    if _snapshotter:
+        _snapshotter.join(timeout=5)
+        _snapshotter = None
+
+
+def snapshot_stats() -> dict:
+    with _stats_lock:
+        return {"saves": _stats["saves"], "last_save": _stats["last_save"], "loads": list(_stats["loads"])}
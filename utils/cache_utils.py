@@ -1,22 +1,410 @@
-import time
+import asyncio
+import functools
+import inspect
+import json
 import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from core.config import settings
+from utils.disk_cache import disk_namespace
 
 logger = logging.getLogger(__name__)
 
-def ttl_cache(ttl=300):
-    """Simple time-based cache decorator to avoid frequent API calls."""
-    def decorator(func):
-        cache = {}
-        def wrapper(*args):
-            key = args
-            now = time.time()
-            if key in cache:
-                value, ts = cache[key]
-                if now - ts < ttl:
-                    logger.debug(f"[CACHE] Hit for {func.__name__} with args {args}")
+# name → TTLCache, for /stats and tests
+_registry: dict[str, "TTLCache"] = {}
+_registry_lock = threading.Lock()
+
+# stale-while-revalidate refreshes of sync functions run here, off the request path
+_refresh_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+_REFRESH = object()     # inflight owner of background refreshes
+_background_tasks: set = set()
+
+
+def _approx_size(value) -> int:
+    """Rough retained size of a cached value (JSON length; tool results are JSON-like)."""
+    try:
+        return len(json.dumps(value, default=str, ensure_ascii=False))
+    except (TypeError, ValueError):
+        return sys.getsizeof(value)
+
+
+def _is_cacheable(result) -> bool:
+    """Never cache failures: None and the tools' {"error": ...} results."""
+    if result is None:
+        return False
+    if isinstance(result, dict) and "error" in result:
+        return False
+    return True
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with per-entry expiry, an entry cap and a byte budget.
+
+    With `max_stale` > 0 an entry outlives its `ttl` by up to that many
+    seconds as a stale entry: still returned by `lookup` (flagged stale) so
+    the caller can serve it while refreshing, then dropped (hard expiry).
+
+    Values are shared between callers, so treat them as read-only.
+    """
+
+    def __init__(self, name: str, ttl: float = 300, maxsize: int | None = None, max_bytes: int | None = None,
+                 max_stale: float = 0):
+        self.name = name
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.maxsize = maxsize if maxsize is not None else settings.cache_default_max_entries
+        self.max_bytes = max_bytes if max_bytes is not None else settings.cache_default_max_bytes
+
+        self._lock = threading.Lock()
+        self._data: OrderedDict = OrderedDict()     # key → (value, fresh_until, expires_at, size)
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0
+        self.uncacheable = 0
+        self.stale_served = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+
+    def lookup(self, key):
+        """Return (hit, value, stale); stale entries are past `ttl` but within `max_stale`."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None, False
+            value, fresh_until, expires_at, _ = entry
+            now = time.monotonic()
+            if now >= expires_at:
+                self._pop(key)
+                self.expirations += 1
+                self.misses += 1
+                return False, None, False
+            self._data.move_to_end(key)
+            self.hits += 1
+            stale = now >= fresh_until
+            if stale:
+                self.stale_served += 1
+            return True, value, stale
+
+    def peek(self, key):
+        """Like get(), for speculative lookups: a miss is not counted."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or time.monotonic() >= entry[2]:
+                return False, None
+        return self.get(key)
+
+    def get(self, key):
+        """Return (True, value) on a hit (fresh or stale), else (False, None)."""
+        hit, value, _ = self.lookup(key)
+        return hit, value
+
+    def set(self, key, value, ttl: float | None = None):
+        size = _approx_size(value)
+        if size > self.max_bytes:
+            return      # would evict everything else
+        fresh_until = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._pop(key)
+            self._data[key] = (value, fresh_until, fresh_until + self.max_stale, size)
+            self._bytes += size
+            while len(self._data) > self.maxsize or self._bytes > self.max_bytes:
+                self._pop(next(iter(self._data)))
+                self.evictions += 1
+
+    def export(self) -> list[tuple]:
+        """Unexpired entries as (key, value, fresh_for, expires_in) in LRU order; seconds from now."""
+        now = time.monotonic()
+        with self._lock:
+            return [(key, value, fresh_until - now, expires_at - now)
+                    for key, (value, fresh_until, expires_at, _) in self._data.items() if expires_at > now]
+
+    def restore(self, key, value, fresh_for: float, expires_in: float) -> bool:
+        """Insert an exported entry unless the key is already cached; False if skipped."""
+        size = _approx_size(value)
+        if size > self.max_bytes or expires_in <= 0:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if key in self._data:
+                return False
+            self._data[key] = (value, now + fresh_for, now + expires_in, size)
+            self._bytes += size
+            while len(self._data) > self.maxsize or self._bytes > self.max_bytes:
+                self._pop(next(iter(self._data)))
+                self.evictions += 1
+        return True
+
+    def _pop(self, key):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[3]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "uncacheable": self.uncacheable,
+            }
+            if self.max_stale:
+                stats.update(stale_served=self.stale_served, refreshes=self.refreshes,
+                             refresh_failures=self.refresh_failures)
+            return stats
+
+
+def _make_key(args, kwargs):
+    key = (args, tuple(sorted(kwargs.items()))) if kwargs else args
+    try:
+        hash(key)
+        return key
+    except TypeError:
+        return repr(key)
+
+
+def _disk_key(func_name: str, key) -> str:
+    """Stable text form of a cache key (the disk tier is shared across functions, processes and restarts)."""
+    return f"{func_name}:{json.dumps(key, default=repr, separators=(',', ':'), ensure_ascii=False)}"
+
+
+def ttl_cache(func=None, *, ttl=300, maxsize: int | None = None, max_bytes: int | None = None,
+              name: str | None = None, cacheable=_is_cacheable, disk=None, max_stale: float = 0, key=None):
+    """
+    Cache a function's results for `ttl` seconds.
+
+        @ttl_cache
+        @ttl_cache(ttl=600, maxsize=512)
+        @ttl_cache(ttl=lambda result: 15 if result["live"] else 3600)
+
+    `ttl` may be a policy `ttl(result) -> seconds`, evaluated per result
+    (the disk tier keeps its namespace TTL).
+
+    Works on sync and async functions. Concurrent misses for the same
+    arguments are coalesced (single-flight): one call goes upstream and every
+    other caller, on any thread or event loop, waits for its result.
+    Exceptions and results rejected by `cacheable` are passed through but not
+    cached. `key(*args, **kwargs)` overrides how calls map to cache keys.
+
+    `disk="<namespace>"` (or a DiskNamespace) adds the persistent SQLite
+    tier (utils/disk_cache.py) behind the in-memory one: misses read it
+    before going upstream, and cacheable results are written to both.
+    Results must be JSON-serializable.
+
+    `max_stale` > 0 turns on stale-while-revalidate: for that many seconds
+    past `ttl` the last result is returned immediately while one background
+    call refreshes it. A failed refresh keeps the stale result; past
+    `ttl + max_stale` (hard expiry) callers wait for upstream again.
+    """
+    if isinstance(func, (int, float)):
+        # legacy @ttl_cache(300)
+        ttl, func = func, None
+    if func is None:
+        return lambda f: ttl_cache(f, ttl=ttl, maxsize=maxsize, max_bytes=max_bytes, name=name,
+                                   cacheable=cacheable, disk=disk, max_stale=max_stale, key=key)
+
+    cache_name = name or f"{func.__module__}.{func.__qualname__}"
+    cache = TTLCache(cache_name, ttl=0 if callable(ttl) else ttl, maxsize=maxsize, max_bytes=max_bytes,
+                     max_stale=max_stale)
+    with _registry_lock:
+        _registry[cache_name] = cache
+
+    disk_ns = disk_namespace(disk) if isinstance(disk, str) else disk
+    make_key = key or (lambda *args, **kwargs: _make_key(args, kwargs))
+
+    inflight: dict = {}     # key → (Future of the leader's call, leader thread/task)
+    inflight_lock = threading.Lock()
+
+    def _claim(key, owner):
+        """Return (future, is_leader); (None, False) if `owner` already leads this key (recursion)."""
+        with inflight_lock:
+            entry = inflight.get(key)
+            if entry is not None:
+                fut, leader = entry
+                if leader == owner:
+                    return None, False
+                with cache._lock:
+                    cache.coalesced += 1
+                return fut, False
+            fut = Future()
+            inflight[key] = (fut, owner)
+            return fut, True
+
+    def _disk_get(key):
+        try:
+            return disk_ns.get(_disk_key(func.__qualname__, key))
+        except Exception as e:     # sqlite3.Error, bad JSON: the disk tier is best-effort
+            logger.warning(f"[DISK CACHE] Read failed for {cache_name}: {e}")
+            return False, None
+
+    def _disk_set(key, result):
+        try:
+            disk_ns.set(_disk_key(func.__qualname__, key), result)
+        except Exception as e:
+            logger.warning(f"[DISK CACHE] Write failed for {cache_name}: {e}")
+
+    def _entry_ttl(result):
+        if not callable(ttl):
+            return None
+        try:
+            return ttl(result)
+        except Exception as e:     # a broken policy must not strand waiting callers
+            logger.warning(f"[CACHE] TTL policy of {cache_name} failed: {e}")
+            return 0
+
+    def _finish(key, fut, result=None, error=None, refresh=False):
+        """Cache and publish a call's outcome; True if the caller should write `result` to the disk tier.
+
+        The disk write is left to the caller so the async paths can run it off the event loop.
+        """
+        stored = error is None and cacheable(result)
+        if stored:
+            cache.set(key, result, ttl=_entry_ttl(result))
+        else:
+            with cache._lock:
+                if error is None:
+                    cache.uncacheable += 1
+                if refresh:
+                    cache.refresh_failures += 1     # the stale entry stays until hard expiry
+        with inflight_lock:
+            inflight.pop(key, None)
+        if error is None:
+            fut.set_result(result)
+        else:
+            fut.set_exception(error)
+        return stored and disk_ns is not None
+
+    def _claim_refresh(key):
+        """Future for a background refresh of `key`, None if a call for it is already in flight."""
+        fut, leader = _claim(key, _REFRESH)
+        if not leader:
+            return None
+        with cache._lock:
+            cache.refreshes += 1
+        return fut
+
+    def _refresh_sync(key, fut, args, kwargs):
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            logger.warning(f"[CACHE] Background refresh of {cache_name} failed: {e}")
+            _finish(key, fut, error=e, refresh=True)
+            return
+        if _finish(key, fut, result, refresh=True):
+            _disk_set(key, result)
+
+    async def _refresh_async(key, fut, args, kwargs):
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as e:
+            logger.warning(f"[CACHE] Background refresh of {cache_name} failed: {e}")
+            _finish(key, fut, error=e, refresh=True)
+            return
+        except BaseException as e:
+            # cancelled with its event loop (asyncio.run() returning): release the key
+            _finish(key, fut, error=e, refresh=True)
+            raise
+        if _finish(key, fut, result, refresh=True):
+            await asyncio.to_thread(_disk_set, key, result)
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not settings.cache_enabled:
+                return await func(*args, **kwargs)
+            key = make_key(*args, **kwargs)
+            hit, value, stale = cache.lookup(key)
+            if hit:
+                if stale and (fut := _claim_refresh(key)) is not None:
+                    task = asyncio.get_running_loop().create_task(_refresh_async(key, fut, args, kwargs))
+                    _background_tasks.add(task)
+                    task.add_done_callback(_background_tasks.discard)
+                return value
+            fut, leader = _claim(key, asyncio.current_task())
+            if fut is None:
+                return await func(*args, **kwargs)
+            if not leader:
+                return await asyncio.wrap_future(fut)
+            if disk_ns is not None:
+                hit, value = await asyncio.to_thread(_disk_get, key)
+                if hit:
+                    _finish(key, fut, value)
                     return value
-            result = func(*args)
-            cache[key] = (result, now)
+            try:
+                result = await func(*args, **kwargs)
+            except BaseException as e:
+                _finish(key, fut, error=e)
+                raise
+            if _finish(key, fut, result):
+                # a SQLite upsert; off the loop, which may be serving every upstream call
+                await asyncio.to_thread(_disk_set, key, result)
             return result
-        return wrapper
-    return decorator
+    else:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not settings.cache_enabled:
+                return func(*args, **kwargs)
+            key = make_key(*args, **kwargs)
+            hit, value, stale = cache.lookup(key)
+            if hit:
+                if stale and (fut := _claim_refresh(key)) is not None:
+                    _refresh_pool.submit(_refresh_sync, key, fut, args, kwargs)
+                return value
+            fut, leader = _claim(key, threading.get_ident())
+            if fut is None:
+                return func(*args, **kwargs)
+            if not leader:
+                return fut.result()
+            if disk_ns is not None:
+                hit, value = _disk_get(key)
+                if hit:
+                    _finish(key, fut, value)
+                    return value
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                _finish(key, fut, error=e)
+                raise
+            if _finish(key, fut, result):
+                _disk_set(key, result)
+            return result
+
+    wrapper.cache = cache
+    wrapper.cache_clear = cache.clear
+    wrapper.disk = disk_ns
+    wrapper.uncached = func
+    return wrapper
+
+
+def cache_stats() -> dict:
+    """Stats of every ttl_cache in the process, keyed by cache name."""
+    with _registry_lock:
+        caches = list(_registry.values())
+    return {cache.name: cache.stats() for cache in caches}
+
+
+def cache_clear():
+    with _registry_lock:
+        caches = list(_registry.values())
+    for cache in caches:
+        cache.clear()
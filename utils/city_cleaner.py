@@ -35,17 +35,19 @@ def extract_city_from_text(text: str) -> str:
 
 from openai import AzureOpenAI
 from core.config import settings
+from utils.llm_cache import cached_completions
 
 client = AzureOpenAI(
     api_key=settings.openai_api_key,
     azure_endpoint=settings.azure_openai_endpoint,
     api_version="2024-12-01-preview"
 )
+spelling_completions = cached_completions(client, "city_spelling")
 
 def correct_city_spelling(city: str) -> str:
     prompt = f"Correct this to a valid city name: '{city}'. Only return the corrected city name."
 
-    res = client.chat.completions.create(
+    res = spelling_completions.create(
         model="gpt-4.1-mini",
         messages=[{"role": "user", "content": prompt}],
         temperature=0.0,
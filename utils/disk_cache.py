@@ -0,0 +1,181 @@
+"""
+Disk-backed second cache tier (local SQLite, WAL) behind utils.cache_utils.
+
+Entries are grouped in namespaces ("wikipedia", "geocode", ...), each with
+its own TTL and size limit, and survive restarts: a new container revision
+with the file on a mounted volume serves popular cities at local-read speed
+instead of refetching them. Several workers can share one file.
+
+Values must be JSON-serializable (tuples come back as lists).
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Reads refresh `accessed_at` (LRU order) at most this often per entry
+ACCESS_GRANULARITY_SECONDS = 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    namespace   TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    value       TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    expires_at  REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_cache_lru ON cache (namespace, accessed_at);
+"""
+
+SQL_GET = "SELECT value, expires_at, accessed_at FROM cache WHERE namespace = ? AND key = ?"
+SQL_TOUCH = "UPDATE cache SET accessed_at = ? WHERE namespace = ? AND key = ?"
+SQL_PUT = "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?, ?)"
+SQL_DELETE = "DELETE FROM cache WHERE namespace = ? AND key = ?"
+SQL_DELETE_EXPIRED = "DELETE FROM cache WHERE namespace = ? AND expires_at <= ?"
+SQL_USAGE = "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache WHERE namespace = ?"
+SQL_LRU = "SELECT key, size FROM cache WHERE namespace = ? ORDER BY accessed_at LIMIT ?"
+SQL_CLEAR = "DELETE FROM cache WHERE namespace = ?"
+
+
+class DiskNamespace:
+    def __init__(self, cache: "DiskCache", name: str, ttl: float, max_bytes: int, max_entries: int):
+        self.cache = cache
+        self.name = name
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._bytes: int | None = None      # running estimate, re-read when over budget
+        self._entries: int | None = None
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    def get(self, key: str):
+        """Return (True, value) for a fresh entry, else (False, None)."""
+        now = time.time()
+        with self.cache._conn() as conn:
+            row = conn.execute(SQL_GET, (self.name, key)).fetchone()
+            if row is None:
+                self.misses += 1
+                return False, None
+            value, expires_at, accessed_at = row
+            if expires_at <= now:
+                conn.execute(SQL_DELETE, (self.name, key))
+                self.misses += 1
+                return False, None
+            if now - accessed_at > ACCESS_GRANULARITY_SECONDS:
+                conn.execute(SQL_TOUCH, (now, self.name, key))
+        self.hits += 1
+        return True, json.loads(value)
+
+    def set(self, key: str, value, ttl: float | None = None):
+        encoded = json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+        size = len(encoded)
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self.cache._conn() as conn:
+            conn.execute(SQL_PUT, (self.name, key, encoded, size, now + (ttl or self.ttl), now))
+            self.writes += 1
+            if self._bytes is None:
+                self._entries, self._bytes = conn.execute(SQL_USAGE, (self.name,)).fetchone()
+            else:
+                # upper bound (a replaced entry is counted twice until the next re-read)
+                self._entries += 1
+                self._bytes += size
+            if self._bytes > self.max_bytes or self._entries > self.max_entries:
+                self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        conn.execute(SQL_DELETE_EXPIRED, (self.name, now))
+        entries, total = conn.execute(SQL_USAGE, (self.name,)).fetchone()
+        # trim to 90% so we do not evict on every write at the limit
+        excess_bytes = total - int(self.max_bytes * 0.9)
+        excess_entries = entries - int(self.max_entries * 0.9)
+        victims = []
+        if excess_bytes > 0 or excess_entries > 0:
+            for key, size in conn.execute(SQL_LRU, (self.name, max(entries // 4, 1))):
+                if excess_bytes <= 0 and excess_entries <= 0:
+                    break
+                victims.append((self.name, key))
+                excess_bytes -= size
+                excess_entries -= 1
+                total -= size
+            conn.executemany(SQL_DELETE, victims)
+            self.evictions += len(victims)
+        self._entries, self._bytes = entries - len(victims), total
+        if victims:
+            logger.info(f"[DISK CACHE] Evicted {len(victims)} entries from '{self.name}'")
+
+    def clear(self):
+        with self.cache._conn() as conn:
+            conn.execute(SQL_CLEAR, (self.name,))
+        self._bytes = self._entries = None
+
+    def stats(self) -> dict:
+        with self.cache._conn() as conn:
+            entries, total = conn.execute(SQL_USAGE, (self.name,)).fetchone()
+        return {
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+        }
+
+
+class DiskCache:
+    def __init__(self, path: str | Path, busy_timeout_ms: int = 5000):
+        self.path = Path(path)
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()     # one connection per thread
+        self._namespaces: dict[str, DiskNamespace] = {}
+        self._lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000, cached_statements=32)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn     # used as `with`: one transaction per block
+
+    def namespace(self, name: str, ttl: float, max_bytes: int = 50_000_000, max_entries: int = 100_000) -> DiskNamespace:
+        with self._lock:
+            ns = self._namespaces.get(name)
+            if ns is None:
+                ns = self._namespaces[name] = DiskNamespace(self, name, ttl, max_bytes, max_entries)
+            return ns
+
+    def stats(self) -> dict:
+        with self._lock:
+            namespaces = list(self._namespaces.values())
+        return {ns.name: ns.stats() for ns in namespaces}
+
+
+disk_cache = DiskCache(settings.cache_disk_path) if settings.cache_disk_path else None
+
+
+def disk_namespace(name: str) -> DiskNamespace | None:
+    """Namespace configured in settings (`cache_disk_<name>_ttl_seconds` / `_max_bytes`), None if the tier is off."""
+    if disk_cache is None:
+        return None
+    return disk_cache.namespace(
+        name,
+        ttl=getattr(settings, f"cache_disk_{name}_ttl_seconds"),
+        max_bytes=getattr(settings, f"cache_disk_{name}_max_bytes"),
+    )
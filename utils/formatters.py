@@ -112,7 +112,8 @@ def format_series_hybrid(series: dict) -> str:
     <p><b>🧠 Quick Summary:</b><br>
     Formats included: {list(formats.keys())}<br>
     First match: {matches[0].get('date', '-') if matches else '-'}<br>
-    Last match: {matches[-1].get('date', '-') if matches else '-'}
+    Last match: {matches[-1].get('date', '-') if matches else '-'}<br>
+    Schedule data as of: {series.get('as_of') or '-'}
     </p>
     """
 
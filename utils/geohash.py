@@ -0,0 +1,69 @@
+"""
+Minimal geohash (base32, interleaved lon/lat bits) for bucketing coordinates.
+
+Precision 5 cells are ~4.9 x 4.9 km at the equator (narrower towards the
+poles); precision 4 cells ~39 x 19.5 km.
+"""
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {c: i for i, c in enumerate(BASE32)}
+
+
+def encode(lat: float, lon: float, precision: int = 5) -> str:
+    lat_lo, lat_hi, lon_lo, lon_hi = -90.0, 90.0, -180.0, 180.0
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            value = value * 2 + (lon >= mid)
+            lon_lo, lon_hi = (mid, lon_hi) if lon >= mid else (lon_lo, mid)
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            value = value * 2 + (lat >= mid)
+            lat_lo, lat_hi = (mid, lat_hi) if lat >= mid else (lat_lo, mid)
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+def bounds(geohash: str) -> tuple[float, float, float, float]:
+    """(lat_lo, lat_hi, lon_lo, lon_hi) of a cell."""
+    lat_lo, lat_hi, lon_lo, lon_hi = -90.0, 90.0, -180.0, 180.0
+    even = True
+    for c in geohash:
+        value = _DECODE[c]
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                mid = (lon_lo + lon_hi) / 2
+                lon_lo, lon_hi = (mid, lon_hi) if bit else (lon_lo, mid)
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                lat_lo, lat_hi = (mid, lat_hi) if bit else (lat_lo, mid)
+            even = not even
+    return lat_lo, lat_hi, lon_lo, lon_hi
+
+
+def center(geohash: str) -> tuple[float, float]:
+    lat_lo, lat_hi, lon_lo, lon_hi = bounds(geohash)
+    return (lat_lo + lat_hi) / 2, (lon_lo + lon_hi) / 2
+
+
+def neighbors(geohash: str) -> list[str]:
+    """The (up to) 8 cells around a cell; wraps at the antimeridian, clips at the poles."""
+    lat_lo, lat_hi, lon_lo, lon_hi = bounds(geohash)
+    lat_c, lon_c = (lat_lo + lat_hi) / 2, (lon_lo + lon_hi) / 2
+    d_lat, d_lon = lat_hi - lat_lo, lon_hi - lon_lo
+    cells = []
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            if not dx and not dy:
+                continue
+            lat = lat_c + dy * d_lat
+            if not -90 < lat < 90:
+                continue
+            lon = (lon_c + dx * d_lon + 180) % 360 - 180
+            cells.append(encode(lat, lon, len(geohash)))
+    return cells
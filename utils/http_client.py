@@ -0,0 +1,222 @@
+"""
+Shared async HTTP client for the upstream tools (Cricbuzz, OpenWeatherMap,
+Wikipedia, Azure Maps).
+
+One httpx.AsyncClient with keep-alive connection pools, driven by its own
+event loop in a daemon thread ("http-io"):
+
+    response = await http.get(url, params=...)     # from any event loop
+    result = http.run_sync(aget_weather(city))      # sync callers (graph nodes, domain LLMs)
+    response = await http.run(aclient.chat.completions.create(...))   # other async clients
+
+Awaiting `http.get` never ties up a thread, so hundreds of concurrent
+lookups cost one socket each instead of a worker thread each. Sync callers
+block only their own thread while the coroutine runs on the I/O loop; the
+caller's context variables (memory transaction, round-trip counter) go
+with it. Other async clients with their own connection pools (the Azure
+OpenAI ones) are only ever awaited through `http.run`, so their pools stay
+on one loop too.
+
+GETs are retried on connection errors, timeouts and transient statuses,
+with exponential backoff and full jitter; a Retry-After header is honored
+(up to `http_retry_after_max_seconds`, beyond that the response is returned
+as is). Latency, retries and errors are tracked per host for /stats.
+"""
+import asyncio
+import email.utils
+import logging
+import random
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+import httpx
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_ERRORS = (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)
+LATENCY_SAMPLES = 512       # per host, for percentiles
+
+
+class HostStats:
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0         # gave up: exception or retryable status after the last attempt
+        self.statuses: dict[int, int] = {}
+        self.total_seconds = 0.0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def snapshot(self) -> dict:
+        ordered = sorted(self.latencies)
+
+        def pct(p):
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 1) if ordered else None
+
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "errors": self.errors,
+            "statuses": dict(self.statuses),
+            "avg_ms": round(self.total_seconds / self.requests * 1000, 1) if self.requests else None,
+            "p50_ms": pct(0.5),
+            "p95_ms": pct(0.95),
+        }
+
+
+def _retry_after(response) -> float | None:
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), None if absent or invalid."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HttpClient:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts: dict[str, HostStats] = {}
+
+        self._start_lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._client: httpx.AsyncClient | None = None
+
+    # --------------------------------------------------------
+    # I/O loop
+    # --------------------------------------------------------
+    def _io_loop(self) -> asyncio.AbstractEventLoop:
+        """The client's event loop, started on first use."""
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._client = httpx.AsyncClient(
+                    limits=httpx.Limits(max_connections=settings.http_max_connections,
+                                        max_keepalive_connections=settings.http_max_keepalive_connections),
+                    timeout=httpx.Timeout(settings.http_read_timeout_seconds,
+                                          connect=settings.http_connect_timeout_seconds),
+                    follow_redirects=True,
+                )
+                self._thread = threading.Thread(target=loop.run_forever, name="http-io", daemon=True)
+                self._thread.start()
+                self._loop = loop
+            return self._loop
+
+    async def run(self, coro):
+        """Await a coroutine on the I/O loop, from any event loop."""
+        loop = self._io_loop()
+        if asyncio.get_running_loop() is loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    def run_sync(self, coro):
+        """Run a coroutine on the I/O loop and wait for its result (sync callers only)."""
+        loop = self._io_loop()
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("blocking call on the HTTP I/O loop: await the async version instead")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    def close(self):
+        """Close the pools and stop the I/O loop (restarted on next use)."""
+        with self._start_lock:
+            loop, thread, client = self._loop, self._thread, self._client
+            self._loop = self._thread = self._client = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop).result(timeout=5)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=5)
+            loop.close()
+
+    # --------------------------------------------------------
+    # Requests
+    # --------------------------------------------------------
+    def _record(self, host: str, seconds: float, status: int | None = None, retry: bool = False,
+                error: bool = False):
+        with self._lock:
+            stats = self._hosts.setdefault(host, HostStats())
+            stats.requests += 1
+            stats.total_seconds += seconds
+            stats.latencies.append(seconds)
+            if status is not None:
+                stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            if retry:
+                stats.retries += 1
+            if error:
+                stats.errors += 1
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(settings.http_backoff_max_seconds,
+                                     settings.http_backoff_base_seconds * 2 ** attempt))
+
+    async def get(self, url: str, *, params=None, headers=None, timeout: float | None = None,
+                  retries: int | None = None, retry_statuses=RETRY_STATUSES) -> httpx.Response:
+        """
+        GET with pooling and retries. Returns the last response whatever its
+        status (callers keep their own status handling); raises the last
+        httpx exception when every attempt failed to get one.
+        """
+        # like requests: None-valued headers and params (an unset API key) are left out
+        if headers:
+            headers = {k: v for k, v in headers.items() if v is not None}
+        if params:
+            params = {k: v for k, v in params.items() if v is not None}
+        return await self.run(self._get(url, params, headers, timeout, retries, retry_statuses))
+
+    async def _get(self, url, params, headers, timeout, retries, retry_statuses) -> httpx.Response:
+        host = urlsplit(url).netloc
+        retries = settings.http_max_retries if retries is None else retries
+        if timeout is not None:
+            timeout = httpx.Timeout(timeout, connect=min(settings.http_connect_timeout_seconds, timeout))
+        else:
+            timeout = httpx.USE_CLIENT_DEFAULT
+
+        for attempt in range(retries + 1):
+            last = attempt == retries
+            start = time.perf_counter()
+            try:
+                response = await self._client.get(url, params=params, headers=headers, timeout=timeout)
+            except RETRY_ERRORS as e:
+                self._record(host, time.perf_counter() - start, retry=not last, error=last)
+                if last:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"[HTTP] {host}: {type(e).__name__}, retry {attempt + 1}/{retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            elapsed = time.perf_counter() - start
+            if response.status_code not in retry_statuses:
+                self._record(host, elapsed, response.status_code)
+                return response
+
+            retry_after = _retry_after(response)
+            if last or (retry_after is not None and retry_after > settings.http_retry_after_max_seconds):
+                self._record(host, elapsed, response.status_code, error=True)
+                return response
+            self._record(host, elapsed, response.status_code, retry=True)
+            delay = retry_after if retry_after is not None else self._backoff(attempt)
+            logger.warning(f"[HTTP] {host}: status {response.status_code}, "
+                           f"retry {attempt + 1}/{retries} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {host: stats.snapshot() for host, stats in self._hosts.items()}
+
+
+http = HttpClient()
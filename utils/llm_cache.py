@@ -0,0 +1,174 @@
+"""
+Response cache around `client.chat.completions.create`.
+
+Each call site gets its own CachedCompletions (own TTL, own stats):
+
+    intent_completions = cached_completions(client, "intent")
+    res = intent_completions.create(model=..., messages=..., temperature=0.2)
+
+With an async client (AsyncAzureOpenAI), `await acreate(...)` holds no
+thread while the completion is in flight; it runs on the shared HTTP I/O
+loop (utils.http_client), and `create(...)` stays available to sync callers.
+
+Requests are keyed on a sha256 of the endpoint, model, messages and every
+sampling parameter, so only byte-identical requests share a response.
+Identical requests in flight are coalesced into one upstream call (see
+utils.cache_utils.ttl_cache). Token usage is accounted per site, both
+spent (upstream calls) and saved (cache hits), with an estimated cost.
+"""
+import hashlib
+import json
+import logging
+import threading
+
+from openai import AsyncOpenAI
+
+from core.config import settings
+from utils.cache_utils import ttl_cache
+from utils.http_client import http
+
+logger = logging.getLogger(__name__)
+
+# site → CachedCompletions, for /stats
+_sites: dict[str, "CachedCompletions"] = {}
+_sites_lock = threading.Lock()
+
+
+def request_digest(endpoint: str, request: dict) -> str:
+    canonical = json.dumps({"endpoint": endpoint, "request": request},
+                           sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _cost(prompt_tokens: int, completion_tokens: int) -> float:
+    return (prompt_tokens * settings.llm_price_prompt_per_1k
+            + completion_tokens * settings.llm_price_completion_per_1k) / 1000
+
+
+def _usage(response) -> tuple[int, int]:
+    usage = getattr(response, "usage", None)
+    return (getattr(usage, "prompt_tokens", 0) or 0), (getattr(usage, "completion_tokens", 0) or 0)
+
+
+class _Probe:
+    """Set by the upstream call, so a caller can tell a cache hit from a miss."""
+    __slots__ = ("upstream",)
+
+    def __init__(self):
+        self.upstream = False
+
+
+class CachedCompletions:
+    """Drop-in for `client.chat.completions` at one call site (sync or async client)."""
+
+    def __init__(self, client, site: str, ttl: float | None = None):
+        self.client = client
+        self.is_async = isinstance(client, AsyncOpenAI)      # AsyncAzureOpenAI included
+        self.site = site
+        self.ttl = ttl if ttl is not None else settings.llm_cache_ttl_seconds.get(
+            site, settings.llm_cache_default_ttl_seconds)
+        self._endpoint = str(getattr(client, "base_url", ""))
+
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.upstream_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.saved_prompt_tokens = 0
+        self.saved_completion_tokens = 0
+
+        self._cached = ttl_cache(
+            self._aupstream if self.is_async else self._upstream,
+            ttl=self.ttl,
+            name=f"llm.{site}",
+            cacheable=lambda res: bool(getattr(res, "choices", None)),
+            key=lambda request, probe: request_digest(self._endpoint, request),
+        )
+
+    def _upstream(self, request: dict, probe: _Probe):
+        probe.upstream = True
+        return self.client.chat.completions.create(**request)
+
+    async def _aupstream(self, request: dict, probe: _Probe):
+        probe.upstream = True
+        return await http.run(self.client.chat.completions.create(**request))
+
+    def create(self, **request):
+        if self.is_async:
+            return http.run_sync(self.acreate(**request))
+        if not self.ttl or request.get("stream") or request.get("n", 1) != 1:
+            response = self.client.chat.completions.create(**request)
+            self._account(response, hit=False)
+            return response
+
+        probe = _Probe()
+        response = self._cached(request, probe)
+        self._account(response, hit=not probe.upstream)
+        if not probe.upstream:
+            logger.debug(f"[LLM CACHE] Hit for site '{self.site}'")
+        return response
+
+    async def acreate(self, **request):
+        """Async create(); needs an async client."""
+        if not self.is_async:
+            raise TypeError(f"LLM site '{self.site}' has a sync client: use create()")
+        if not self.ttl or request.get("stream") or request.get("n", 1) != 1:
+            response = await http.run(self.client.chat.completions.create(**request))
+            self._account(response, hit=False)
+            return response
+
+        probe = _Probe()
+        response = await self._cached(request, probe)
+        self._account(response, hit=not probe.upstream)
+        if not probe.upstream:
+            logger.debug(f"[LLM CACHE] Hit for site '{self.site}'")
+        return response
+
+    def _account(self, response, hit: bool):
+        prompt, completion = _usage(response)
+        with self._lock:
+            self.calls += 1
+            if hit:
+                self.saved_prompt_tokens += prompt
+                self.saved_completion_tokens += completion
+            else:
+                self.upstream_calls += 1
+                self.prompt_tokens += prompt
+                self.completion_tokens += completion
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.calls - self.upstream_calls
+            return {
+                "ttl": self.ttl,
+                "calls": self.calls,
+                "hits": hits,
+                "hit_rate": round(hits / self.calls, 3) if self.calls else 0.0,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "saved_prompt_tokens": self.saved_prompt_tokens,
+                "saved_completion_tokens": self.saved_completion_tokens,
+                "cost_usd": round(_cost(self.prompt_tokens, self.completion_tokens), 6),
+                "saved_cost_usd": round(_cost(self.saved_prompt_tokens, self.saved_completion_tokens), 6),
+            }
+
+
+def cached_completions(client, site: str, ttl: float | None = None) -> CachedCompletions:
+    completions = CachedCompletions(client, site, ttl)
+    with _sites_lock:
+        _sites[site] = completions
+    return completions
+
+
+def llm_cache_stats() -> dict:
+    """Per-site stats plus totals across sites."""
+    with _sites_lock:
+        sites = {site: c.stats() for site, c in _sites.items()}
+    totals = {
+        field: sum(s[field] for s in sites.values())
+        for field in ("calls", "hits", "prompt_tokens", "completion_tokens",
+                      "saved_prompt_tokens", "saved_completion_tokens")
+    }
+    totals["cost_usd"] = round(sum(s["cost_usd"] for s in sites.values()), 6)
+    totals["saved_cost_usd"] = round(sum(s["saved_cost_usd"] for s in sites.values()), 6)
+    return {"sites": sites, "total": totals}
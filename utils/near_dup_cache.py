@@ -0,0 +1,280 @@
+"""
+Near-duplicate query cache: MinHash + LSH over normalized word shingles.
+
+"india next match", "When is India's next match?" and "India upcoming game"
+normalize to the same shingles; "what is india's next cricket fixture
+please" lands close enough to share the cached answer too. Everything is
+local and pure Python (no embeddings, no network).
+
+Lookup: exact normalized key first, then LSH candidates whose true Jaccard
+similarity with the query is >= `threshold`. An optional `guard(text)` must
+also match (e.g. the team), so "india next match" never answers for
+"australia next match" however similar the wording.
+
+False hits are measured by auditing: a sampled fraction (`audit_rate`) of
+near hits is recomputed and compared with the cached value.
+"""
+import functools
+import hashlib
+import logging
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from core.config import settings
+from utils.cache_utils import _is_cacheable
+
+logger = logging.getLogger(__name__)
+
+# name → NearDuplicateCache, for /stats
+_registry: dict[str, "NearDuplicateCache"] = {}
+_registry_lock = threading.Lock()
+
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "be", "will", "when", "what", "whats", "which", "who",
+    "where", "how", "do", "does", "can", "could", "would", "please", "pls", "tell", "me", "show",
+    "give", "i", "you", "want", "know", "to", "of", "for", "in", "on", "at", "about", "and",
+    "there", "it", "its", "s", "any", "some", "cricket", "hey", "hi",
+}
+SYNONYMS = {
+    "upcoming": "next", "following": "next",
+    "game": "match", "games": "match", "matches": "match", "fixture": "match", "fixtures": "match",
+    "temp": "temperature", "forecast": "weather",
+}
+
+MERSENNE_61 = (1 << 61) - 1
+
+
+def normalize(text: str) -> tuple[str, ...]:
+    """Lowercased content words with possessives, stopwords and common synonyms folded."""
+    text = re.sub(r"'s\b", "", (text or "").lower())
+    words = re.sub(r"[^a-z0-9\s]", " ", text).split()
+    return tuple(SYNONYMS.get(w, w) for w in words if w not in STOPWORDS)
+
+
+def shingles(tokens: tuple[str, ...], size: int = 1) -> frozenset:
+    if len(tokens) <= size:
+        return frozenset([" ".join(tokens)]) if tokens else frozenset()
+    return frozenset(" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1))
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """`num_perm` universal hash functions (a*x + b mod 2^61-1) over 64-bit shingle hashes."""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.params = [(rng.randrange(1, MERSENNE_61), rng.randrange(0, MERSENNE_61)) for _ in range(num_perm)]
+
+    def signature(self, items: frozenset) -> tuple[int, ...]:
+        hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+                  for s in items] or [0]
+        return tuple(min((a * h + b) % MERSENNE_61 for h in hashes) for a, b in self.params)
+
+
+class NearDuplicateCache:
+    """
+    Bounded LRU of text → value with an LSH index (bands x rows == num_perm).
+
+    Pairs with Jaccard s become candidates with probability 1 - (1 - s^rows)^bands
+    (~0.98 at s=0.7 for 16x4); candidates are then checked exactly, so the
+    index never produces a hit below `threshold`.
+    """
+
+    def __init__(self, name: str, threshold: float = 0.7, ttl: float = 3600, max_entries: int = 5000,
+                 num_perm: int = 64, bands: int = 16, shingle_size: int = 1, audit_rate: float = 0.0):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.name = name
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.audit_rate = audit_rate
+        self.hasher = MinHasher(num_perm)
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[int, tuple] = OrderedDict()  # id → (exact key, shingles, band keys, value, expires_at)
+        self._exact: dict[tuple, int] = {}
+        self._buckets: list[dict[tuple, set]] = [{} for _ in range(bands)]
+        self._next_id = 0
+
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.audits = 0
+        self.false_hits = 0
+
+    def _prepare(self, text: str, guard):
+        tokens = normalize(text)
+        items = shingles(tokens, self.shingle_size)
+        return (guard, tokens), items
+
+    def _band_keys(self, items: frozenset, guard) -> list[tuple]:
+        sig = self.hasher.signature(items)
+        return [(guard, sig[i * self.rows:(i + 1) * self.rows]) for i in range(self.bands)]
+
+    def lookup(self, text: str, guard=None):
+        """Return (kind, value, similarity); kind is "exact", "near" or None."""
+        key, items = self._prepare(text, guard)
+        now = time.monotonic()
+        with self._lock:
+            entry_id = self._exact.get(key)
+            if entry_id is not None and self._live(entry_id, now):
+                self._entries.move_to_end(entry_id)
+                self.exact_hits += 1
+                return "exact", self._entries[entry_id][3], 1.0
+
+            candidates = set()
+            for band, band_key in enumerate(self._band_keys(items, guard)):
+                candidates |= self._buckets[band].get(band_key, set())
+            best_id, best = None, 0.0
+            for cid in candidates:
+                if not self._live(cid, now):
+                    continue
+                similarity = jaccard(items, self._entries[cid][1])
+                if similarity > best:
+                    best_id, best = cid, similarity
+            if best_id is not None and best >= self.threshold:
+                self._entries.move_to_end(best_id)
+                self.near_hits += 1
+                return "near", self._entries[best_id][3], round(best, 3)
+            self.misses += 1
+            return None, None, round(best, 3)
+
+    def add(self, text: str, value, guard=None):
+        key, items = self._prepare(text, guard)
+        if not items:
+            return
+        band_keys = self._band_keys(items, guard)
+        with self._lock:
+            old = self._exact.get(key)
+            if old is not None:
+                self._drop(old)
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (key, items, band_keys, value, time.monotonic() + self.ttl)
+            self._exact[key] = entry_id
+            for band, band_key in enumerate(band_keys):
+                self._buckets[band].setdefault(band_key, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def _live(self, entry_id: int, now: float) -> bool:
+        entry = self._entries.get(entry_id)
+        if entry is None:
+            return False
+        if now >= entry[4]:
+            self._drop(entry_id)
+            return False
+        return True
+
+    def _drop(self, entry_id: int):
+        key, _, band_keys, _, _ = self._entries.pop(entry_id)
+        if self._exact.get(key) == entry_id:
+            del self._exact[key]
+        for band, band_key in enumerate(band_keys):
+            bucket = self._buckets[band].get(band_key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[band][band_key]
+
+    def record_audit(self, false_hit: bool):
+        with self._lock:
+            self.audits += 1
+            if false_hit:
+                self.false_hits += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._exact.clear()
+            self._buckets = [{} for _ in range(self.bands)]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.exact_hits + self.near_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "threshold": self.threshold,
+                "exact_hits": self.exact_hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.exact_hits + self.near_hits) / lookups, 3) if lookups else 0.0,
+                "audits": self.audits,
+                "false_hits": self.false_hits,
+                "false_hit_rate": round(self.false_hits / self.audits, 3) if self.audits else None,
+            }
+
+
+def near_duplicate_cache(func=None, *, ttl: float = 3600, threshold: float | None = None, guard=None,
+                         audit_rate: float | None = None, max_entries: int | None = None,
+                         name: str | None = None, cacheable=_is_cacheable):
+    """
+    Cache a function of one text argument by near-duplicate lookup.
+
+        @near_duplicate_cache(ttl=600, guard=normalize_team)
+        def answer(query: str): ...
+
+    Exceptions and results rejected by `cacheable` are not cached. A sampled
+    `audit_rate` of near hits is recomputed: a different result counts as a
+    false hit (see stats) and the fresh result is returned and cached.
+    """
+    if func is None:
+        return lambda f: near_duplicate_cache(f, ttl=ttl, threshold=threshold, guard=guard,
+                                              audit_rate=audit_rate, max_entries=max_entries,
+                                              name=name, cacheable=cacheable)
+
+    cache_name = name or f"{func.__module__}.{func.__qualname__}"
+    cache = NearDuplicateCache(
+        cache_name,
+        threshold=threshold if threshold is not None else settings.near_dup_threshold,
+        ttl=ttl,
+        max_entries=max_entries if max_entries is not None else settings.near_dup_max_entries,
+        audit_rate=audit_rate if audit_rate is not None else settings.near_dup_audit_rate,
+    )
+    with _registry_lock:
+        _registry[cache_name] = cache
+
+    @functools.wraps(func)
+    def wrapper(text: str, *args, **kwargs):
+        if not settings.cache_enabled or args or kwargs:
+            return func(text, *args, **kwargs)
+        g = guard(text) if guard else None
+        kind, value, similarity = cache.lookup(text, g)
+        if kind == "exact":
+            return value
+        if kind == "near":
+            if not (cache.audit_rate and random.random() < cache.audit_rate):
+                logger.debug(f"[NEAR DUP] {cache_name}: '{text}' matched at {similarity}")
+                return value
+            fresh = func(text)
+            cache.record_audit(fresh != value)
+            if fresh != value:
+                logger.info(f"[NEAR DUP] False hit in {cache_name} for '{text}' (similarity {similarity})")
+            value = fresh
+        else:
+            value = func(text)
+        if cacheable(value):
+            cache.add(text, value, g)
+        return value
+
+    wrapper.cache = cache
+    wrapper.uncached = func
+    return wrapper
+
+
+def near_dup_stats() -> dict:
+    with _registry_lock:
+        caches = list(_registry.values())
+    return {cache.name: cache.stats() for cache in caches}